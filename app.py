@@ -1,25 +1,65 @@
 import os
 import asyncio
-from flask import Flask, request, render_template, send_file, jsonify, send_from_directory
+from flask import Flask, request, render_template, send_file, jsonify, send_from_directory, Response, stream_with_context
 from werkzeug.utils import secure_filename
-from utils.file_reader import read_file
+from utils.file_reader import read_file, clean_domain_list
 from utils.domain_checker import check_domains
-from utils.excel_generator import generate_excel
+from utils.sharding import SHARD_WORKERS, check_domains_sharded, sharding_enabled
+from utils.work_queue import WORK_UNIT_SIZE, check_domains_distributed, configure_work_queue, get_work_queue
+from utils.report_writers import REPORT_FORMATS, resolve_format, format_from_path, write_report, available_formats
+from utils.job_manager import JobManager, JOB_COMPLETED, FINISHED_STATES, EVENT_END, new_event_queue
+from utils.result_store import configure_result_store
+from utils.cache import configure_shared_cache
+from utils.metrics import configure_metrics, render_metrics
+from utils.checkpoint import JobCheckpoint, claim_pending_checkpoints
 import logging
+import json
+import queue
 import uuid
 import time
+import math
 from concurrent.futures import ThreadPoolExecutor
 import threading
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 32 * 1024 * 1024  # 32MB max file size
-app.config['DOMAIN_LIMIT'] = 1000  # Bir tekshirishda maksimal domenlar soni
+app.config['DOMAIN_LIMIT'] = 1000  # Bir tekshirishda maksimal domenlar soni (bitta event loop)
+# Shardlash yoqilganda (SHARD_WORKERS > 1) bitta vazifadagi domenlar chegarasi
+app.config['SHARDED_DOMAIN_LIMIT'] = int(os.environ.get('SHARDED_DOMAIN_LIMIT', 100000))
 app.config['PROCESSING_TIMEOUT'] = 180  # Reduced timeout to 3 minutes (from 5)
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))  # Parallel fon vazifalari soni
+app.config['STREAM_PROGRESS_INTERVAL'] = 1.0  # Jonli oqimda progress hodisalari oralig'i (sekund)
+# Vazifalar orasida saqlanadigan natijalar ombori (bo'sh qiymat - o'chirilgan)
+app.config['RESULT_STORE_PATH'] = os.environ.get(
+    'RESULT_STORE_PATH', os.path.join(app.root_path, 'data', 'results.sqlite3')
+)
+# Gunicorn workerlari uchun umumiy DNS / sog'liq / normallashtirish keshi (bo'sh qiymat - o'chirilgan)
+app.config['SHARED_CACHE_PATH'] = os.environ.get(
+    'SHARED_CACHE_PATH', os.path.join(app.root_path, 'data', 'shared_cache.sqlite3')
+)
+
+# /metrics uchun barcha workerlar qiymatlari yig'iladigan fayl (bo'sh qiymat - faqat shu jarayon)
+app.config['METRICS_PATH'] = os.environ.get(
+    'METRICS_PATH', os.path.join(app.root_path, 'data', 'metrics.sqlite3')
+)
+# Vazifalarning nazorat nuqtalari (bo'sh qiymat - o'chirilgan): tugagan natijalar shu yerga
+# qo'shib boriladi, jarayon qayta ishga tushganda tugallanmagan vazifalar davom ettiriladi
+app.config['CHECKPOINT_FOLDER'] = os.environ.get(
+    'CHECKPOINT_FOLDER', os.path.join(app.root_path, 'data', 'checkpoints')
+)
+# Taqsimlangan rejim: ish navbati fayli (bo'sh - o'chirilgan). Navbatni worker.py tugunlari o'qiydi
+app.config['WORK_QUEUE_PATH'] = os.environ.get('WORK_QUEUE_PATH', '')
 
 # Upload papkasini yaratish
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+# Natijalar ombori va umumiy keshni ochish
+configure_result_store(app.config['RESULT_STORE_PATH'])
+configure_shared_cache(app.config['SHARED_CACHE_PATH'])
+configure_work_queue(app.config['WORK_QUEUE_PATH'])
+configure_metrics(app.config['METRICS_PATH'])
+
 # Yaxshiroq logging
 logging.basicConfig(
     level=logging.INFO,
@@ -64,7 +104,8 @@ def favicon():
 # Asosiy sahifa
 @app.route('/')
 def index():
-    return render_template('index.html')
+    # Hisobot formati tanlovi - faqat shu muhitda mavjud formatlar (parquet - pyarrow bo'lsa)
+    return render_template('index.html', report_formats=available_formats())
 
 
 # TimeoutManager - uzoq davom etadigan jarayonlarni boshqarish
@@ -97,62 +138,114 @@ class TimeoutManager:
 # TimeoutManager yaratish
 timeout_manager = TimeoutManager()
 
+# Fon vazifalari navbati. Holat shu jarayon xotirasida - Procfile bitta gunicorn worker ishlatadi
+job_manager = JobManager(max_workers=app.config['JOB_WORKERS'])
 
-# Domain processing function with improved error handling
-async def process_domains(domains, output_path, task_id, batch_size=5):
-    try:
-        # Limit number of domains to process to avoid timeouts
-        max_domains = min(len(domains), app.config['DOMAIN_LIMIT'])
-        domains_to_process = domains[:max_domains]
 
-        logger.info(f"Starting domain processing for task {task_id} with {len(domains_to_process)} domains")
+def domain_limit():
+    """Bitta vazifadagi domenlar chegarasi - shardlash yoki taqsimlangan rejimda ancha katta"""
+    if SHARD_WORKERS > 1 or get_work_queue() is not None:
+        return app.config['SHARDED_DOMAIN_LIMIT']
+    return app.config['DOMAIN_LIMIT']
 
-        # Set timeout for the entire check_domains operation
-        try:
-            # Create a task with timeout
-            check_task = asyncio.create_task(check_domains(domains_to_process, batch_size))
-            results = await asyncio.wait_for(check_task, timeout=app.config['PROCESSING_TIMEOUT'])
-        except asyncio.TimeoutError:
-            logger.error(f"Domain checking timed out for task {task_id}")
-            # Process domains that we've already checked
-            if hasattr(check_task, "_domains_processed") and check_task._domains_processed:
-                results = check_task._domains_processed
-                logger.info(f"Partial results available: {len(results)} domains processed")
-            else:
-                # Generate basic "Need to Check" responses if no results
-                results = [
-                    {
-                        "domain": domain,
-                        "status": "Need to Check",
-                        "status_code": None,
-                        "page_type": "Unknown",
-                        "title": "Timeout during processing"
-                    } for domain in domains_to_process
-                ]
-
-        # Excel hisobotini yaratish
-        generate_excel(results, output_path)
+
+def processing_timeout(count):
+    """Vazifa vaqti: har bir jarayondagi DOMAIN_LIMIT ta domen uchun PROCESSING_TIMEOUT"""
+    per_timeout = app.config['DOMAIN_LIMIT'] * max(1, SHARD_WORKERS)
+    return app.config['PROCESSING_TIMEOUT'] * max(1, math.ceil(count / per_timeout))
+
+
+def check_domains_for_job(domains, job_id=None, **kwargs):
+    """
+    Katta ro'yxatlar shu xostdagi checker tugunlariga (ish navbati sozlangan bo'lsa)
+    yoki shard jarayonlariga bo'lib tekshiriladi, kichiklari shu event loop'da
+    """
+    if get_work_queue() is not None and len(domains) > WORK_UNIT_SIZE:
+        return check_domains_distributed(domains, job_id=job_id, **kwargs)
+    if sharding_enabled(len(domains)):
+        return check_domains_sharded(domains, **kwargs)
+    return check_domains(domains, max_domains=None, **kwargs)
+
+
+def pending_results(domains, done, page_type, title):
+    """Natijasi yo'q domenlar uchun "Need to Check" natijalari"""
+    return [
+        {
+            "domain": domain,
+            "status": "Need to Check",
+            "status_code": None,
+            "page_type": page_type,
+            "title": title
+        } for domain in domains if domain not in done
+    ]
+
+
+# Domain processing function with improved error handling
+async def process_domains(domains, output_path, task_id, concurrency=None, progress_callback=None,
+                          force_refresh=False, http2=None, checkpoint=None):
+    """
+    Domenlarni tekshirib hisobot yozish. Tugagan natijalar kelishi bilan yig'iladi
+    (va checkpoint berilsa unga yoziladi), shuning uchun timeout yoki xatoda ham
+    ular hisobotga kiradi - "Need to Check" faqat tekshirilmay qolganlarga qo'yiladi.
+    checkpoint dagi oldingi natijalar qayta tekshirilmaydi (vazifani davom ettirish).
+    """
+    # Limit number of domains to process to avoid timeouts
+    max_domains = min(len(domains), domain_limit())
+    domains_to_process = domains[:max_domains]
+    completed = list(checkpoint.results) if checkpoint is not None else []
+    done = {result.get("domain") for result in completed}
+
+    def on_result(result):
+        completed.append(result)
+        done.add(result.get("domain"))
+        if checkpoint is not None:
+            checkpoint.append(result)
+        if progress_callback is not None:
+            progress_callback(result)
+
+    try:
+        remaining = [domain for domain in domains_to_process if domain not in done]
+        logger.info(f"Starting domain processing for task {task_id} with {len(remaining)} domains "
+                    f"({len(completed)} already checked)")
+
+        results = completed
+        if remaining:
+            # Set timeout for the entire check_domains operation - muddat tekshiruvchiga ham
+            # beriladi, u yaqinlashganda har bir domen timeout'lari qisqaradi
+            timeout = processing_timeout(len(remaining))
+            try:
+                await asyncio.wait_for(
+                    check_domains_for_job(remaining, task_id, concurrency=concurrency, progress_callback=on_result,
+                                          force_refresh=force_refresh, http2=http2, collect_results=False,
+                                          deadline=time.time() + timeout),
+                    timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                logger.error(f"Domain checking timed out for task {task_id}")
+                logger.info(f"Partial results available: {len(completed)} of {len(domains_to_process)} "
+                            f"domains processed")
+                results = completed + pending_results(domains_to_process, done, "Unknown",
+                                                      "Timeout during processing")
+
+        # Hisobotni yaratish (format fayl kengaytmasidan olinadi)
+        write_report(results, output_path)
         logger.info(f"Completed domain processing for task {task_id}")
 
         # Jarayonni tugallanganligi haqida belgi
         timeout_manager.remove_task(task_id)
         return True, results
+    except asyncio.CancelledError:
+        # Bekor qilingan vazifa uchun hisobot yaratilmaydi
+        timeout_manager.remove_task(task_id)
+        raise
     except Exception as e:
         logger.error(f"Error in process_domains for task {task_id}: {str(e)}")
         timeout_manager.remove_task(task_id)
 
         # Generate basic error report to avoid completely failing
         try:
-            error_results = [
-                {
-                    "domain": domain,
-                    "status": "Need to Check",
-                    "status_code": None,
-                    "page_type": "Error",
-                    "title": f"Error: {str(e)[:50]}"
-                } for domain in domains[:max_domains]
-            ]
-            generate_excel(error_results, output_path)
+            error_results = completed + pending_results(domains_to_process, done, "Error", f"Error: {str(e)[:50]}")
+            write_report(error_results, output_path)
             logger.info(f"Generated error report for {len(error_results)} domains")
             return False, error_results
         except Exception as excel_error:
@@ -160,7 +253,202 @@ async def process_domains(domains, output_path, task_id, batch_size=5):
             return False, []
 
 
-# Fayl yuklash va domainlarni tekshirish - switched to sync version for better Flask integration
+# Fon vazifasi: domenlarni tekshirish va Excel hisobotini yaratish
+def make_job_runner(domains, output_path, force_refresh=False, http2=None, checkpoint=None):
+    """checkpoint berilsa - to'xtab qolgan vazifani davom ettirish"""
+    async def runner(job_id):
+        job_checkpoint = checkpoint
+        if job_checkpoint is not None:
+            # Oldingi ishga tushirishdagi natijalar progress'ga qo'shiladi
+            for item in job_checkpoint.results:
+                job_manager.record_result(job_id, item)
+        elif app.config['CHECKPOINT_FOLDER']:
+            try:
+                job_checkpoint = JobCheckpoint.create(app.config['CHECKPOINT_FOLDER'], job_id, domains,
+                                                      output_path=output_path, force_refresh=force_refresh,
+                                                      http2=http2)
+            except (OSError, RuntimeError) as e:
+                logger.error(f"Could not create checkpoint for job {job_id}: {str(e)}")
+
+        try:
+            result, _ = await process_domains(
+                domains, output_path, job_id,
+                progress_callback=lambda item: job_manager.record_result(job_id, item),
+                force_refresh=force_refresh,
+                http2=http2,
+                checkpoint=job_checkpoint
+            )
+        finally:
+            # Hisobot yozildi yoki vazifa bekor qilindi - davom ettiriladigan narsa yo'q
+            if job_checkpoint is not None:
+                job_checkpoint.remove()
+        if not result or not os.path.exists(output_path):
+            raise RuntimeError("Hisobot yaratishda xatolik yuz berdi")
+
+    return runner
+
+
+def resume_interrupted_jobs():
+    """Jarayon to'xtab qolganda tugallanmagan vazifalarni faqat qolgan domenlar bilan davom ettirish"""
+    for checkpoint in claim_pending_checkpoints(app.config['CHECKPOINT_FOLDER']):
+        header = checkpoint.header
+        domains = header['domains']
+        output_path = header.get('output_path')
+        if not output_path:
+            checkpoint.remove()
+            continue
+        logger.info(f"Resuming job {checkpoint.job_id}: {len(checkpoint.results)} of {len(domains)} "
+                    f"domains already checked")
+        job_manager.submit(checkpoint.job_id, len(domains), output_path,
+                           make_job_runner(domains, output_path, header.get('force_refresh', False),
+                                           header.get('http2'), checkpoint=checkpoint))
+
+
+# Jonli oqim uchun vazifa: natijalar faqat hodisalar sifatida uzatiladi, hisobot yaratilmaydi
+def make_stream_runner(domains, force_refresh=False, http2=None):
+    async def runner(job_id):
+        try:
+            await asyncio.wait_for(
+                check_domains_for_job(domains, job_id,
+                                      progress_callback=lambda item: job_manager.record_result(job_id, item),
+                                      force_refresh=force_refresh, http2=http2, collect_results=False),
+                timeout=processing_timeout(len(domains))
+            )
+        except asyncio.TimeoutError:
+            raise RuntimeError("Tekshirish vaqti tugadi")
+
+    return runner
+
+
+def read_uploaded_domains(file, task_id):
+    """Yuklangan faylni vaqtincha saqlab, undagi domenlarni o'qish"""
+    # Create upload directory if it doesn't exist
+    upload_dir = os.path.join(app.root_path, 'uploads')
+    os.makedirs(upload_dir, exist_ok=True)
+
+    # Save the uploaded file temporarily (task ID avoids name clashes between uploads)
+    temp_filename = f"{task_id}_{secure_filename(file.filename)}"
+    temp_filepath = os.path.join(upload_dir, temp_filename)
+    file.save(temp_filepath)
+
+    try:
+        # Read domains from the saved file
+        return read_file(temp_filepath, max_domains=domain_limit())
+    finally:
+        # Clean up the temporary file
+        try:
+            os.remove(temp_filepath)
+        except Exception as e:
+            logger.error(f"Error removing temporary file: {str(e)}")
+
+
+def read_request_domains():
+    """
+    /stream so'rovidan domenlarni olish: yuklangan fayl, JSON ro'yxat
+    ({"domains": [...]} yoki [...]) yoki har qatorda bitta domen (NDJSON / oddiy matn).
+    """
+    if 'file' in request.files and request.files['file'].filename:
+        file = request.files['file']
+        if not allowed_file(file.filename):
+            return None
+        return read_uploaded_domains(file, str(uuid.uuid4()))
+
+    limit = domain_limit()
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        if isinstance(payload, dict):
+            payload = payload.get('domains')
+        return clean_domain_list(payload, limit) if isinstance(payload, list) else None
+
+    def lines():
+        for raw_line in request.stream:
+            line = raw_line.decode('utf-8', errors='ignore').strip()
+            if not line:
+                continue
+            if line[0] in '"{':
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue
+                line = item.get('domain') if isinstance(item, dict) else item
+            yield line
+
+    return clean_domain_list(lines(), limit)
+
+
+def stream_format():
+    """Oqim formati: ?stream=sse|ndjson, aks holda Accept sarlavhasi bo'yicha"""
+    requested = request.args.get('stream', '').lower()
+    if requested in ('sse', 'ndjson'):
+        return requested
+    return 'sse' if 'text/event-stream' in request.headers.get('Accept', '') else 'ndjson'
+
+
+def format_event(kind, data, fmt):
+    payload = json.dumps(data, ensure_ascii=False)
+    if fmt == 'sse':
+        return f"event: {kind}\ndata: {payload}\n\n"
+    return f'{{"event": "{kind}", "data": {payload}}}\n'
+
+
+def job_event_stream(job_id, events, fmt, cancel_on_close=False):
+    """
+    Vazifa hodisalari oqimi: avval "job" (holat), keyin har bir natija ("result"),
+    har STREAM_PROGRESS_INTERVAL sekundda "progress" va oxirida "summary".
+    cancel_on_close=True - mijoz ulanishni uzsa, vazifa bekor qilinadi.
+    """
+    interval = app.config['STREAM_PROGRESS_INTERVAL']
+    try:
+        job = job_manager.snapshot(job_id)
+        yield format_event('job', job, fmt)
+        if job is None or job['status'] in FINISHED_STATES:
+            yield format_event('summary', job, fmt)
+            return
+
+        next_progress = time.monotonic() + interval
+        while True:
+            try:
+                kind, data = events.get(timeout=max(0.0, next_progress - time.monotonic()))
+            except queue.Empty:
+                kind, data = None, None
+
+            if kind == EVENT_END:
+                yield format_event('summary', data, fmt)
+                return
+            if kind is not None:
+                yield format_event(kind, data, fmt)
+
+            if time.monotonic() >= next_progress:
+                yield format_event('progress', job_manager.snapshot(job_id), fmt)
+                next_progress = time.monotonic() + interval
+    finally:
+        job_manager.unsubscribe(job_id, events)
+        if cancel_on_close:
+            job_manager.cancel(job_id)
+
+
+def stream_response(job_id, fmt, events=None, cancel_on_close=False):
+    if events is None:
+        events = job_manager.subscribe(job_id)
+    if events is None:
+        return jsonify({'error': 'Vazifa topilmadi'}), 404
+    mimetype = 'text/event-stream' if fmt == 'sse' else 'application/x-ndjson'
+    response = Response(stream_with_context(job_event_stream(job_id, events, fmt, cancel_on_close)), mimetype=mimetype)
+    response.headers['Cache-Control'] = 'no-cache'
+    # Proksi (nginx) javobni buferlamasligi uchun
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def optional_flag(name):
+    """Form yoki query parametridagi 1/0 bayroq; berilmasa None (standart sozlama ishlatiladi)"""
+    value = request.form.get(name, request.args.get(name))
+    if value is None:
+        return None
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+# Fayl yuklash - tekshirish fon vazifasi sifatida navbatga qo'yiladi
 @app.route('/upload', methods=['POST'])
 def upload_file():
     if 'file' not in request.files:
@@ -173,75 +461,130 @@ def upload_file():
     if not file or not allowed_file(file.filename):
         return jsonify({'error': 'Noto\'g\'ri fayl formati'}), 400
 
+    # Hisobot formati: xlsx (standart), csv, ndjson yoki parquet (pyarrow o'rnatilgan bo'lsa)
+    report_format = resolve_format(request.form.get('format') or request.args.get('format'))
+    if report_format is None:
+        return jsonify({'error': 'Noto\'g\'ri hisobot formati', 'formats': available_formats()}), 400
+
     try:
-        # Create upload directory if it doesn't exist
-        upload_dir = os.path.join(app.root_path, 'uploads')
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Save the uploaded file temporarily
-        temp_filename = secure_filename(file.filename)
-        temp_filepath = os.path.join(upload_dir, temp_filename)
-        file.save(temp_filepath)
-        
-        try:
-            # Read domains from the saved file
-            domains = read_file(temp_filepath)
-            if not domains:
-                return jsonify({'error': 'Faylda domenlar topilmadi'}), 400
-
-            # Create unique task ID
-            task_id = str(uuid.uuid4())
-            
-            # Create output directory if it doesn't exist
-            output_dir = os.path.join(app.root_path, 'reports')
-            os.makedirs(output_dir, exist_ok=True)
-            
-            # Set output path
-            output_path = os.path.join(output_dir, f'report_{task_id}.xlsx')
-            
-            # Process domains synchronously to ensure we have results
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            batch_size = min(5, max(1, len(domains) // 20))  # Smaller batch size
-            try:
-                result, check_results = loop.run_until_complete(process_domains(domains, output_path, task_id, batch_size))
-                loop.close()
-
-                if result and os.path.exists(output_path):
-                    # Calculate statistics from actual results
-                    stats = {
-                        "total": len(domains),
-                        "working": sum(1 for d in check_results if d.get("status") == "Working"),
-                        "notWorking": sum(1 for d in check_results if d.get("status") == "Not Working"),
-                        "needCheck": sum(1 for d in check_results if d.get("status") == "Need to Check")
-                    }
-                    
-                    # Add statistics to response headers
-                    response = send_file(output_path, as_attachment=True, download_name="domain_report.xlsx")
-                    response.headers['X-Total-Domains'] = str(stats["total"])
-                    response.headers['X-Working-Domains'] = str(stats["working"])
-                    response.headers['X-Not-Working-Domains'] = str(stats["notWorking"])
-                    response.headers['X-Need-Check-Domains'] = str(stats["needCheck"])
-                    return response
-                else:
-                    return jsonify({'error': 'Hisobot yaratishda xatolik yuz berdi'}), 500
-            except Exception as e:
-                logger.error(f"Error processing domains: {str(e)}")
-                return jsonify({'error': 'Domenlarni tekshirishda xatolik yuz berdi'}), 500
-            finally:
-                loop.close()
-        finally:
-            # Clean up the temporary file
-            try:
-                os.remove(temp_filepath)
-            except Exception as e:
-                logger.error(f"Error removing temporary file: {str(e)}")
-            
+        # Create unique task ID
+        task_id = str(uuid.uuid4())
+
+        domains = read_uploaded_domains(file, task_id)
+        if not domains:
+            return jsonify({'error': 'Faylda domenlar topilmadi'}), 400
+
+        # Create output directory if it doesn't exist
+        output_dir = os.path.join(app.root_path, 'reports')
+        os.makedirs(output_dir, exist_ok=True)
+
+        # Set output path
+        output_path = os.path.join(output_dir, f'report_{task_id}.{REPORT_FORMATS[report_format][1]}')
+
+        total = min(len(domains), domain_limit())
+        # force_refresh=1 - natijalar omboridagi keshni e'tiborsiz qoldirib, hammasini qayta tekshirish
+        force_refresh = bool(optional_flag('force_refresh'))
+        # http2=1/0 - HTTP/2 rejimini shu vazifa uchun yoqish/o'chirish (berilmasa CHECK_HTTP2 bo'yicha)
+        http2 = optional_flag('http2')
+        job = job_manager.submit(task_id, total, output_path,
+                                 make_job_runner(domains, output_path, force_refresh, http2))
+        job['status_url'] = f'/jobs/{task_id}'
+        job['report_url'] = f'/jobs/{task_id}/report'
+        job['format'] = report_format
+        return jsonify(job), 202
+
     except Exception as e:
         logger.error(f"Upload error: {str(e)}")
         return jsonify({'error': 'Faylni qayta ishlashda xatolik yuz berdi'}), 500
 
 
+# Vazifa holati va progress hisoblagichlari
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = job_manager.snapshot(job_id)
+    if job is None:
+        return jsonify({'error': 'Vazifa topilmadi'}), 404
+    return jsonify(job)
+
+
+# Vazifa hodisalari (SSE yoki NDJSON) - natijalar tayyor bo'lishi bilan yuboriladi
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    return stream_response(job_id, stream_format())
+
+
+# Domenlarni tekshirib, natijalarni darhol oqim sifatida qaytarish (hisobot yaratilmaydi)
+@app.route('/stream', methods=['POST'])
+def stream_check():
+    try:
+        domains = read_request_domains()
+    except Exception as e:
+        logger.error(f"Stream request error: {str(e)}")
+        return jsonify({'error': 'So\'rovni o\'qishda xatolik yuz berdi'}), 400
+    if domains is None:
+        return jsonify({'error': 'Noto\'g\'ri so\'rov formati'}), 400
+    if not domains:
+        return jsonify({'error': 'Domenlar topilmadi'}), 400
+
+    task_id = str(uuid.uuid4())
+    domains = domains[:domain_limit()]
+    # force_refresh=1 - /upload dagidek form maydoni yoki query parametri
+    force_refresh = bool(optional_flag('force_refresh'))
+    # http2=1/0 - /upload dagidek shu oqim uchun HTTP/2 rejimi
+    http2 = optional_flag('http2')
+    events = new_event_queue()
+    job_manager.submit(task_id, len(domains), None, make_stream_runner(domains, force_refresh, http2),
+                       events=events)
+    # Natijalarni faqat shu ulanish oladi - u uzilsa, tekshirish to'xtatiladi
+    return stream_response(task_id, stream_format(), events, cancel_on_close=True)
+
+
+# Tayyor hisobotni yuklab olish
+@app.route('/jobs/<job_id>/report', methods=['GET'])
+def job_report(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Vazifa topilmadi'}), 404
+    if not job['output_path']:
+        return jsonify({'error': 'Bu vazifa uchun hisobot yaratilmaydi'}), 404
+    if job['status'] != JOB_COMPLETED or not os.path.exists(job['output_path']):
+        return jsonify({'error': 'Hisobot hali tayyor emas', 'status': job['status']}), 409
+
+    _, extension, mimetype = REPORT_FORMATS[format_from_path(job['output_path'])]
+    response = send_file(job['output_path'], as_attachment=True, download_name=f"domain_report.{extension}",
+                         mimetype=mimetype)
+    response.headers['X-Total-Domains'] = str(job['total'])
+    response.headers['X-Working-Domains'] = str(job['working'])
+    response.headers['X-Not-Working-Domains'] = str(job['not_working'])
+    response.headers['X-Need-Check-Domains'] = str(job['need_check'])
+    return response
+
+
+# Vazifani bekor qilish (yoki tugagan vazifani o'chirish)
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Vazifa topilmadi'}), 404
+
+    if job['status'] in FINISHED_STATES:
+        job_manager.remove(job_id)
+        return jsonify({'id': job_id, 'status': 'deleted'})
+
+    job_manager.cancel(job_id)
+    return jsonify(job_manager.snapshot(job_id)), 202
+
+
+# Prometheus uchun metrikalar (barcha gunicorn workerlari, shard jarayonlari va tugunlar bo'yicha)
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+
+# Oldingi jarayonda to'xtab qolgan vazifalarni davom ettirish
+resume_interrupted_jobs()
+
+
 if __name__ == '__main__':
     # Set appropriate server timeout
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)), debug=False)
\ No newline at end of file
@@ -0,0 +1,466 @@
+"""
+check_domains o'tkazuvchanligini internetsiz, lokal soxta DNS va HTTP/HTTPS serverlar fermasida o'lchash.
+
+Foydalanish:
+    python -m benchmarks.bench_check_domains --domains 1000 10000 100000
+    python -m benchmarks.bench_check_domains --domains 1000 --rate-limit 0 --latency 0.1 --latency-sigma 1.0
+    python -m benchmarks.bench_check_domains --mix ok=60,hung=20,slow-tls=20 --slow-tls 3
+    python -m benchmarks.bench_check_domains --save-baseline benchmarks/baseline_check_domains.json
+    python -m benchmarks.bench_check_domains --baseline benchmarks/baseline_check_domains.json
+
+Ferma alohida jarayonda ishlaydi (uning ishi o'lchanayotgan event loop'ga
+aralashmaydi). Domenlar "<profil>-<raqam>.uz" ko'rinishida; soxta DNS server
+har biriga alohida 127.x.y.z manzil beradi (IP bo'yicha politeness cheklovlari
+haqiqiydek ishlaydi), "nxdomain" profili uchun NXDOMAIN qaytaradi. Profillar:
+    ok            - HTML sahifa, javob kechikishi lognormal (--latency mediana, --latency-sigma)
+    slow-tls      - TLS handshake --slow-tls sekund kechiktiriladi
+    hung          - ulanish qabul qilinadi, lekin hech narsa yuborilmaydi
+    rate-limited  - 429 + Retry-After: 1
+    unavailable   - 503
+    redirect      - 301 -> /home -> HTML sahifa
+    huge          - juda katta (chunked, HUGE_BODY_BYTES) HTML tana
+    non-html      - application/pdf
+    nxdomain      - DNS NXDOMAIN
+
+HTTP klient ulanishlari benchmark network backend'i orqali fermaga yo'naltiriladi
+(boshqa hostlarga ulanish rad etiladi - tashqi tarmoqqa so'rov ketmaydi), TLS
+sertifikati tekshirilmaydi. Har bir hajm uchun domen/sekund, bitta domen
+tekshiruvining p50/p99 vaqti, jarayonning eng yuqori RSS xotirasi (ru_maxrss)
+va event loop kechikishi chiqariladi. Hajmlarni o'sish tartibida bering - RSS
+faqat o'sishi mumkin. RATE_LIMIT (CHECK_RATE_LIMIT, standart 50/s) o'tkazuvchanlikni
+cheklaydi - sozlamalarsiz o'lchash uchun --rate-limit 0.
+
+--save-baseline natijalarni JSON faylga yozadi; --baseline bilan solishtiriladi:
+domen/sekund kamaysa yoki p99 / RSS --tolerance dan ko'proq oshsa, chiqish kodi 1.
+Sertifikat uchun openssl buyrug'i kerak.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import resource
+import ssl
+import struct
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import httpcore
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_http2 import make_certificate  # noqa: E402
+from utils import dns_resolver, domain_checker  # noqa: E402
+from utils.file_reader import domain_cache  # noqa: E402
+
+PROFILES = ("ok", "slow-tls", "hung", "rate-limited", "unavailable", "redirect", "huge", "non-html", "nxdomain")
+DEFAULT_MIX = "ok=80,slow-tls=4,hung=2,rate-limited=3,unavailable=3,redirect=4,huge=1,non-html=2,nxdomain=1"
+DOMAIN_SUFFIX = ".uz"
+DNS_TTL = 300
+HUGE_CHUNK = b"<p>" + b"x" * 16380 + b"</p>"
+HUGE_BODY_BYTES = 256 * 1024 * 1024
+LAG_INTERVAL = 0.05  # sekund - event loop kechikishini o'lchash oralig'i
+
+
+def page(title: str) -> bytes:
+    return (f"<!DOCTYPE html><html><head><title>{title}</title></head>"
+            f"<body><h1>{title}</h1><a href=\"/about\">About</a></body></html>").encode()
+
+
+def host_profile(host: str):
+    """"slow-tls-17.uz" -> "slow-tls" (benchmark hosti bo'lmasa None)"""
+    if not host.endswith(DOMAIN_SUFFIX):
+        return None
+    profile, _, number = host[:-len(DOMAIN_SUFFIX)].rpartition("-")
+    return profile if profile in PROFILES and number.isdigit() else None
+
+
+def host_address(host: str) -> str:
+    """Har bir hostga alohida loopback manzil (127.0.0.0/8)"""
+    number = int(host[:-len(DOMAIN_SUFFIX)].rpartition("-")[2]) + 1
+    return f"127.{(number >> 16) & 255}.{(number >> 8) & 255}.{number & 255}"
+
+
+def parse_mix(value: str):
+    weights = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in PROFILES:
+            raise argparse.ArgumentTypeError(f"Unknown profile '{name}' (choose from {', '.join(PROFILES)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def generate_domains(count: int, mix, seed: int):
+    rng = random.Random(seed)
+    names = list(mix)
+    profiles = rng.choices(names, weights=[mix[name] for name in names], k=count)
+    return [f"{profile}-{index}{DOMAIN_SUFFIX}" for index, profile in enumerate(profiles)]
+
+
+# --- Ferma (alohida jarayonda) ---
+
+class FakeDNSProtocol(asyncio.DatagramProtocol):
+    """Benchmark hostlari uchun A yozuvlari, qolganlari uchun NXDOMAIN, AAAA uchun bo'sh javob"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        try:
+            response = self.answer(data)
+        except (IndexError, struct.error, UnicodeDecodeError):
+            return
+        if self.latency:
+            asyncio.get_running_loop().call_later(self.latency, self.transport.sendto, response, addr)
+        else:
+            self.transport.sendto(response, addr)
+
+    @staticmethod
+    def answer(data: bytes) -> bytes:
+        query_id = struct.unpack("!H", data[:2])[0]
+        offset = 12
+        labels = []
+        while data[offset]:
+            length = data[offset]
+            labels.append(data[offset + 1:offset + 1 + length].decode("ascii"))
+            offset += length + 1
+        question = data[12:offset + 5]
+        qtype = struct.unpack("!H", data[offset + 1:offset + 3])[0]
+        host = ".".join(labels).lower()
+        profile = host_profile(host)
+
+        if profile is None or profile == "nxdomain":
+            return struct.pack("!HHHHHH", query_id, 0x8183, 1, 0, 0, 0) + question
+        if qtype != dns_resolver.QTYPE_A:
+            return struct.pack("!HHHHHH", query_id, 0x8180, 1, 0, 0, 0) + question
+        address = bytes(int(part) for part in host_address(host).split("."))
+        record = struct.pack("!HHHIH", 0xC00C, dns_resolver.QTYPE_A, 1, DNS_TTL, 4) + address
+        return struct.pack("!HHHHHH", query_id, 0x8180, 1, 1, 0, 0) + question + record
+
+
+class FarmServer:
+    """Bitta profil uchun HTTP yoki HTTPS server (HTTP/1.1, keep-alive)"""
+
+    def __init__(self, profile: str, context, latency: float, sigma: float, slow_tls: float):
+        self.profile = profile
+        self.context = context
+        self.latency = latency
+        self.sigma = sigma
+        self.slow_tls = slow_tls
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            if self.profile == "hung":
+                # Hech narsa yubormasdan klient uzguncha kutish
+                while await reader.read(65536):
+                    pass
+                return
+            if self.context is not None:
+                if self.profile == "slow-tls":
+                    await asyncio.sleep(self.slow_tls)
+                await writer.start_tls(self.context)
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                path = head.split(b" ", 2)[1] if head.count(b" ") >= 2 else b"/"
+                if self.latency:
+                    await asyncio.sleep(random.lognormvariate(math.log(self.latency), self.sigma))
+                if not await self.respond(writer, path):
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer: asyncio.StreamWriter, path: bytes) -> bool:
+        """False - ulanish yopiladi"""
+        profile = self.profile
+        if profile == "rate-limited":
+            status, headers, body = "429 Too Many Requests", [("Retry-After", "1")], b""
+        elif profile == "unavailable":
+            status, headers, body = "503 Service Unavailable", [], b""
+        elif profile == "redirect" and path == b"/":
+            status, headers, body = "301 Moved Permanently", [("Location", "/home")], b""
+        elif profile == "non-html":
+            status, headers, body = "200 OK", [("Content-Type", "application/pdf")], b"%PDF-1.4\n" + b"0" * 4096
+        elif profile == "huge":
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n"
+                         b"Transfer-Encoding: chunked\r\n\r\n")
+            head = page("Huge")[:-len(b"</body></html>")]
+            chunk = b"%x\r\n" % len(HUGE_CHUNK) + HUGE_CHUNK + b"\r\n"
+            writer.write(b"%x\r\n" % len(head) + head + b"\r\n")
+            # Klient kerakli qismini o'qib uzguncha. drain() bufer to'lmaguncha boshqa
+            # vazifalarga navbat bermaydi - sleep(0) siz ferma (va soxta DNS) qotib qoladi
+            for _ in range(HUGE_BODY_BYTES // len(HUGE_CHUNK)):
+                if writer.is_closing():
+                    return False
+                writer.write(chunk)
+                await writer.drain()
+                await asyncio.sleep(0)
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+            return False
+        else:
+            status, headers, body = "200 OK", [("Content-Type", "text/html; charset=utf-8")], page(profile)
+
+        lines = [f"HTTP/1.1 {status}", f"Content-Length: {len(body)}"] + [f"{k}: {v}" for k, v in headers]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+        await writer.drain()
+        return True
+
+
+async def run_farm(pipe, cert_path: str, key_path: str, latency: float, sigma: float,
+                   slow_tls: float, dns_latency: float):
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    context.set_alpn_protocols(["http/1.1"])
+    loop = asyncio.get_running_loop()
+
+    dns_transport, _ = await loop.create_datagram_endpoint(
+        lambda: FakeDNSProtocol(dns_latency), local_addr=("127.0.0.1", 0)
+    )
+    ports = {}
+    servers = []
+    for profile in PROFILES:
+        if profile == "nxdomain":
+            continue
+        ports[profile] = {}
+        for scheme, tls in (("http", None), ("https", context)):
+            farm = FarmServer(profile, tls, latency, sigma, slow_tls)
+            server = await asyncio.start_server(farm.handle, "127.0.0.1", 0, backlog=1024)
+            servers.append(server)
+            ports[profile][scheme] = server.sockets[0].getsockname()[1]
+
+    pipe.send((dns_transport.get_extra_info("sockname")[1], ports))
+    # Asosiy jarayon to'xtatguncha (terminate)
+    await loop.run_in_executor(None, pipe.recv)
+
+
+def farm_main(pipe, *args):
+    # Uzilgan ulanishlarga yozish haqidagi ogohlantirishlar (huge, hung) kutilgan holat
+    logging.getLogger("asyncio").setLevel(logging.ERROR)
+    try:
+        asyncio.run(run_farm(pipe, *args))
+    except EOFError:
+        pass
+
+
+# --- Klient tomoni ---
+
+class FarmNetworkBackend(httpcore.AsyncNetworkBackend):
+    """Benchmark hostlariga ulanishlarni profil serveriga yo'naltiradi, boshqalarini rad etadi"""
+
+    def __init__(self, ports):
+        self.ports = ports
+        self.backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        profile = host_profile(host)
+        if profile not in self.ports:
+            raise httpcore.ConnectError(f"{host} is not a benchmark host")
+        target = self.ports[profile]["https" if port == 443 else "http"]
+        return await self.backend.connect_tcp("127.0.0.1", target, timeout=timeout,
+                                              local_address=local_address, socket_options=socket_options)
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        raise httpcore.ConnectError("Unix sockets are not used in the benchmark")
+
+    async def sleep(self, seconds):
+        await self.backend.sleep(seconds)
+
+
+def route_to_farm(ports):
+    """domain_checker.create_http_client ni fermaga ulanadigan variant bilan almashtirish"""
+    original = domain_checker.create_http_client
+    backend = FarmNetworkBackend(ports)
+
+    def create_http_client(http2=False, verify=True):
+        client = original(http2, verify=False)
+        clients = [client.http2_client, client.http1_client] if hasattr(client, "http1_client") else [client]
+        for item in clients:
+            # httpx network backend'ni ochiq sozlamaydi - transport pool'iga to'g'ridan-to'g'ri
+            item._transport._pool._network_backend = backend
+        return client
+
+    domain_checker.create_http_client = create_http_client
+
+
+def percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+async def monitor_lag(lags):
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + LAG_INTERVAL
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def run_size(domains, http2: bool):
+    durations = []
+    statuses = Counter()
+    lags = []
+    original = domain_checker.check_domain
+
+    async def timed_check_domain(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await original(*args, **kwargs)
+        finally:
+            durations.append(time.perf_counter() - start)
+
+    domain_checker.check_domain = timed_check_domain
+    monitor = asyncio.create_task(monitor_lag(lags))
+    start = time.perf_counter()
+    try:
+        await domain_checker.check_domains(
+            domains, progress_callback=lambda result: statuses.update([result["status"]]),
+            http2=http2, collect_results=False, max_domains=None
+        )
+    finally:
+        elapsed = time.perf_counter() - start
+        monitor.cancel()
+        domain_checker.check_domain = original
+
+    return {
+        "domains": len(domains),
+        "seconds": round(elapsed, 3),
+        "domains_per_sec": round(len(domains) / elapsed, 1),
+        "p50_ms": round(percentile(durations, 0.5) * 1000, 1),
+        "p99_ms": round(percentile(durations, 0.99) * 1000, 1),
+        # Linux'da kilobaytlarda
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "max_lag_ms": round(max(lags, default=0.0) * 1000, 1),
+        "p99_lag_ms": round(percentile(lags, 0.99) * 1000, 1),
+        "statuses": dict(statuses),
+    }
+
+
+def reset_caches():
+    # Keyingi hajm oldingisining DNS / sxema / sog'liq keshidan foydalanmasin
+    for cache in (dns_resolver.dns_cache, domain_checker.scheme_cache, domain_checker.domain_health_cache,
+                  domain_cache):
+        cache.clear()
+
+
+def compare(baseline, results, tolerance: float) -> bool:
+    """True - regressiya topildi"""
+    regressed = False
+    print(f"\nBaseline comparison (tolerance {tolerance:.0%}):")
+    print(f"{'domains':>10}{'domains/s':>14}{'p99 ms':>14}{'peak RSS':>14}")
+    for size, current in results.items():
+        previous = baseline.get("sizes", {}).get(size)
+        if previous is None:
+            print(f"{size:>10}  no baseline")
+            continue
+        cells = []
+        for key, higher_is_better in (("domains_per_sec", True), ("p99_ms", False), ("peak_rss_mb", False)):
+            before, after = previous[key], current[key]
+            change = (after - before) / before if before else 0.0
+            worse = -change if higher_is_better else change
+            flag = " !" if worse > tolerance else ""
+            regressed = regressed or bool(flag)
+            cells.append(f"{change:+.1%}{flag}")
+        print(f"{size:>10}" + "".join(f"{cell:>14}" for cell in cells))
+    return regressed
+
+
+async def main_async(args) -> dict:
+    results = {}
+    print(f"{'domains':>10}{'time s':>10}{'domains/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'peak RSS MB':>13}"
+          f"{'max lag ms':>12}{'p99 lag ms':>12}  statuses")
+    for count in args.domains:
+        reset_caches()
+        report = await run_size(generate_domains(count, args.mix, args.seed), args.http2)
+        results[str(count)] = report
+        print(f"{count:>10}{report['seconds']:>10.2f}{report['domains_per_sec']:>11.1f}{report['p50_ms']:>9.1f}"
+              f"{report['p99_ms']:>9.1f}{report['peak_rss_mb']:>13.1f}{report['max_lag_ms']:>12.1f}"
+              f"{report['p99_lag_ms']:>12.1f}  {report['statuses']}")
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--domains", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Profillar ulushi (standart {DEFAULT_MIX})")
+    parser.add_argument("--latency", type=float, default=0.05, help="Javob kechikishi medianasi, sekund")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal taqsimot sigma'si")
+    parser.add_argument("--slow-tls", type=float, default=2.0, help="slow-tls profilidagi TLS kechikishi, sekund")
+    parser.add_argument("--dns-latency", type=float, default=0.002, help="Soxta DNS javobi kechikishi, sekund")
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help=f"Sekundiga yangi tekshiruvlar (standart CHECK_RATE_LIMIT={domain_checker.RATE_LIMIT:g}; 0 - cheklovsiz)")
+    parser.add_argument("--http2", action="store_true", help="HTTP/2 klient rejimi")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", help="Solishtirish uchun oldin saqlangan natijalar (JSON)")
+    parser.add_argument("--save-baseline", help="Natijalarni shu JSON faylga yozish")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Regressiya chegarasi (0.1 = 10%%)")
+    parser.add_argument("--verbose", action="store_true", help="Tekshiruvchi loglarini ko'rsatish")
+    args = parser.parse_args()
+
+    # Har bir domen uchun loglar o'lchovni buzadi
+    if not args.verbose:
+        logging.getLogger("utils").setLevel(logging.CRITICAL)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if args.rate_limit is not None:
+        domain_checker.RATE_LIMIT = args.rate_limit
+
+    context = multiprocessing.get_context("spawn")
+    parent_pipe, child_pipe = context.Pipe()
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = make_certificate(directory)
+        farm = context.Process(target=farm_main, daemon=True, args=(
+            child_pipe, cert_path, key_path, args.latency, args.latency_sigma, args.slow_tls, args.dns_latency
+        ))
+        farm.start()
+        # Ferma ishga tushmasa recv() EOFError beradi (kutib qolmaydi)
+        child_pipe.close()
+        dns_port, ports = parent_pipe.recv()
+
+    # Tekshiruvchi soxta DNS serverdan so'raydi (stub resolver)
+    dns_resolver.DNS_RESOLVER_BACKEND = "stub"
+    dns_resolver.DNS_NAMESERVER = f"127.0.0.1:{dns_port}"
+    route_to_farm(ports)
+
+    print(f"Mix: {', '.join(f'{name}={weight:g}' for name, weight in args.mix.items())}; "
+          f"latency {args.latency * 1000:.0f} ms (sigma {args.latency_sigma:g}), slow TLS {args.slow_tls:g} s, "
+          f"rate limit {domain_checker.RATE_LIMIT:g}/s{', http/2' if args.http2 else ''}")
+    try:
+        results = asyncio.run(main_async(args))
+    finally:
+        farm.terminate()
+        farm.join()
+
+    settings = {key: getattr(args, key) for key in ("mix", "latency", "latency_sigma", "slow_tls",
+                                                     "dns_latency", "http2", "seed")}
+    settings["rate_limit"] = domain_checker.RATE_LIMIT
+    regressed = False
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != settings:
+            print("\nWarning: baseline was recorded with different settings")
+        regressed = compare(baseline, results, args.tolerance)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "sizes": results}, f, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
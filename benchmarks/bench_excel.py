@@ -0,0 +1,61 @@
+"""
+Excel hisobotini yaratish vaqti va xotirasini o'lchash.
+
+Foydalanish:
+    python -m benchmarks.bench_excel --rows 1000 10000 100000
+
+Natijalar generator orqali beriladi (ro'yxat xotirada saqlanmaydi); har bir
+hajm uchun vaqt, qator/sekund va jarayonning eng yuqori RSS xotirasi (ru_maxrss)
+chiqariladi. Hajmlarni o'sish tartibida bering - RSS faqat o'sishi mumkin.
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.excel_generator import generate_excel  # noqa: E402
+
+SAMPLES = [
+    {"status": "Working", "status_code": 200, "page_type": "External", "title": "Bosh sahifa"},
+    {"status": "Working", "status_code": 200, "page_type": "Internal", "title": "Kirish"},
+    {"status": "Not Working", "status_code": None, "page_type": "Error", "title": "DNS resolution failed"},
+    {"status": "Need to Check", "status_code": 403, "page_type": "Error", "title": "Status code: 403"},
+    {"status": "Need to Check", "status_code": None, "page_type": "Error", "title": "Timeout"},
+]
+
+
+def synthetic_results(count: int):
+    for index in range(count):
+        yield dict(SAMPLES[index % len(SAMPLES)], domain=f"sub{index}.example{index % 97}.uz")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--no-extra-sheets", action="store_true", help="Xulosa va holat varaqlarisiz")
+    args = parser.parse_args()
+
+    extra = not args.no_extra_sheets
+    print(f"{'rows':>10}{'time s':>10}{'rows/s':>12}{'peak RSS MB':>13}{'file MB':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            output_path = os.path.join(directory, f"report_{rows}.xlsx")
+            start = time.perf_counter()
+            ok = generate_excel(synthetic_results(rows), output_path, summary=extra, status_sheets=extra)
+            elapsed = time.perf_counter() - start
+            # Linux'da kilobaytlarda
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+            if not ok:
+                print(f"{rows:>10}  failed")
+                continue
+            print(f"{rows:>10}{elapsed:>10.2f}{rows / elapsed:>12.0f}{peak / 1024 / 1024:>13.1f}"
+                  f"{os.path.getsize(output_path) / 1024 / 1024:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
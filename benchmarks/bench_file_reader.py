@@ -0,0 +1,143 @@
+"""
+Fayldan domenlarni o'qish tezligini o'lchash.
+
+Foydalanish:
+    python -m benchmarks.bench_file_reader --txt-mb 200
+    python -m benchmarks.bench_file_reader --xlsx-rows 300000
+    python -m benchmarks.bench_file_reader --file domains.txt
+
+--file berilmasa, vaqtinchalik sintetik .txt fayl yaratiladi (takroriy domenlar,
+protokol va yo'lli URL'lar, IP'lar va keraksiz so'zlar aralash). Natija faylni
+shunchaki o'qish (disk / sahifa keshi tezligi) bilan solishtiriladi.
+--xlsx-rows berilsa, shu qatorlik sintetik .xlsx (bir nechta varaq, matn, son va
+sana ustunlari) yaratiladi va tezkor o'quvchi openpyxl bilan solishtiriladi.
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cache import configure_shared_cache  # noqa: E402
+from utils.file_reader import read_file, read_xlsx_file_openpyxl  # noqa: E402
+
+SEPARATORS = [" ", ",", "\t", "\n", "\r\n", ", "]
+
+
+def generate_txt(path: str, size_mb: float, unique: int, rng: random.Random) -> None:
+    target = int(size_mb * 1024 * 1024)
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            lines = []
+            for _ in range(10000):
+                index = rng.randrange(unique)
+                kind = rng.random()
+                if kind < 0.7:
+                    token = f"sub{index}.example{index % 500}.uz"
+                elif kind < 0.8:
+                    token = f"https://www.site{index}.com/page?id={index}"
+                elif kind < 0.85:
+                    token = f"10.{index % 256}.{index // 256 % 256}.1"
+                else:
+                    token = f"natija{index}"
+                lines.append(token + rng.choice(SEPARATORS))
+            chunk = "".join(lines)
+            f.write(chunk)
+            written += len(chunk)
+
+
+def generate_xlsx(path: str, rows: int, sheets: int, unique: int, rng: random.Random) -> None:
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for sheet in range(sheets):
+        ws = wb.create_sheet(f"Varaq{sheet + 1}")
+        ws.append(["Domen", "Manzil", "Raqam", "Sana", "Izoh"])
+        for row in range(rows // sheets):
+            index = rng.randrange(unique)
+            ws.append([
+                f"sub{index}.example{index % 500}.uz",
+                f"https://www.site{index}.com/page?id={index}",
+                index,
+                datetime.date(2024, 1, 1 + row % 28),
+                f"natija{index}" if row % 3 else None,
+            ])
+    wb.save(path)
+
+
+def read_openpyxl(path: str, max_domains: int) -> set:
+    domains = set()
+    read_xlsx_file_openpyxl(path, domains, max_domains)
+    return domains
+
+
+def time_call(func, repeat: int):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def raw_read(path: str) -> int:
+    total = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                return total
+            total += len(chunk)
+
+
+def report(path: str, max_domains: int, repeat: int) -> None:
+    size_mb = os.path.getsize(path) / 1024 / 1024
+    read_time, _ = time_call(lambda: raw_read(path), repeat)
+    parse_time, domains = time_call(lambda: read_file(path, max_domains=max_domains), repeat)
+    print(f"{os.path.basename(path)}: {size_mb:.1f} MB, {len(domains)} domains")
+    print(f"  raw read   {read_time:8.3f} s {size_mb / read_time:10.1f} MB/s")
+    print(f"  read_file  {parse_time:8.3f} s {size_mb / parse_time:10.1f} MB/s")
+    if path.endswith(".xlsx"):
+        openpyxl_time, openpyxl_domains = time_call(lambda: read_openpyxl(path, max_domains), repeat)
+        print(f"  openpyxl   {openpyxl_time:8.3f} s {size_mb / openpyxl_time:10.1f} MB/s"
+              f"  (x{openpyxl_time / parse_time:.1f}, {len(openpyxl_domains)} raw candidates)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="O'lchanadigan fayl")
+    parser.add_argument("--txt-mb", type=float, default=100, help="Sintetik .txt hajmi (MB)")
+    parser.add_argument("--xlsx-rows", type=int, help="Sintetik .xlsx qatorlari soni (.txt o'rniga)")
+    parser.add_argument("--xlsx-sheets", type=int, default=3, help="Sintetik .xlsx varaqlari soni")
+    parser.add_argument("--unique", type=int, default=50000, help="Sintetik fayldagi turli domenlar soni")
+    parser.add_argument("--max-domains", type=int, default=10 ** 9, help="read_file chegarasi")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Umumiy kesh o'lchovga ta'sir qilmasin
+    configure_shared_cache(None)
+
+    if args.file:
+        report(args.file, args.max_domains, args.repeat)
+        return 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.xlsx_rows:
+            path = os.path.join(directory, "domains.xlsx")
+            generate_xlsx(path, args.xlsx_rows, args.xlsx_sheets, args.unique, random.Random(42))
+        else:
+            path = os.path.join(directory, "domains.txt")
+            generate_txt(path, args.txt_mb, args.unique, random.Random(42))
+        report(path, args.max_domains, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Tezkor HTML extractor va BeautifulSoup tahlilini solishtirish.
+
+Foydalanish:
+    python -m benchmarks.bench_html_extractor --corpus saved_pages/
+    python -m benchmarks.bench_html_extractor --generate 300
+
+--corpus katalogidagi *.html fayllar (saqlab olingan sahifalar) ishlatiladi;
+katalog berilmasa, vaqtinchalik sintetik korpus yaratiladi. Har bir sahifa
+uchun natijalar bir xilligi tekshiriladi va vaqtlar solishtiriladi.
+"""
+import argparse
+import glob
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.domain_checker import BODY_READ_LIMIT  # noqa: E402
+from utils.html_extractor import extract_page_info, extract_page_info_bs4  # noqa: E402
+
+WORDS = ["domen", "sahifa", "yangiliklar", "xizmatlar", "biz haqimizda", "kontakt", "mahsulot", "narx"]
+
+
+def generate_page(index: int, rng: random.Random) -> str:
+    """Turli holatlarni qamraydigan sintetik sahifa"""
+    head = ['<meta charset="utf-8">', '<script>var config = {login: false};</script>', '<style>body{}</style>']
+    variant = index % 5
+    if variant != 1:
+        head.append(f"<title> Sahifa {index} &amp; {rng.choice(WORDS)} </title>")
+    if variant in (1, 2):
+        head.append(f'<meta property="og:title" content="OG sarlavha {index}">')
+
+    body = [f"<h1>Bosh <b>sarlavha</b> {index}</h1>"]
+    paragraphs = rng.randint(50, 2000)
+    for _ in range(paragraphs):
+        body.append(f"<p class=\"text\">{' '.join(rng.choice(WORDS) for _ in range(12))}</p>")
+    if variant == 3:
+        body.insert(1, '<form><input type="text" name="u"><input type="password" name="p"></form>')
+    if variant == 4:
+        body.insert(1, "<a href=\"/a\">Sign In</a>")
+    body.insert(1, "<!-- login comment -->")
+    return f"<!DOCTYPE html><html><head>{''.join(head)}</head><body>{''.join(body)}</body></html>"
+
+
+def load_corpus(corpus_dir: str):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.html")) + glob.glob(os.path.join(corpus_dir, "*.htm"))):
+        with open(path, "rb") as f:
+            # check_domain faqat shu chegaragacha o'qiydi
+            pages.append((os.path.basename(path), f.read(BODY_READ_LIMIT)))
+    return pages
+
+
+def time_call(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Saqlangan .html sahifalar katalogi")
+    parser.add_argument("--generate", type=int, default=200, help="Sintetik sahifalar soni (korpus berilmaganda)")
+    parser.add_argument("--repeat", type=int, default=5, help="Har bir sahifa necha marta tahlil qilinadi")
+    parser.add_argument("--encoding", default="utf-8")
+    args = parser.parse_args()
+
+    if args.corpus:
+        pages = load_corpus(args.corpus)
+    else:
+        rng = random.Random(42)
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            for index in range(args.generate):
+                with open(os.path.join(corpus_dir, f"page_{index}.html"), "w", encoding="utf-8") as f:
+                    f.write(generate_page(index, rng))
+            pages = load_corpus(corpus_dir)
+
+    if not pages:
+        print("Korpus bo'sh")
+        return 1
+
+    fast_times, bs4_times, mismatches = [], [], []
+    for name, body in pages:
+        text = body.decode(args.encoding, errors="replace")
+        fast_result = extract_page_info(body, args.encoding)
+        bs4_result = extract_page_info_bs4(text)
+        if fast_result != bs4_result:
+            mismatches.append((name, fast_result, bs4_result))
+        fast_times.append(time_call(lambda: extract_page_info(body, args.encoding), args.repeat))
+        bs4_times.append(time_call(lambda: extract_page_info_bs4(body.decode(args.encoding, errors="replace")),
+                                   args.repeat))
+
+    total_bytes = sum(len(body) for _, body in pages)
+    fast_total, bs4_total = sum(fast_times), sum(bs4_times)
+    print(f"Pages: {len(pages)}, {total_bytes / 1024 / 1024:.1f} MB")
+    print(f"{'':12}{'total s':>10}{'p50 ms':>10}{'p99 ms':>10}{'MB/s':>10}")
+    for label, times, total in (("fast", fast_times, fast_total), ("bs4", bs4_times, bs4_total)):
+        ordered = sorted(times)
+        p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+        print(f"{label:12}{total:>10.3f}{statistics.median(times) * 1000:>10.2f}{p99 * 1000:>10.2f}"
+              f"{total_bytes / 1024 / 1024 / total:>10.1f}")
+    print(f"Speedup: {bs4_total / fast_total:.1f}x")
+    print(f"Mismatches: {len(mismatches)}")
+    for name, fast_result, bs4_result in mismatches[:20]:
+        print(f"  {name}: fast={fast_result} bs4={bs4_result}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""
+HTTP/1.1 va HTTP/2 rejimlarini lokal TLS server ustida solishtirish.
+
+Foydalanish:
+    python -m benchmarks.bench_http2 --requests 500 --concurrency 64
+    python -m benchmarks.bench_http2 --origins 4 --latency 0.05
+    python -m benchmarks.bench_http2 --reject-h2
+
+Server h2 kutubxonasi asosida yozilgan va ALPN orqali h2 yoki http/1.1 ni
+qo'llaydi; har bir javob --latency sekund kechiktiriladi (server "o'ylash"
+vaqti). Har bir rejim uchun ochilgan ulanishlar soni, o'tkazuvchanlik va
+ishlatilgan protokol versiyalari chiqariladi. --reject-h2 bilan server h2
+ulanishlarini PROTOCOL_ERROR bilan yopadi - host bo'yicha HTTP/1.1 zaxirasi
+tekshiriladi. Sertifikat uchun openssl buyrug'i kerak.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import h2.config
+import h2.connection
+import h2.errors
+import h2.events
+import h2.exceptions
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.domain_checker import HTTP2FallbackClient, create_http_client  # noqa: E402
+
+PAGE = b"<!DOCTYPE html><html><head><title>Benchmark</title></head><body><h1>OK</h1></body></html>"
+
+
+class BenchServerProtocol(asyncio.Protocol):
+    """ALPN natijasiga qarab HTTP/2 yoki HTTP/1.1 (keep-alive) javob beradi"""
+
+    def __init__(self, stats: Counter, latency: float, reject_h2: bool):
+        self.stats = stats
+        self.latency = latency
+        self.reject_h2 = reject_h2
+        self.transport = None
+        self.h2 = None
+        self.buffer = b""
+        self.http1_busy = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+        ssl_object = transport.get_extra_info("ssl_object")
+        protocol = ssl_object.selected_alpn_protocol() if ssl_object else None
+        self.stats["connections"] += 1
+        self.stats[f"connections_{protocol or 'http/1.1'}"] += 1
+        if protocol == "h2":
+            self.h2 = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+            self.h2.initiate_connection()
+            if self.reject_h2:
+                self.h2.close_connection(error_code=h2.errors.ErrorCodes.PROTOCOL_ERROR)
+                transport.write(self.h2.data_to_send())
+                transport.close()
+                return
+            transport.write(self.h2.data_to_send())
+
+    def data_received(self, data):
+        if self.h2 is not None:
+            try:
+                events = self.h2.receive_data(data)
+            except h2.exceptions.ProtocolError:
+                self.transport.write(self.h2.data_to_send())
+                self.transport.close()
+                return
+            for event in events:
+                if isinstance(event, h2.events.RequestReceived):
+                    asyncio.ensure_future(self.respond_h2(event.stream_id))
+            self.transport.write(self.h2.data_to_send())
+            return
+
+        self.buffer += data
+        self.next_http1()
+
+    def next_http1(self):
+        # httpx so'rovlarni pipeline qilmaydi - bitta ulanishda bittadan javob
+        if self.http1_busy or b"\r\n\r\n" not in self.buffer:
+            return
+        _, self.buffer = self.buffer.split(b"\r\n\r\n", 1)
+        self.http1_busy = True
+        asyncio.ensure_future(self.respond_http1())
+
+    async def respond_h2(self, stream_id: int):
+        await asyncio.sleep(self.latency)
+        if self.transport.is_closing():
+            return
+        self.stats["requests"] += 1
+        try:
+            self.h2.send_headers(stream_id, [
+                (":status", "200"),
+                ("content-type", "text/html; charset=utf-8"),
+                ("content-length", str(len(PAGE))),
+            ])
+            self.h2.send_data(stream_id, PAGE, end_stream=True)
+        except h2.exceptions.StreamClosedError:
+            return
+        self.transport.write(self.h2.data_to_send())
+
+    async def respond_http1(self):
+        await asyncio.sleep(self.latency)
+        if self.transport.is_closing():
+            return
+        self.stats["requests"] += 1
+        self.transport.write(
+            b"HTTP/1.1 200 OK\r\ncontent-type: text/html; charset=utf-8\r\n"
+            b"content-length: " + str(len(PAGE)).encode() + b"\r\n\r\n" + PAGE
+        )
+        self.http1_busy = False
+        self.next_http1()
+
+
+def make_certificate(directory: str):
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-keyout", key_path, "-out", cert_path],
+        check=True, capture_output=True
+    )
+    return cert_path, key_path
+
+
+async def start_servers(count: int, cert_path: str, key_path: str, stats: Counter,
+                        latency: float, reject_h2: bool):
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    context.set_alpn_protocols(["h2", "http/1.1"])
+    loop = asyncio.get_running_loop()
+    servers = []
+    for _ in range(count):
+        servers.append(await loop.create_server(
+            lambda: BenchServerProtocol(stats, latency, reject_h2), "127.0.0.1", 0, ssl=context
+        ))
+    return servers
+
+
+async def run_mode(http2: bool, urls, concurrency: int, stats: Counter):
+    stats.clear()
+    versions = Counter()
+    errors = Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(client, url):
+        async with semaphore:
+            try:
+                async with client.stream("GET", url) as response:
+                    await response.aread()
+                    versions[response.http_version] += 1
+            except Exception as e:
+                errors[type(e).__name__] += 1
+
+    start = time.perf_counter()
+    async with create_http_client(http2, verify=False) as client:
+        await asyncio.gather(*(fetch(client, url) for url in urls))
+        fallbacks = client.fallbacks if isinstance(client, HTTP2FallbackClient) else 0
+    elapsed = time.perf_counter() - start
+    return {
+        "elapsed": elapsed,
+        "connections": stats["connections"],
+        "h2_connections": stats["connections_h2"],
+        "versions": dict(versions),
+        "errors": dict(errors),
+        "fallbacks": fallbacks,
+    }
+
+
+async def main_async(args) -> int:
+    stats = Counter()
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = make_certificate(directory)
+        servers = await start_servers(args.origins, cert_path, key_path, stats, args.latency, args.reject_h2)
+        ports = [server.sockets[0].getsockname()[1] for server in servers]
+        # Har bir port alohida origin (bitta CDN ortidagi turli subdomenlar kabi)
+        urls = [f"https://localhost:{ports[index % len(ports)]}/page{index}" for index in range(args.requests)]
+
+        print(f"Requests: {args.requests}, concurrency: {args.concurrency}, origins: {args.origins}, "
+              f"latency: {args.latency * 1000:.0f} ms{', h2 rejected' if args.reject_h2 else ''}")
+        print(f"{'mode':10}{'time s':>10}{'req/s':>10}{'conns':>8}{'h2 conns':>10}{'retried':>10}  versions / errors")
+        for label, http2 in (("http/1.1", False), ("http/2", True)):
+            report = await run_mode(http2, urls, args.concurrency, stats)
+            print(f"{label:10}{report['elapsed']:>10.3f}{args.requests / report['elapsed']:>10.1f}"
+                  f"{report['connections']:>8}{report['h2_connections']:>10}{report['fallbacks']:>10}"
+                  f"  {report['versions']} {report['errors'] or ''}")
+
+        for server in servers:
+            server.close()
+            await server.wait_closed()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="So'rovlar soni")
+    parser.add_argument("--concurrency", type=int, default=64, help="Bir vaqtdagi so'rovlar")
+    parser.add_argument("--origins", type=int, default=1, help="Lokal serverlar (origin) soni")
+    parser.add_argument("--latency", type=float, default=0.02, help="Server javobi kechikishi, sekund")
+    parser.add_argument("--reject-h2", action="store_true", help="h2 ulanishlarini PROTOCOL_ERROR bilan yopish")
+    args = parser.parse_args()
+    # Har bir so'rov uchun httpx loglari o'lchovni buzadi
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,24 @@
 // Global variables
 let processingTimer = null;
 let currentStage = 0;
+let currentJobId = null;
+const JOB_POLL_INTERVAL = 1000;
+const LIVE_RESULTS_LIMIT = 200;
+const statusLabels = {
+    'Working': 'Ishlayapti',
+    'Not Working': 'Ishlamayapti',
+    'Need to Check': 'Tekshirish kerak'
+};
+const statusClasses = {
+    'Working': 'working',
+    'Not Working': 'not-working',
+    'Need to Check': 'need-check'
+};
 const processingStages = [
     "Faylni yuklash...",
     "Domenlarni o'qish...",
     "Domenlarni tekshirish...",
-    "Excel hisobotini yaratish..."
+    "Hisobotni yaratish..."
 ];
 
 // File input handling
@@ -81,10 +94,31 @@ function showToast(message, type = 'info') {
     }, 3000);
 }
 
+// Read the report file name from the server's Content-Disposition header
+async function reportFilename(url) {
+    try {
+        const response = await fetch(url, { method: 'HEAD' });
+        const disposition = response.ok ? response.headers.get('content-disposition') : null;
+        if (!disposition) {
+            return '';
+        }
+        const encoded = disposition.match(/filename\*=UTF-8''([^;]+)/i);
+        if (encoded) {
+            return decodeURIComponent(encoded[1]);
+        }
+        const plain = disposition.match(/filename="?([^";]+)"?/i);
+        return plain ? plain[1] : '';
+    } catch (error) {
+        console.error('Report header error:', error);
+        return '';
+    }
+}
+
 // Show download button
 function showDownloadButton(url, filename) {
     const downloadContainer = document.getElementById('downloadContainer');
     const downloadBtn = document.getElementById('downloadBtn');
+    const downloadLabel = document.getElementById('downloadLabel');
     const processingContainer = document.getElementById('processingContainer');
     
     if (!downloadContainer || !downloadBtn) {
@@ -93,18 +127,157 @@ function showDownloadButton(url, filename) {
     }
     
     downloadBtn.href = url;
-    downloadBtn.download = filename;
+    // Empty name - the browser uses the Content-Disposition file name
+    downloadBtn.download = filename || '';
+    if (downloadLabel) {
+        downloadLabel.textContent = filename ? `Hisobotni yuklab olish (${filename})` : 'Hisobotni yuklab olish';
+    }
     downloadContainer.style.display = 'block';
     processingContainer.style.display = 'none';
 }
 
+// Read error message from a failed response
+async function readError(response) {
+    const contentType = response.headers.get('content-type');
+    if (contentType && contentType.includes('application/json')) {
+        const errorData = await response.json();
+        return errorData.error || 'Server xatosi yuz berdi';
+    }
+    return 'Server xatosi yuz berdi';
+}
+
+// Update progress counters from job status
+function updateProgress(job) {
+    const statusText = document.getElementById('statusText');
+    const domainCounter = document.getElementById('domainCounter');
+
+    if (job.status === 'queued') {
+        statusText.textContent = 'Navbatda...';
+    } else {
+        statusText.textContent = job.checked < job.total ? processingStages[2] : processingStages[3];
+    }
+    if (domainCounter) {
+        domainCounter.textContent = `Tekshirildi: ${job.checked} / ${job.total} ` +
+            `(Ishlayapti: ${job.working}, Ishlamayapti: ${job.not_working}, Tekshirish kerak: ${job.need_check})`;
+    }
+}
+
+// Poll job status until it finishes
+function pollJob(jobId) {
+    return new Promise((resolve, reject) => {
+        processingTimer = setInterval(async () => {
+            try {
+                const response = await fetch(`/jobs/${jobId}`);
+                if (!response.ok) {
+                    throw new Error(await readError(response));
+                }
+                const job = await response.json();
+                updateProgress(job);
+
+                if (['completed', 'failed', 'cancelled'].includes(job.status)) {
+                    clearInterval(processingTimer);
+                    processingTimer = null;
+                    resolve(job);
+                }
+            } catch (error) {
+                clearInterval(processingTimer);
+                processingTimer = null;
+                reject(error);
+            }
+        }, JOB_POLL_INTERVAL);
+    });
+}
+
+// Add one checked domain to the live results list (newest first)
+function renderResult(result) {
+    const list = document.getElementById('liveResults');
+    if (!list || !result) {
+        return;
+    }
+
+    const item = document.createElement('li');
+    item.className = `live-result ${statusClasses[result.status] || 'not-working'}`;
+
+    const domain = document.createElement('span');
+    domain.className = 'live-domain';
+    domain.textContent = result.domain;
+
+    const status = document.createElement('span');
+    status.className = 'live-status';
+    status.textContent = statusLabels[result.status] || result.status;
+
+    const title = document.createElement('span');
+    title.className = 'live-title';
+    title.textContent = result.title || '';
+
+    item.append(domain, status, title);
+    list.prepend(item);
+    // Keep the page light for huge lists
+    while (list.children.length > LIVE_RESULTS_LIMIT) {
+        list.removeChild(list.lastChild);
+    }
+    list.style.display = 'block';
+}
+
+// Follow job events live (Server-Sent Events), fall back to polling
+function followJob(jobId) {
+    if (!window.EventSource) {
+        return pollJob(jobId);
+    }
+
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(`/jobs/${jobId}/events`);
+        const handleSnapshot = (event) => {
+            const job = JSON.parse(event.data);
+            if (job) {
+                updateProgress(job);
+            }
+        };
+
+        source.addEventListener('job', handleSnapshot);
+        source.addEventListener('progress', handleSnapshot);
+        source.addEventListener('result', (event) => renderResult(JSON.parse(event.data)));
+        source.addEventListener('summary', (event) => {
+            source.close();
+            const job = JSON.parse(event.data);
+            if (!job) {
+                reject(new Error('Vazifa topilmadi'));
+                return;
+            }
+            updateProgress(job);
+            resolve(job);
+        });
+        source.onerror = () => {
+            // Stream dropped - keep tracking the job by polling
+            source.close();
+            pollJob(jobId).then(resolve, reject);
+        };
+    });
+}
+
+// Cancel the running job
+async function cancelJob() {
+    if (!currentJobId) {
+        return;
+    }
+    try {
+        await fetch(`/jobs/${currentJobId}`, { method: 'DELETE' });
+        showToast('Tekshirish bekor qilinmoqda...', 'info');
+    } catch (error) {
+        console.error('Cancel error:', error);
+    }
+}
+
 // Main upload function
 async function uploadFile() {
     const fileInput = document.getElementById('fileInput');
+    const formatSelect = document.getElementById('formatSelect');
     const errorDiv = document.getElementById('error');
     const processingContainer = document.getElementById('processingContainer');
     const downloadContainer = document.getElementById('downloadContainer');
     const statusText = document.getElementById('statusText');
+    const domainCounter = document.getElementById('domainCounter');
+    const liveResults = document.getElementById('liveResults');
 
     // Check if all required elements exist
     if (!fileInput || !errorDiv || !processingContainer || !downloadContainer || !statusText) {
@@ -117,6 +290,13 @@ async function uploadFile() {
     errorDiv.style.display = 'none';
     downloadContainer.style.display = 'none';
     processingContainer.style.display = 'none';
+    if (domainCounter) {
+        domainCounter.textContent = '';
+    }
+    if (liveResults) {
+        liveResults.innerHTML = '';
+        liveResults.style.display = 'none';
+    }
 
     if (!fileInput.files.length) {
         errorDiv.textContent = 'Iltimos, faylni tanlang';
@@ -127,50 +307,53 @@ async function uploadFile() {
     try {
         // Show processing indicator
         processingContainer.style.display = 'block';
-        statusText.textContent = 'Faylni yuklash...';
+        statusText.textContent = processingStages[0];
 
         // Prepare form data
         const formData = new FormData();
         formData.append('file', fileInput.files[0]);
+        if (formatSelect && formatSelect.value) {
+            formData.append('format', formatSelect.value);
+        }
 
-        // Send request to server
+        // Send request to server - it answers right away with a job ID
         const response = await fetch('/upload', {
             method: 'POST',
             body: formData
         });
 
-        // Check if response is OK
         if (!response.ok) {
-            // Try to get error message from response
-            const contentType = response.headers.get('content-type');
-            if (contentType && contentType.includes('application/json')) {
-                const errorData = await response.json();
-                throw new Error(errorData.error || 'Server xatosi yuz berdi');
-            } else {
-                throw new Error('Server xatosi yuz berdi');
-            }
+            throw new Error(await readError(response));
         }
 
-        // Get statistics from headers
-        const total = response.headers.get('X-Total-Domains');
-        const working = response.headers.get('X-Working-Domains');
-        const notWorking = response.headers.get('X-Not-Working-Domains');
-        const needCheck = response.headers.get('X-Need-Check-Domains');
+        const job = await response.json();
+        currentJobId = job.id;
+        updateProgress(job);
 
-        statusText.textContent = 'Yakunlandi!';
+        // Follow the background job - results appear as soon as they are checked
+        const finishedJob = await followJob(job.id);
+        currentJobId = null;
 
-        // Get the file blob
-        const blob = await response.blob();
-        const url = window.URL.createObjectURL(blob);
+        if (finishedJob.status === 'cancelled') {
+            processingContainer.style.display = 'none';
+            showToast('Tekshirish bekor qilindi', 'info');
+            return;
+        }
+        if (finishedJob.status !== 'completed') {
+            throw new Error(finishedJob.error || 'Hisobot yaratishda xatolik yuz berdi');
+        }
+
+        statusText.textContent = 'Yakunlandi!';
 
-        // Show download button
-        showDownloadButton(url, 'domain_report.xlsx');
+        // Show download button - the file name (and extension) comes from the server
+        showDownloadButton(job.report_url, await reportFilename(job.report_url));
 
         // Show success message
         showToast('Hisobot muvaffaqiyatli yaratildi!', 'success');
 
     } catch (error) {
         console.error('Upload error:', error);
+        currentJobId = null;
         // Show error message
         errorDiv.textContent = error.message || 'Server xatosi. Iltimos, qayta urinib ko\'ring.';
         errorDiv.style.display = 'block';
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+# Testlar repozitoriya ildizidan ishga tushiriladi (python -m pytest yoki pytest)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    """app.py ni vaqtinchalik papkalar bilan import qilish - data/ va uploads/ ga tegmaydi"""
+    folder = tmp_path_factory.mktemp("app")
+    for name in ("RESULT_STORE_PATH", "SHARED_CACHE_PATH", "METRICS_PATH", "WORK_QUEUE_PATH"):
+        os.environ[name] = ""
+    os.environ["CHECKPOINT_FOLDER"] = str(folder / "checkpoints")
+    cwd = os.getcwd()
+    os.chdir(folder)
+    try:
+        import app
+    finally:
+        os.chdir(cwd)
+    app.app.config["UPLOAD_FOLDER"] = str(folder / "uploads")
+    return app
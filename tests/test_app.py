@@ -0,0 +1,80 @@
+import io
+import json
+
+import pytest
+
+
+@pytest.fixture
+def stream_runs(app_module, monkeypatch):
+    """/stream vazifalarini tekshiruvsiz bajarish - uzatilgan sozlamalar yoziladi"""
+    runs = []
+
+    def fake_runner(domains, force_refresh=False, http2=None):
+        runs.append((list(domains), force_refresh, http2))
+
+        async def runner(job_id):
+            return None
+
+        return runner
+
+    monkeypatch.setattr(app_module, "make_stream_runner", fake_runner)
+    return runs
+
+
+def stream_events(response):
+    return [json.loads(line)["event"] for line in response.get_data(as_text=True).splitlines() if line]
+
+
+@pytest.mark.parametrize("query, form, expected", [
+    ("", {}, False),
+    ("&force_refresh=1", {}, True),
+    ("", {"force_refresh": "1"}, True),
+    ("", {"force_refresh": "on"}, True),
+    ("&force_refresh=1", {"force_refresh": "0"}, False),
+])
+def test_stream_reads_force_refresh_from_form_and_query(app_module, stream_runs, query, form, expected):
+    data = dict(form, file=(io.BytesIO(b"example.com\nexample.uz\n"), "domains.txt"))
+    response = app_module.app.test_client().post(f"/stream?stream=ndjson{query}", data=data,
+                                                 content_type="multipart/form-data")
+    assert response.status_code == 200
+    assert stream_events(response)[-1] == "summary"
+    assert stream_runs == [(["example.com", "example.uz"], expected, None)]
+
+
+def test_stream_json_body_reads_flags_from_query(app_module, stream_runs):
+    response = app_module.app.test_client().post("/stream?stream=ndjson&force_refresh=yes&http2=0",
+                                                 json={"domains": ["example.com"]})
+    assert response.status_code == 200
+    assert stream_runs == [(["example.com"], True, False)]
+
+
+def test_index_lists_available_report_formats(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "available_formats", lambda: ["xlsx", "csv", "ndjson"])
+    page = app_module.app.test_client().get("/").get_data(as_text=True)
+    assert 'id="formatSelect"' in page
+    for name in ("xlsx", "csv", "ndjson"):
+        assert f'<option value="{name}">' in page
+    assert 'value="parquet"' not in page
+
+
+class FakeJobs:
+    def __init__(self, job):
+        self.job = job
+
+    def get(self, job_id):
+        return self.job if job_id == self.job["id"] else None
+
+
+@pytest.mark.parametrize("extension", ["xlsx", "csv", "ndjson"])
+def test_report_download_name_matches_format(app_module, monkeypatch, tmp_path, extension):
+    # Sahifa fayl nomini Content-Disposition dan oladi (HEAD so'rovi bilan)
+    output_path = tmp_path / f"report_job-1.{extension}"
+    output_path.write_bytes(b"report")
+    monkeypatch.setattr(app_module, "job_manager", FakeJobs({
+        "id": "job-1", "status": app_module.JOB_COMPLETED, "output_path": str(output_path),
+        "total": 1, "working": 1, "not_working": 0, "need_check": 0,
+    }))
+    client = app_module.app.test_client()
+    for response in (client.head("/jobs/job-1/report"), client.get("/jobs/job-1/report")):
+        assert response.status_code == 200
+        assert response.headers["Content-Disposition"] == f"attachment; filename=domain_report.{extension}"
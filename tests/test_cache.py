@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from utils import cache as cache_module
+from utils.cache import SQLiteCacheBackend, TTLCache, configure_shared_cache
+
+
+class FakeBackend:
+    """configure_shared_cache uchun o'rinbosar - chaqiruvlarni yozib boradi"""
+
+    def __init__(self):
+        self.entries = {}
+        self.calls = []
+
+    def get(self, namespace, key):
+        self.calls.append(("get", namespace, key))
+        value = self.entries.get((namespace, key))
+        return None if value is None else (value, 60.0)
+
+    def set(self, namespace, key, value, ttl):
+        self.calls.append(("set", namespace, key))
+        self.entries[(namespace, key)] = value
+
+    def delete(self, namespace, key):
+        self.calls.append(("delete", namespace, key))
+        self.entries.pop((namespace, key), None)
+
+    def clear(self, namespace):
+        self.calls.append(("clear", namespace))
+        self.entries = {key: value for key, value in self.entries.items() if key[0] != namespace}
+
+
+@pytest.fixture
+def shared_cache():
+    """Umumiy backend'ga ulangan kesh; test oxirida backend o'chiriladi"""
+    created = []
+
+    def make(backend, name="scheme"):
+        cache = TTLCache(100, default_ttl=60, name=name, shared=True)
+        created.append(cache)
+        configure_shared_cache(None, backend=backend)
+        return cache
+
+    yield make
+    configure_shared_cache(None)
+    for cache in created:
+        cache_module._shared_caches.remove(cache)
+
+
+def test_delete_reaches_backend(shared_cache):
+    backend = FakeBackend()
+    cache = shared_cache(backend)
+    cache.set("example.uz", "https")
+    cache.delete("example.uz")
+
+    assert ("delete", "scheme", "example.uz") in backend.calls
+    # Eskirgan qiymat backend'dan qayta o'qilmaydi
+    assert cache.get("example.uz") is None
+
+
+def test_clear_reaches_backend(shared_cache):
+    backend = FakeBackend()
+    cache = shared_cache(backend)
+    cache.set("a.uz", "https")
+    cache.set("b.uz", "http")
+    cache.clear()
+
+    assert ("clear", "scheme") in backend.calls
+    assert cache.get("a.uz") is None and cache.get("b.uz") is None
+
+
+def test_aget_reads_backend_off_the_loop(shared_cache):
+    backend = FakeBackend()
+    cache = shared_cache(backend)
+    backend.entries[("scheme", "example.uz")] = "http"
+
+    async def scenario():
+        return await cache.aget("example.uz")
+
+    assert asyncio.run(scenario()) == "http"
+    assert cache.stats()["shared_hits"] == 1
+    # Endi mahalliy keshda - backend'ga qayta murojaat yo'q
+    calls = len(backend.calls)
+    assert asyncio.run(scenario()) == "http"
+    assert len(backend.calls) == calls
+
+
+def test_sqlite_delete_is_seen_by_other_process(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    writer = SQLiteCacheBackend(path)
+    reader = SQLiteCacheBackend(path)
+
+    writer.set("scheme", "example.uz", "https", 60)
+    # Yozish navbatda - bazaga faqat flush'dan keyin tushadi
+    assert reader.get("scheme", "example.uz") is None
+    writer.flush()
+    assert reader.get("scheme", "example.uz")[0] == "https"
+
+    writer.delete("scheme", "example.uz")
+    # Navbatdagi tombstone shu jarayonda darhol ko'rinadi
+    assert writer.get("scheme", "example.uz") is None
+    writer.flush()
+    assert reader.get("scheme", "example.uz") is None
+
+
+def test_sqlite_clear_only_touches_namespace(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "shared.sqlite3"))
+    backend.set("scheme", "example.uz", "https", 60)
+    backend.set("dns", "example.uz", ["192.0.2.1"], 60)
+    backend.flush()
+    backend.set("scheme", "other.uz", "http", 60)
+
+    backend.clear("scheme")
+    backend.flush()
+    assert backend.get("scheme", "example.uz") is None
+    assert backend.get("scheme", "other.uz") is None
+    assert backend.get("dns", "example.uz")[0] == ["192.0.2.1"]
+
+
+def test_set_does_not_write_inline(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "shared.sqlite3"), flush_size=1)
+    backend.set("scheme", "example.uz", "https", 60)
+    # flush_size ga yetilsa ham yozish fon thread'iga qoldiriladi
+    assert backend._pending
+    backend.flush()
+    assert not backend._pending
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import multiprocessing
+import os
+
+import pytest
+
+from utils import checkpoint as checkpoint_module
+from utils.checkpoint import JobCheckpoint, claim_pending_checkpoints
+
+
+def result_for(domain):
+    return {"domain": domain, "status": "Working", "status_code": 200, "page_type": "Internal", "title": domain}
+
+
+def interrupted_job(folder, job_id, domains, done, **options):
+    """Yiqilgan jarayon qoldirgan nazorat nuqtasi (qulfi bo'shagan)"""
+    checkpoint = JobCheckpoint.create(str(folder), job_id, domains, **options)
+    for domain in done:
+        checkpoint.append(result_for(domain))
+    checkpoint.close()
+    return checkpoint.path
+
+
+def test_torn_last_line_is_ignored_and_appends_start_on_new_line(tmp_path):
+    path = interrupted_job(tmp_path, "job-1", ["a.uz", "b.uz", "c.uz"], ["a.uz", "b.uz"])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"domain": "c.uz", "sta')
+
+    claimed = JobCheckpoint.claim(path)
+    assert claimed.job_id == "job-1"
+    assert [result["domain"] for result in claimed.results] == ["a.uz", "b.uz"]
+
+    claimed.append(result_for("c.uz"))
+    claimed.close()
+    again = JobCheckpoint.claim(path)
+    assert [result["domain"] for result in again.results] == ["a.uz", "b.uz", "c.uz"]
+    again.close()
+
+
+def test_invalid_checkpoint_is_not_claimed(tmp_path):
+    path = tmp_path / "broken.ndjson"
+    path.write_text('{"domain": "a.uz"}\n', encoding="utf-8")
+    assert JobCheckpoint.claim(str(path)) is None
+
+
+def claim_and_hold(folder, claimed, ready, release):
+    checkpoints = claim_pending_checkpoints(folder)
+    claimed.put([checkpoint.job_id for checkpoint in checkpoints])
+    ready.wait()
+    # Qulflar fayllar yopilguncha (jarayon tugaguncha) ushlab turiladi
+    release.wait(10)
+    for checkpoint in checkpoints:
+        checkpoint.close()
+
+
+@pytest.mark.skipif(checkpoint_module.fcntl is None, reason="flock faqat POSIX'da")
+def test_racing_processes_claim_each_checkpoint_once(tmp_path):
+    for index in range(3):
+        interrupted_job(tmp_path, f"job-{index}", ["a.uz"], [])
+
+    context = multiprocessing.get_context("spawn")
+    claimed = context.Queue()
+    ready = context.Barrier(4)
+    release = context.Event()
+    processes = [context.Process(target=claim_and_hold, args=(str(tmp_path), claimed, ready, release))
+                 for _ in range(4)]
+    for process in processes:
+        process.start()
+    try:
+        owners = [claimed.get(timeout=30) for _ in processes]
+        # Egalari tirik - bu jarayon ham hech narsani ololmaydi
+        assert claim_pending_checkpoints(str(tmp_path)) == []
+    finally:
+        release.set()
+        for process in processes:
+            process.join(10)
+
+    assert sorted(job_id for ids in owners for job_id in ids) == ["job-0", "job-1", "job-2"]
+    # Egalari chiqdi - endi nazorat nuqtalarini boshqa jarayon davom ettira oladi
+    resumed = claim_pending_checkpoints(str(tmp_path))
+    assert [checkpoint.job_id for checkpoint in resumed] == ["job-0", "job-1", "job-2"]
+    for checkpoint in resumed:
+        checkpoint.close()
+
+
+@pytest.mark.skipif(checkpoint_module.fcntl is None, reason="flock faqat POSIX'da")
+def test_running_job_checkpoint_is_not_claimed(tmp_path):
+    running = JobCheckpoint.create(str(tmp_path), "job-1", ["a.uz"])
+    try:
+        assert JobCheckpoint.claim(running.path) is None
+        with pytest.raises(RuntimeError):
+            JobCheckpoint.create(str(tmp_path), "job-1", ["a.uz"])
+    finally:
+        running.close()
+
+
+class FakeJobManager:
+    def __init__(self):
+        self.submitted = {}
+        self.recorded = []
+
+    def submit(self, job_id, total, output_path, runner):
+        self.submitted[job_id] = (total, output_path, runner)
+
+    def record_result(self, job_id, item):
+        self.recorded.append(item["domain"])
+
+
+def test_resumed_job_checks_only_remaining_domains(app_module, tmp_path, monkeypatch):
+    folder = app_module.app.config["CHECKPOINT_FOLDER"]
+    output_path = str(tmp_path / "report.xlsx")
+    domains = ["a.uz", "b.uz", "c.uz", "d.uz"]
+    path = interrupted_job(folder, "job-resume", domains, ["a.uz", "c.uz"], output_path=output_path,
+                           force_refresh=True, http2=None)
+
+    jobs = FakeJobManager()
+    checked = []
+    reports = []
+
+    async def fake_check(remaining, job_id, progress_callback=None, **kwargs):
+        checked.append((job_id, list(remaining), kwargs["force_refresh"]))
+        for domain in remaining:
+            progress_callback(result_for(domain))
+        return []
+
+    def fake_write_report(results, path):
+        reports.append([result["domain"] for result in results])
+        open(path, "wb").close()
+
+    monkeypatch.setattr(app_module, "job_manager", jobs)
+    monkeypatch.setattr(app_module, "check_domains_for_job", fake_check)
+    monkeypatch.setattr(app_module, "write_report", fake_write_report)
+
+    app_module.resume_interrupted_jobs()
+    total, submitted_path, runner = jobs.submitted["job-resume"]
+    assert (total, submitted_path) == (4, output_path)
+
+    asyncio.run(runner("job-resume"))
+
+    assert checked == [("job-resume", ["b.uz", "d.uz"], True)]
+    # Oldingi natijalar progress'ga ham, hisobotga ham kiradi
+    assert sorted(jobs.recorded) == domains
+    assert sorted(reports[0]) == domains
+    assert not os.path.exists(path)
+
+
+def test_checkpoint_records_results_while_job_runs(app_module, tmp_path, monkeypatch):
+    checkpoint = JobCheckpoint.create(str(tmp_path), "job-live", ["a.uz", "b.uz"])
+
+    async def fake_check(remaining, job_id, progress_callback=None, **kwargs):
+        progress_callback(result_for(remaining[0]))
+        raise asyncio.TimeoutError
+
+    monkeypatch.setattr(app_module, "check_domains_for_job", fake_check)
+    monkeypatch.setattr(app_module, "write_report", lambda results, path: None)
+    ok, results = asyncio.run(app_module.process_domains(["a.uz", "b.uz"], str(tmp_path / "r.xlsx"), "job-live",
+                                                         checkpoint=checkpoint))
+    checkpoint.close()
+
+    assert ok and [result["status"] for result in results] == ["Working", "Need to Check"]
+    lines = [json.loads(line) for line in open(checkpoint.path, encoding="utf-8")]
+    assert lines[0]["job_id"] == "job-live" and [line["domain"] for line in lines[1:]] == ["a.uz"]
@@ -0,0 +1,40 @@
+import pytest
+
+from utils.deadlines import DEADLINE_MIN_SCALE, DeadlineManager, JobProgress
+
+
+def run_shard(total_in_job, deadline=100.0):
+    """Shard soniyasiga 1 ta, butun vazifa esa 5 ta domen tugatadi - 10 soniya"""
+    now = [0.0]
+    job_done = [0]
+    job = JobProgress(total_in_job, lambda: job_done[0]) if total_in_job is not None else None
+    deadlines = DeadlineManager(10, deadline, clock=lambda: now[0], job=job)
+    for _ in range(10):
+        now[0] += 1.0
+        job_done[0] += 5
+        deadlines.domain_done()
+    return deadlines
+
+
+def test_shard_alone_sees_no_pressure_after_its_own_domains():
+    assert run_shard(None).pressure() == 1.0
+
+
+def test_job_wide_backlog_shortens_budgets_of_each_shard():
+    # 950 domen qoldi, tezlik ~4.5/s - qolgan 90 soniyaga sig'maydi
+    deadlines = run_shard(1000)
+    assert DEADLINE_MIN_SCALE <= deadlines.pressure() < 1.0
+    assert not deadlines.allow_retry()
+    assert deadlines.dns_timeouts() == (deadlines.budgets().dns,)
+
+
+def test_job_on_track_keeps_full_budgets():
+    deadlines = run_shard(300)
+    assert deadlines.pressure() == 1.0
+    assert deadlines.allow_retry()
+
+
+def test_pressure_uses_job_rate_not_shard_rate():
+    deadlines = run_shard(1000)
+    # (50 - 5) / 10 s = 4.5/s; 950 / 4.5 s kerak, 90 * 0.9 s bor
+    assert deadlines.pressure() == pytest.approx(81 / (950 / 4.5))
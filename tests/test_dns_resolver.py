@@ -0,0 +1,135 @@
+import asyncio
+import socket
+import struct
+
+import pytest
+
+from utils.cache import TTLCache
+from utils.dns_resolver import QTYPE_A, RCODE_NOERROR, RCODE_NXDOMAIN, BaseResolver, StubResolver
+
+
+class GatedResolver(BaseResolver):
+    """_lookup gate ochilguncha kutadi va chaqiruvlarni sanaydi"""
+
+    def __init__(self):
+        super().__init__(cache=TTLCache(100, name="test-dns"))
+        self.gate = asyncio.Event()
+        self.calls = []
+
+    async def _lookup(self, host):
+        self.calls.append(host)
+        await self.gate.wait()
+        return ["192.0.2.1"], 60
+
+
+class FakeDNSProtocol(asyncio.DatagramProtocol):
+    """*.test hostlari uchun A yozuvi, qolganlari uchun NXDOMAIN qaytaradigan soxta server"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.queries = []
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        query_id = struct.unpack('!H', data[:2])[0]
+        offset, labels = 12, []
+        while data[offset]:
+            length = data[offset]
+            labels.append(data[offset + 1:offset + 1 + length].decode())
+            offset += length + 1
+        question = data[12:offset + 5]
+        qtype = struct.unpack('!H', data[offset + 1:offset + 3])[0]
+        host = '.'.join(labels)
+        self.queries.append((host, qtype))
+
+        if host.endswith('.test') and qtype == QTYPE_A:
+            answer = b'\xc0\x0c' + struct.pack('!HHIH', QTYPE_A, 1, 120, 4) + socket.inet_aton('192.0.2.7')
+            response = struct.pack('!HHHHHH', query_id, 0x8180 | RCODE_NOERROR, 1, 1, 0, 0) + question + answer
+        else:
+            response = struct.pack('!HHHHHH', query_id, 0x8180 | RCODE_NXDOMAIN, 1, 0, 0, 0) + question
+        asyncio.get_running_loop().call_later(self.delay, self.transport.sendto, response, addr)
+
+
+async def start_fake_dns():
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(FakeDNSProtocol, local_addr=('127.0.0.1', 0))
+    host, port = transport.get_extra_info('sockname')[:2]
+    return transport, protocol, f"{host}:{port}"
+
+
+def test_base_resolver_is_abstract():
+    with pytest.raises(TypeError):
+        BaseResolver()
+
+
+def test_concurrent_lookups_are_coalesced():
+    async def scenario():
+        resolver = GatedResolver()
+        waiters = [asyncio.ensure_future(resolver.resolve("Example.uz.")) for _ in range(10)]
+        await asyncio.sleep(0.01)
+        resolver.gate.set()
+        results = await asyncio.gather(*waiters)
+        assert resolver.calls == ["example.uz"]
+        assert all(addresses == ["192.0.2.1"] for addresses in results)
+        # Keyingi so'rov vazifa xotirasidan olinadi
+        assert await resolver.resolve("example.uz") == ["192.0.2.1"]
+        assert resolver.calls == ["example.uz"]
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_owner_does_not_cancel_other_waiters():
+    async def scenario():
+        resolver = GatedResolver()
+        owner = asyncio.ensure_future(resolver.resolve("example.uz"))
+        await asyncio.sleep(0.01)
+        other = asyncio.ensure_future(resolver.resolve("example.uz"))
+        await asyncio.sleep(0.01)
+
+        owner.cancel()
+        await asyncio.sleep(0.01)
+        resolver.gate.set()
+
+        assert await other == ["192.0.2.1"]
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        assert resolver.calls == ["example.uz"]
+
+    asyncio.run(scenario())
+
+
+def test_close_cancels_pending_lookups():
+    async def scenario():
+        resolver = GatedResolver()
+        waiter = asyncio.ensure_future(resolver.resolve("example.uz"))
+        await asyncio.sleep(0.01)
+        resolver.close()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert not resolver._pending
+
+    asyncio.run(scenario())
+
+
+def test_stub_resolver_coalesces_queries_to_fake_server():
+    async def scenario():
+        transport, server, nameserver = await start_fake_dns()
+        try:
+            resolver = StubResolver(nameserver=nameserver, cache=TTLCache(100, name="test-dns"))
+            results = await asyncio.gather(*(resolver.resolve("shop.test") for _ in range(20)))
+            assert all(addresses == ["192.0.2.7"] for addresses in results)
+            assert server.queries == [("shop.test", QTYPE_A)]
+
+            assert await resolver.resolve("missing.uz") == []
+            assert server.queries[-1] == ("missing.uz", QTYPE_A)
+            # TTL bilan keshlangan - yangi resolver ham serverga murojaat qilmaydi
+            fresh = StubResolver(nameserver=nameserver, cache=resolver.cache)
+            assert await fresh.resolve("shop.test") == ["192.0.2.7"]
+            assert len(server.queries) == 2
+        finally:
+            transport.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,125 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from utils import domain_checker
+from utils.domain_checker import check_domain, domain_health_cache, scheme_cache
+
+HTML = b"<html><head><title>Bosh sahifa</title></head><body><h1>Salom</h1></body></html>"
+
+
+class FakeResolver:
+    async def resolve(self, host):
+        return ["10.0.0.1"]
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(domain_checker, "RETRY_DELAY", 0)
+    scheme_cache.clear()
+    domain_health_cache.clear()
+    yield
+    scheme_cache.clear()
+    domain_health_cache.clear()
+
+
+def run_check(handler, domain="example.uz"):
+    """check_domain ni soxta transport bilan ishga tushirish; so'ralgan URL'lar ham qaytadi"""
+    requested = []
+
+    async def transport(request):
+        requested.append(f"{request.url.scheme}://{request.url.host}")
+        return await handler(request)
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(transport)) as client:
+            return await check_domain(client, domain, timeout=1, resolver=FakeResolver())
+
+    return asyncio.run(main()), requested
+
+
+def ok(request):
+    return httpx.Response(200, headers={"content-type": "text/html"}, content=HTML, request=request)
+
+
+def test_cache_miss_races_and_remembers_scheme():
+    async def handler(request):
+        return ok(request)
+
+    result, requested = run_check(handler)
+    assert result["status"] == "Working" and result["title"] == "Bosh sahifa"
+    # HTTPS bosh startda javob berdi - HTTP boshlanmaydi
+    assert requested == ["https://example.uz"]
+    assert scheme_cache.get("example.uz") == "https"
+
+
+def test_cache_hit_uses_remembered_scheme_only():
+    scheme_cache.set("example.uz", "http")
+
+    async def handler(request):
+        return ok(request)
+
+    result, requested = run_check(handler)
+    assert result["status"] == "Working"
+    assert requested == ["http://example.uz"]
+
+
+def test_stale_cached_scheme_falls_back_to_race():
+    scheme_cache.set("example.uz", "https")
+
+    async def handler(request):
+        if request.url.scheme == "https":
+            raise httpx.ConnectError("TLS yo'q", request=request)
+        return ok(request)
+
+    result, requested = run_check(handler)
+    assert result["status"] == "Working"
+    assert requested[0] == "https://example.uz" and requested[-1] == "http://example.uz"
+    assert scheme_cache.get("example.uz") == "http"
+
+
+def test_cached_scheme_timeout_counts_as_attempt():
+    scheme_cache.set("example.uz", "https")
+
+    async def handler(request):
+        raise httpx.ReadTimeout("sekin", request=request)
+
+    result, requested = run_check(handler)
+    assert result["status"] == "Need to Check" and result["title"] == "Timeout"
+    # Har bir urinish faqat eslab qolingan protokolni so'raydi, to'liq poyga boshlanmaydi
+    assert requested == ["https://example.uz"] * (domain_checker.MAX_RETRIES + 1)
+    assert scheme_cache.get("example.uz") == "https"
+
+
+def test_https_failing_fast_starts_http_before_head_start(monkeypatch):
+    monkeypatch.setattr(domain_checker, "HTTP_HEAD_START", 5)
+
+    async def handler(request):
+        if request.url.scheme == "https":
+            raise httpx.ConnectError("ulanish rad etildi", request=request)
+        return ok(request)
+
+    started = time.monotonic()
+    result, requested = run_check(handler)
+    assert time.monotonic() - started < 1
+    assert result["status"] == "Working"
+    assert requested == ["https://example.uz", "http://example.uz"]
+    assert scheme_cache.get("example.uz") == "http"
+
+
+def test_slow_https_loses_to_http_after_head_start(monkeypatch):
+    monkeypatch.setattr(domain_checker, "HTTP_HEAD_START", 0.05)
+
+    async def handler(request):
+        if request.url.scheme == "https":
+            await asyncio.sleep(5)
+        return ok(request)
+
+    started = time.monotonic()
+    result, requested = run_check(handler)
+    assert time.monotonic() - started < 1
+    assert result["status"] == "Working"
+    assert requested == ["https://example.uz", "http://example.uz"]
+    assert scheme_cache.get("example.uz") == "http"
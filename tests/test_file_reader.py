@@ -0,0 +1,161 @@
+import random
+
+import pytest
+
+from utils import file_reader
+from utils.file_reader import (DomainRecord, _clean_domain, _clean_domain_slow, clean_domain,
+                               extract_domains_from_text, iter_txt_domains, normalize_domains, read_file)
+
+CASES = [
+    ("example.com", "example.com"),
+    ("Example.COM", "example.com"),
+    ("  www.Example.uz \t", "www.example.uz"),
+    ("https://www.example.com/path?q=1", "www.example.com"),
+    ("HTTP://Shop.Example.co.uz/", "shop.example.co.uz"),
+    ("example.com/", "example.com"),
+    ("http://192.168.0.1/admin", "192.168.0.1"),
+    ("10.0.0.1", "10.0.0.1"),
+    ("example.com tekshirish natijalari: 5 ta", "example.com"),
+    ("http://example.com/a b", "example.com"),
+    # Port, query, boshqa protokollar va IDN (ASCII bo'lmagan) qiymatlar rad etiladi
+    ("example.com:8080", None),
+    ("https://example.com:8443/login", None),
+    ("example.com?x=1", None),
+    ("ftp://example.com", None),
+    ("http://http://example.com", None),
+    ("пример.рф", None),
+    ("ПРИМЕР.УЗ", None),
+    ("münchen.de", None),
+    ("xn--80ak6aa92e.com", "xn--80ak6aa92e.com"),
+    ("xn--e1afmkfd.xn--p1ai", None),
+    ("example", None),
+    ("-bad.example.com", None),
+    ("bad-.example.com", None),
+    ("example.com.", None),
+    ("1.2.3.4.5", None),
+    ("https://", None),
+    ("Tekshirish natijalari: example.com", None),
+    ("two words.com", None),
+    ("", None),
+]
+
+
+@pytest.mark.parametrize("value, expected", CASES)
+def test_clean_domain(value, expected):
+    assert _clean_domain(value) == expected
+
+
+@pytest.mark.parametrize("value", [value for value, _ in CASES])
+def test_fast_path_matches_slow_path(value):
+    assert _clean_domain(value) == _clean_domain_slow(value.strip().lower())
+
+
+def test_fast_path_matches_slow_path_on_generated_values():
+    fragments = ["", "http://", "https://", "HTTPS://", "ftp://", "www.", "WWW.", "sub.", "-", "xn--",
+                 "example", "ex-ample", "EXAMPLE", "пример", "münchen", "192.168.1.1", "1.2.3", "a" * 64,
+                 ".", "..", ".com", ".uz", ".co.uz", ".рф", ".c", ".c0m", ":8080", "/", "/path", "/a/b?c=d",
+                 "?q=1", "#top", " ", "\t", "tekshirish natijalari:", "@", "_"]
+    rng = random.Random(19)
+    for _ in range(20000):
+        value = "".join(rng.choice(fragments) for _ in range(rng.randint(1, 6)))
+        assert _clean_domain(value) == _clean_domain_slow(value.strip().lower()), value
+
+
+def test_normalize_domains_matches_per_value_cleaning():
+    values = [value for value, _ in CASES] + ["EXAMPLE.com", "https://example.com/other", "example.com"]
+    rejected = []
+    records = normalize_domains(values, rejected)
+
+    expected_domains, expected_rejected = [], []
+    for value in dict.fromkeys(values):
+        cleaned = _clean_domain_slow(value.strip().lower())
+        if cleaned is None:
+            expected_rejected.append(value)
+        elif cleaned not in expected_domains:
+            expected_domains.append(cleaned)
+    assert [record.domain for record in records] == expected_domains
+    assert rejected == expected_rejected
+
+
+def test_normalize_domains_records():
+    records = normalize_domains(["https://Shop.Example.co.uz/x", "192.168.0.1", "www.example.com"])
+    assert records[0] == DomainRecord("shop.example.co.uz", "example.co.uz", "co.uz", False)
+    assert records[1] == DomainRecord("192.168.0.1", "192.168.0.1", "", True)
+    assert records[2].registrable == "example.com"
+    # Tayyor yozuvlar qayta normallashtirilmaydi, dublikatlar tashlanadi
+    assert normalize_domains(records + ["SHOP.example.co.uz"]) == records
+
+
+def legacy_txt_domains(path):
+    """Avvalgi .txt o'quvchi: butun matn qatorlarga va so'zlarga bo'linib, har biri tozalanadi"""
+    with open(path, encoding="utf-8-sig", errors="ignore") as f:
+        parts = extract_domains_from_text(f.read())
+    return {cleaned for cleaned in map(clean_domain, parts) if cleaned}
+
+
+TXT_SAMPLE = (
+    "\ufeffexample.com\r\n"
+    "https://WWW.Example.uz/login, shop.example.co.uz\tbad-.example.com\n"
+    "\n\r\n"
+    "192.168.0.1 10.0.0.300 1.2.3.4.5 example.com:8080 пример.рф münchen.de xn--80ak6aa92e.com\n"
+    "example.com tekshirish natijalari: 5 ta\n"
+    "http://example.com/a b,,  ,\texample.org/path?x=1\n"
+    "no-dot-here ... .com example. sub.example.com"
+)
+
+
+def write_txt(tmp_path, text, name="domains.txt"):
+    path = tmp_path / name
+    path.write_bytes(text.encode("utf-8"))
+    return str(path)
+
+
+def test_iter_txt_domains_matches_legacy_reader(tmp_path):
+    path = write_txt(tmp_path, TXT_SAMPLE)
+    domains = set(iter_txt_domains(path))
+    assert domains == legacy_txt_domains(path)
+    assert "example.com" in domains and "www.example.uz" in domains
+
+
+def test_iter_txt_domains_empty_file(tmp_path):
+    assert list(iter_txt_domains(write_txt(tmp_path, ""))) == []
+    assert list(iter_txt_domains(write_txt(tmp_path, "\ufeff", name="bom.txt"))) == []
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 16, 33, 64])
+def test_iter_txt_domains_small_chunks_match_legacy_reader(tmp_path, monkeypatch, chunk_size):
+    # Bo'lak chegarasi har xil joyga tushadi - so'zlar bo'linmasligi kerak
+    monkeypatch.setattr(file_reader, "TXT_SCAN_CHUNK_SIZE", chunk_size)
+    path = write_txt(tmp_path, TXT_SAMPLE)
+    assert set(iter_txt_domains(path)) == legacy_txt_domains(path)
+
+
+def test_iter_txt_domains_token_straddles_chunk_without_newline(tmp_path, monkeypatch):
+    # Bitta uzun qator: bo'lak ichida yangi qator yo'q, chegara keyingi yangi qatorga suriladi
+    monkeypatch.setattr(file_reader, "TXT_SCAN_CHUNK_SIZE", 32)
+    line = ",".join(f"host{index}.example.com" for index in range(50))
+    path = write_txt(tmp_path, line + "\nlast.example.org")
+    assert set(iter_txt_domains(path)) == legacy_txt_domains(path)
+    assert len(set(iter_txt_domains(path))) == 51
+
+
+def test_iter_txt_domains_token_straddles_default_chunk_boundary(tmp_path):
+    # Haqiqiy 8 MB chegara: domen chegaradan oldin boshlanib, undan keyin tugaydi
+    boundary = file_reader.TXT_SCAN_CHUNK_SIZE
+    filler = "filler line\n" * ((boundary - 20) // 12)
+    padding = "x" * (boundary - 10 - len(filler))
+    text = filler + padding + "\nstraddle.example.com\n" + "tail.example.org, " * 100
+    assert text.index("straddle") < boundary < text.index("straddle") + len("straddle.example.com")
+    path = write_txt(tmp_path, text)
+    assert set(iter_txt_domains(path)) == {"straddle.example.com", "tail.example.org"}
+
+    # Xuddi shu, lekin chegarada yangi qator yo'q (bitta uzun qator)
+    text = "x" * (boundary - 10) + " straddle.example.com " + "tail.example.org, " * 100
+    path = write_txt(tmp_path, text, name="one_line.txt")
+    assert set(iter_txt_domains(path)) == {"straddle.example.com", "tail.example.org"}
+
+
+def test_read_file_txt_matches_legacy_reader(tmp_path):
+    path = write_txt(tmp_path, TXT_SAMPLE)
+    assert read_file(path) == sorted(legacy_txt_domains(path))
+    assert len(read_file(path, max_domains=2)) == 2
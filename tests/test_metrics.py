@@ -0,0 +1,73 @@
+import json
+import sqlite3
+import subprocess
+import sys
+
+from utils.metrics import PROBES_IN_FLIGHT, PROBES_TOTAL, configure_metrics, flush_metrics, render_metrics
+
+ROOT = __file__.rsplit("/tests/", 1)[0]
+
+PROCESS_SCRIPT = """
+import sys
+sys.path.insert(0, {root!r})
+from utils.metrics import PROBE_SECONDS, PROBES_TOTAL, configure_metrics, flush_metrics
+configure_metrics({path!r})
+PROBES_TOTAL.inc(2, status="Working", outcome="ok")
+PROBE_SECONDS.observe(0.2)
+flush_metrics()
+flush_metrics()
+"""
+
+
+def test_finished_processes_do_not_add_rows(tmp_path):
+    path = str(tmp_path / "metrics.sqlite3")
+    for _ in range(5):
+        subprocess.run([sys.executable, "-c", PROCESS_SCRIPT.format(root=ROOT, path=path)], check=True)
+
+    conn = sqlite3.connect(path)
+    totals = dict(conn.execute(
+        "SELECT name, value FROM metric_totals WHERE name IN (?, ?)",
+        ("domain_checker_probes_total", "domain_checker_probe_seconds")
+    ).fetchall())
+    # Har bir seriya uchun bitta qator, jarayonlar soniga qaramay
+    assert conn.execute("SELECT COUNT(*) FROM metric_totals WHERE name = ?",
+                        ("domain_checker_probes_total",)).fetchone()[0] == 1
+    assert totals["domain_checker_probes_total"] == "10.0"
+    histogram = json.loads(totals["domain_checker_probe_seconds"])
+    assert sum(histogram[:-1]) == 5
+
+
+def test_repeated_flushes_do_not_double_count(tmp_path):
+    backend = configure_metrics(str(tmp_path / "metrics.sqlite3"))
+    try:
+        before = PROBES_TOTAL.samples().get(("Need to Check", "timeout"), 0.0)
+        PROBES_TOTAL.inc(3, status="Need to Check", outcome="timeout")
+        PROBES_IN_FLIGHT.inc(2)
+        flush_metrics()
+        flush_metrics()
+        text = render_metrics()
+        assert f'domain_checker_probes_total{{status="Need to Check",outcome="timeout"}} {int(before + 3)}' in text
+
+        rows = backend._connection().execute(
+            "SELECT COUNT(*) FROM metric_gauges WHERE name = ?", ("domain_checker_probes_in_flight",)
+        ).fetchone()[0]
+        assert rows == 1
+    finally:
+        PROBES_IN_FLIGHT.dec(2)
+        configure_metrics(None)
+
+
+def test_stale_gauges_are_pruned(tmp_path):
+    backend = configure_metrics(str(tmp_path / "metrics.sqlite3"))
+    try:
+        conn = backend._connection()
+        conn.execute(
+            "INSERT INTO metric_gauges (process, name, labels, value, updated_at) VALUES (?, ?, ?, ?, ?)",
+            ("dead-process", "domain_checker_probes_in_flight", "[]", 7.0, 0.0)
+        )
+        flush_metrics()
+        assert conn.execute("SELECT COUNT(*) FROM metric_gauges WHERE process = ?",
+                            ("dead-process",)).fetchone()[0] == 0
+        assert "domain_checker_probes_in_flight 7" not in render_metrics()
+    finally:
+        configure_metrics(None)
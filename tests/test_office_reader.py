@@ -0,0 +1,287 @@
+import zipfile
+
+import openpyxl
+import pytest
+
+from utils import file_reader, office_reader
+from utils.file_reader import clean_domain
+from utils.office_reader import UnsupportedWorkbook, iter_xlsx_strings
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+STRICT_NS = "http://purl.oclc.org/ooxml/spreadsheetml/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PACKAGE_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+XLSX_CONTENT_TYPES = f"""<?xml version="1.0" encoding="UTF-8"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+<Override PartName="/xl/worksheets/sheet2.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>
+</Types>"""
+
+# Rich text (bir nechta r), fonetik matn (rPh - tashlanadi) va bo'sh qiymat
+SHARED_STRINGS = f"""<?xml version="1.0" encoding="UTF-8"?>
+<sst xmlns="{MAIN_NS}" count="5" uniqueCount="5">
+<si><t>shared.example.com</t></si>
+<si><r><t>rich.</t></r><r><rPr><b/></rPr><t>example.uz</t></r></si>
+<si><t>phonetic.example.com</t><rPh sb="0" eb="1"><t>ignored.example.com</t></rPh></si>
+<si><t xml:space="preserve">  padded.example.org, second.example.org  </t></si>
+<si><t/></si>
+</sst>"""
+
+SHEET1 = f"""<?xml version="1.0" encoding="UTF-8"?>
+<worksheet xmlns="{MAIN_NS}"><sheetData>
+<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c><c r="C1"><v>42</v></c></row>
+<row r="2"><c r="A2" t="inlineStr"><is><t>inline.example.com</t></is></c><c r="B2" t="b"><v>1</v></c></row>
+<row r="3"><c r="A3" t="inlineStr"><is><r><t>inline-rich.</t></r><r><t>example.net</t></r></is></c></row>
+<row r="4"><c r="A4" t="str"><f>LOWER("FORMULA.EXAMPLE.COM")</f><v>formula.example.com</v></c>
+<c r="B4" t="e"><v>#N/A</v></c><c r="C4" t="s"><v>2</v></c></row>
+<row r="5"><c r="A5" t="s"><v>0</v></c><c r="B5" t="s"><v>3</v></c><c r="C5" t="s"><v>4</v></c></row>
+</sheetData></worksheet>"""
+
+SHEET2 = f"""<?xml version="1.0" encoding="UTF-8"?>
+<worksheet xmlns="{MAIN_NS}"><sheetData>
+<row r="1"><c r="A1" t="s"><v>1</v></c><c r="B1" t="inlineStr"><is><t>second-sheet.example.com</t></is></c></row>
+</sheetData></worksheet>"""
+
+
+def workbook_parts(ns=MAIN_NS):
+    return {
+        "[Content_Types].xml": XLSX_CONTENT_TYPES,
+        "_rels/.rels": f"""<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="{PACKAGE_REL_NS}">
+<Relationship Id="rId1" Type="{REL_NS}/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>""",
+        "xl/workbook.xml": f"""<?xml version="1.0" encoding="UTF-8"?>
+<workbook xmlns="{ns}" xmlns:r="{REL_NS}"><sheets>
+<sheet name="Domains" sheetId="1" r:id="rId1"/><sheet name="More" sheetId="2" r:id="rId2"/>
+</sheets></workbook>""",
+        "xl/_rels/workbook.xml.rels": f"""<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="{PACKAGE_REL_NS}">
+<Relationship Id="rId1" Type="{REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>
+<Relationship Id="rId2" Type="{REL_NS}/worksheet" Target="/xl/worksheets/sheet2.xml"/>
+<Relationship Id="rId3" Type="{REL_NS}/sharedStrings" Target="sharedStrings.xml"/>
+</Relationships>""",
+        "xl/sharedStrings.xml": SHARED_STRINGS.replace(MAIN_NS, ns),
+        "xl/worksheets/sheet1.xml": SHEET1.replace(MAIN_NS, ns),
+        "xl/worksheets/sheet2.xml": SHEET2.replace(MAIN_NS, ns),
+    }
+
+
+def write_zip(path, parts):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in parts.items():
+            archive.writestr(name, content)
+    return str(path)
+
+
+@pytest.fixture
+def mixed_xlsx(tmp_path):
+    """Shared string, inline string, formula natijasi va sonli kataklar aralash kitob"""
+    return write_zip(tmp_path / "mixed.xlsx", workbook_parts())
+
+
+@pytest.fixture
+def openpyxl_xlsx(tmp_path):
+    """openpyxl yozgan kitob (matnlar sharedStrings.xml da)"""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["a.example.com", 1, None, "b.example.com, c.example.com"])
+    sheet.append(["a.example.com", True, 2.5, "https://d.example.uz/path"])
+    other = workbook.create_sheet("Other")
+    other.append(["e.example.org", "a.example.com"])
+    workbook.create_sheet("Empty")
+    path = str(tmp_path / "openpyxl.xlsx")
+    workbook.save(path)
+    return path
+
+
+def openpyxl_strings(path):
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        # Xato kataklari (#N/A) openpyxl'da matn bo'lib keladi - tezkor o'quvchi ularni o'tkazadi
+        return {cell.value for sheet in workbook.worksheets for row in sheet.rows for cell in row
+                if isinstance(cell.value, str) and cell.data_type != "e"}
+    finally:
+        workbook.close()
+
+
+@pytest.mark.parametrize("fixture", ["mixed_xlsx", "openpyxl_xlsx"])
+def test_iter_xlsx_strings_matches_openpyxl(request, fixture):
+    path = request.getfixturevalue(fixture)
+    strings = list(iter_xlsx_strings(path, workers=1))
+    assert set(strings) == openpyxl_strings(path)
+
+
+def test_iter_xlsx_strings_shared_and_inline(mixed_xlsx):
+    strings = list(iter_xlsx_strings(mixed_xlsx, workers=1))
+    assert "rich.example.uz" in strings and "inline-rich.example.net" in strings
+    assert "formula.example.com" in strings and "second-sheet.example.com" in strings
+    assert "ignored.example.com" not in "".join(strings)
+    # Bir nechta katakdagi shared string bir marta qaytadi
+    assert strings.count("shared.example.com") == 1
+    assert strings.count("rich.example.uz") == 1
+
+
+def test_iter_xlsx_strings_parallel_matches_serial(mixed_xlsx, monkeypatch):
+    monkeypatch.setattr(office_reader, "XLSX_PARALLEL_MIN_BYTES", 0)
+    assert set(iter_xlsx_strings(mixed_xlsx, workers=2)) == set(iter_xlsx_strings(mixed_xlsx, workers=1))
+
+
+def test_read_xlsx_file_matches_openpyxl_reader(mixed_xlsx, openpyxl_xlsx):
+    for path in (mixed_xlsx, openpyxl_xlsx):
+        fast, slow = set(), set()
+        file_reader.read_xlsx_file(path, fast, 5000)
+        file_reader.read_xlsx_file_openpyxl(path, slow, 5000)
+        assert {clean_domain(value) for value in fast} - {None} == {clean_domain(value) for value in slow} - {None}
+
+
+def test_strict_workbook_falls_back_to_openpyxl(tmp_path, monkeypatch):
+    path = write_zip(tmp_path / "strict.xlsx", workbook_parts(STRICT_NS))
+    with pytest.raises(UnsupportedWorkbook):
+        list(iter_xlsx_strings(path, workers=1))
+
+    calls = []
+    monkeypatch.setattr(file_reader, "read_xlsx_file_openpyxl",
+                        lambda *args: calls.append(args[0]))
+    file_reader.read_xlsx_file(path, set(), 5000)
+    assert calls == [path]
+
+
+def test_read_xlsx_file_rejects_non_zip(tmp_path):
+    path = tmp_path / "broken.xlsx"
+    path.write_bytes(b"not a zip archive")
+    domains = set()
+    file_reader.read_xlsx_file(str(path), domains, 5000)
+    assert domains == set()
+
+
+WORD_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+STRICT_WORD_NS = "http://purl.oclc.org/ooxml/wordprocessingml/main"
+
+DOCUMENT = f"""<?xml version="1.0" encoding="UTF-8"?>
+<w:document xmlns:w="{WORD_NS}"><w:body>
+<w:p><w:r><w:t>first.</w:t></w:r><w:r><w:t>example.com</w:t></w:r></w:p>
+<w:p><w:r><w:t>tab</w:t><w:tab/><w:t>tab.example.uz</w:t><w:br/><w:t>br.example.uz</w:t></w:r></w:p>
+<w:p/>
+<w:tbl><w:tr>
+<w:tc><w:p><w:r><w:t>cell.example.com</w:t></w:r></w:p><w:p><w:r><w:t>cell2.example.com</w:t></w:r></w:p></w:tc>
+<w:tc><w:tcPr><w:gridSpan w:val="2"/></w:tcPr><w:p><w:r><w:t>merged.example.com</w:t></w:r></w:p></w:tc>
+</w:tr><w:tr>
+<w:tc><w:tbl><w:tr><w:tc><w:p><w:r><w:t>nested.example.org</w:t></w:r></w:p></w:tc></w:tr></w:tbl><w:p/></w:tc>
+<w:tc><w:p/></w:tc>
+</w:tr></w:tbl>
+<w:p><w:r><w:t xml:space="preserve">  last.example.org  </w:t></w:r></w:p>
+<w:sectPr/>
+</w:body></w:document>"""
+
+
+def document_parts(document=DOCUMENT, target="word/document.xml"):
+    return {
+        "[Content_Types].xml": """<?xml version="1.0" encoding="UTF-8"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>""",
+        "_rels/.rels": f"""<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="{PACKAGE_REL_NS}">
+<Relationship Id="rId1" Type="{REL_NS}/officeDocument" Target="{target}"/>
+</Relationships>""",
+        target.lstrip("/"): document,
+    }
+
+
+@pytest.fixture
+def handmade_docx(tmp_path):
+    return write_zip(tmp_path / "handmade.docx", document_parts())
+
+
+@pytest.fixture
+def python_docx_docx(tmp_path):
+    """python-docx yozgan hujjat - paragraflar, tab/qator ajratgichlari, birlashtirilgan kataklar"""
+    docx = pytest.importorskip("docx")
+    document = docx.Document()
+    document.add_paragraph("intro.example.com, second.example.com")
+    run = document.add_paragraph("https://www.example.uz/path").add_run("tail")
+    run.add_tab()
+    run.add_text("tab.example.uz")
+    run.add_break()
+    run.add_text("br.example.uz")
+    table = document.add_table(rows=2, cols=3)
+    table.cell(0, 0).text = "a.example.com"
+    table.cell(0, 1).merge(table.cell(0, 2)).text = "merged.example.com"
+    table.cell(1, 0).text = "b.example.com"
+    table.cell(1, 0).add_paragraph("c.example.com")
+    document.add_paragraph("")
+    document.add_paragraph("last.example.org")
+    path = str(tmp_path / "python_docx.docx")
+    document.save(path)
+    return path
+
+
+def python_docx_texts(path):
+    """Avvalgi o'quvchi ko'rgan matnlar: paragraflar va jadval kataklari"""
+    docx = pytest.importorskip("docx")
+    document = docx.Document(path)
+    texts = {paragraph.text for paragraph in document.paragraphs}
+    texts.update(cell.text for table in document.tables for row in table.rows for cell in row.cells)
+    return {text for text in texts if text.strip()}
+
+
+def test_iter_docx_texts_matches_python_docx(python_docx_docx):
+    assert set(office_reader.iter_docx_texts(python_docx_docx)) == python_docx_texts(python_docx_docx)
+
+
+def test_iter_docx_texts_handmade_document(handmade_docx):
+    texts = list(office_reader.iter_docx_texts(handmade_docx))
+    assert texts == [
+        "first.example.com",
+        "tab\ttab.example.uz\nbr.example.uz",
+        "cell.example.com\ncell2.example.com",
+        "merged.example.com",
+        "nested.example.org",
+        "  last.example.org  ",
+    ]
+
+
+def test_iter_docx_texts_follows_package_relationship(tmp_path):
+    path = write_zip(tmp_path / "custom.docx", document_parts(target="/word/main.xml"))
+    assert "first.example.com" in office_reader.iter_docx_texts(path)
+
+
+def test_read_docx_file_matches_python_docx_reader(python_docx_docx):
+    domains = set()
+    file_reader.read_docx_file(python_docx_docx, domains, 5000)
+    expected = set()
+    for text in python_docx_texts(python_docx_docx):
+        expected.update(file_reader.extract_domains_from_text(text.strip()))
+    assert domains == expected
+
+
+@pytest.mark.parametrize("parts", [
+    # Strict OOXML nomlar fazosi - python-docx ham o'qimaydi
+    document_parts(DOCUMENT.replace(WORD_NS, STRICT_WORD_NS)),
+    # WordprocessingML emas
+    document_parts("<?xml version=\"1.0\"?><note><p>x.example.com</p></note>"),
+    # Asosiy hujjat qismi yo'q
+    {"_rels/.rels": document_parts()["_rels/.rels"]},
+], ids=["strict", "not-wordprocessingml", "missing-part"])
+def test_unsupported_docx_reads_no_domains(tmp_path, caplog, parts):
+    path = write_zip(tmp_path / "unsupported.docx", parts)
+    with pytest.raises((office_reader.UnsupportedDocument, KeyError)):
+        list(office_reader.iter_docx_texts(path))
+
+    # Yuklash xato bermaydi: xato loglanadi va fayldan domen olinmaydi
+    assert file_reader.read_file(path) == []
+    assert "Error reading docx file" in caplog.text
+
+
+def test_non_zip_docx_reads_no_domains(tmp_path, caplog):
+    path = tmp_path / "legacy.docx"
+    path.write_bytes(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1 old binary .doc")
+    assert file_reader.read_file(str(path)) == []
+    assert "Error reading docx file" in caplog.text
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from utils.rate_limiter import (BACKOFF_DEFAULT, BACKOFF_MAX, BACKOFF_RATE_FACTOR, MIN_RATE_FACTOR, PolitenessLimiter,
+                                TokenBucket, parse_retry_after)
+
+
+def http_date(seconds_from_now):
+    return format_datetime(datetime.now(timezone.utc) + timedelta(seconds=seconds_from_now), usegmt=True)
+
+
+def fast_limiter(**kwargs):
+    options = dict(host_rate=1000, host_burst=100, ip_rate=1000, ip_burst=100)
+    options.update(kwargs)
+    return PolitenessLimiter(**options)
+
+
+def test_parse_retry_after_seconds_and_http_date():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after(" 7 ") == 7.0
+    assert parse_retry_after(http_date(30)) == pytest.approx(30, abs=2)
+    # O'tib ketgan sana - kutish shart emas
+    assert parse_retry_after(http_date(-30)) == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after("") is None
+    assert parse_retry_after(None) is None
+
+
+@pytest.mark.parametrize("retry_after, expected", [
+    ("12", 12.0),
+    (None, BACKOFF_DEFAULT),
+    ("3600", BACKOFF_MAX),
+])
+def test_429_penalizes_host_and_ip(retry_after, expected):
+    limiter = fast_limiter()
+    delay = limiter.feedback("example.uz", "192.0.2.1", 429, retry_after)
+    assert delay == expected
+    assert limiter.backoffs == 1
+    for bucket in (limiter._host_bucket("example.uz"), limiter._ip_bucket("192.0.2.1")):
+        assert bucket.blocked_until == pytest.approx(time.monotonic() + expected, abs=0.5)
+        assert bucket.rate == bucket.base_rate * BACKOFF_RATE_FACTOR
+        assert bucket.tokens == 0
+
+
+def test_429_with_http_date_retry_after():
+    limiter = fast_limiter()
+    delay = limiter.feedback("example.uz", None, 429, http_date(20))
+    assert delay == pytest.approx(20, abs=2)
+    assert not limiter._ip_buckets
+
+
+def test_503_backs_off_only_with_retry_after():
+    limiter = fast_limiter()
+    assert limiter.feedback("example.uz", "192.0.2.1", 503) is None
+    assert limiter.backoffs == 0
+    assert limiter.feedback("example.uz", "192.0.2.1", 503, "4") == 4.0
+    assert limiter.backoffs == 1
+
+
+def test_penalty_recovers_on_success_up_to_base_rate():
+    bucket = TokenBucket(rate=10, burst=5)
+    for _ in range(10):
+        bucket.penalize(0)
+    # Rate MIN_RATE_FACTOR dan pastga tushmaydi
+    assert bucket.rate == pytest.approx(10 * MIN_RATE_FACTOR)
+
+    rewards = 0
+    while bucket.rate < bucket.base_rate:
+        bucket.reward()
+        rewards += 1
+    assert bucket.rate == bucket.base_rate
+    assert rewards == 25  # 1 * 1.1^n >= 10
+
+    limiter = fast_limiter()
+    limiter.feedback("example.uz", "192.0.2.1", 429, "0")
+    limiter.feedback("example.uz", "192.0.2.1", 200)
+    assert limiter._host_bucket("example.uz").rate == pytest.approx(1000 * BACKOFF_RATE_FACTOR * 1.1)
+    assert limiter._ip_bucket("192.0.2.1").rate == pytest.approx(1000 * BACKOFF_RATE_FACTOR * 1.1)
+
+
+def test_penalized_bucket_waits_until_unblocked():
+    async def scenario():
+        bucket = TokenBucket(rate=1000, burst=10)
+        bucket.penalize(0.1)
+        started = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) >= 0.09
+
+
+def test_slot_takes_host_semaphore_before_ip_semaphore():
+    async def scenario():
+        limiter = fast_limiter(host_concurrency=1, ip_concurrency=1)
+        release_first = asyncio.Event()
+        order = []
+
+        async def probe(name, host, ip, hold=None):
+            async with limiter.slot(host, ip):
+                order.append(name)
+                if hold is not None:
+                    await hold.wait()
+
+        first = asyncio.ensure_future(probe("a", "one.uz", "192.0.2.1", release_first))
+        await asyncio.sleep(0.01)
+        # Bir xil host: host semaforida kutadi va IP slotini band qilmaydi
+        same_host = asyncio.ensure_future(probe("b", "one.uz", "192.0.2.2"))
+        await asyncio.sleep(0.01)
+        assert not limiter._ip_semaphores["192.0.2.2"].locked()
+        # Boshqa host, lekin band IP: host semafori olinadi, IP semaforida kutadi
+        same_ip = asyncio.ensure_future(probe("c", "two.uz", "192.0.2.1"))
+        await asyncio.sleep(0.01)
+        assert limiter._host_semaphores["two.uz"].locked()
+        assert order == ["a"]
+
+        release_first.set()
+        await asyncio.wait_for(asyncio.gather(first, same_host, same_ip), timeout=2)
+        return order
+
+    order = asyncio.run(scenario())
+    assert order[0] == "a" and sorted(order[1:]) == ["b", "c"]
+
+
+def test_slot_without_ip_uses_host_limits_only():
+    async def scenario():
+        limiter = fast_limiter(host_concurrency=2)
+        async with limiter.slot("example.uz"):
+            assert limiter._host_semaphores["example.uz"]._value == 1
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert not limiter._ip_semaphores and not limiter._ip_buckets
@@ -0,0 +1,96 @@
+import csv
+import json
+
+import pytest
+
+from utils import report_writers
+from utils.excel_generator import REPORT_HEADERS, translate_result
+from utils.report_writers import (REPORT_FIELDS, format_from_path, resolve_format, write_csv, write_ndjson,
+                                  write_report)
+
+RESULTS = [
+    {"domain": "example.uz", "status": "Working", "status_code": 200, "page_type": "Internal",
+     "title": "Bosh sahifa, \"rasmiy\""},
+    {"domain": "login.example.uz", "status": "Need to Check", "status_code": 403, "page_type": "Error",
+     "title": "Status code: 403"},
+    {"domain": "down.example.com", "status": "Not Working", "status_code": None, "page_type": "Error",
+     "title": "O'zbekcha sarlavha\nikki qator"},
+]
+
+
+def expected_rows():
+    return [[str(number)] + [str(value) for value in translate_result(result)]
+            for number, result in enumerate(RESULTS, 1)]
+
+
+def test_write_csv(tmp_path):
+    path = str(tmp_path / "report.csv")
+    # Iterator ham qabul qilinadi (natijalar oqim bilan yoziladi)
+    assert write_csv(iter(RESULTS), path)
+    with open(path, "rb") as f:
+        assert f.read(3) == b"\xef\xbb\xbf"
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == REPORT_HEADERS
+    assert rows[1:] == expected_rows()
+
+
+def test_write_ndjson(tmp_path):
+    path = str(tmp_path / "report.ndjson")
+    assert write_ndjson(iter(RESULTS), path)
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().split("\n")
+    assert lines[-1] == ""
+    records = [json.loads(line) for line in lines[:-1]]
+    assert [list(record) for record in records] == [REPORT_FIELDS] * len(RESULTS)
+    assert [record["number"] for record in records] == [1, 2, 3]
+    assert [[str(value) for value in record.values()] for record in records] == expected_rows()
+    # ensure_ascii=False - o'zbekcha matn o'zgarmaydi
+    assert "O'zbekcha sarlavha\\nikki qator" in lines[2]
+
+
+def test_write_empty_reports(tmp_path):
+    assert write_csv([], str(tmp_path / "empty.csv"))
+    with open(tmp_path / "empty.csv", newline="", encoding="utf-8-sig") as f:
+        assert list(csv.reader(f)) == [REPORT_HEADERS]
+    assert write_ndjson([], str(tmp_path / "empty.ndjson"))
+    assert (tmp_path / "empty.ndjson").read_text(encoding="utf-8") == ""
+
+
+@pytest.mark.parametrize("name, expected", [
+    (None, "xlsx"),
+    ("", "xlsx"),
+    ("xlsx", "xlsx"),
+    (" CSV ", "csv"),
+    ("excel", "xlsx"),
+    ("JSONL", "ndjson"),
+    ("ndjson", "ndjson"),
+    ("pdf", None),
+    ("xlsx.exe", None),
+])
+def test_resolve_format(name, expected):
+    assert resolve_format(name) == expected
+
+
+def test_resolve_format_parquet_needs_pyarrow(monkeypatch):
+    monkeypatch.setattr(report_writers, "pyarrow", None)
+    assert resolve_format("parquet") is None
+    assert "parquet" not in report_writers.available_formats()
+    monkeypatch.setattr(report_writers, "pyarrow", object())
+    assert resolve_format("Parquet") == "parquet"
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("reports/report_1.csv", "csv"),
+    ("reports/report_1.NDJSON", "ndjson"),
+    ("reports/report_1.xlsx", "xlsx"),
+    ("reports/report_1", "xlsx"),
+])
+def test_format_from_path(path, expected):
+    assert format_from_path(path) == expected
+
+
+def test_write_report_picks_writer_from_extension(tmp_path):
+    path = str(tmp_path / "report.ndjson")
+    assert write_report(RESULTS, path)
+    assert len((tmp_path / "report.ndjson").read_text(encoding="utf-8").splitlines()) == len(RESULTS)
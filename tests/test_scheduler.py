@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+from utils.scheduler import OUTCOME_ERROR, OUTCOME_OK, OUTCOME_TIMEOUT, AdaptiveLimiter, RatePacer, run_work_queue
+
+
+def record_window(limiter, outcome, failures=0):
+    for index in range(limiter.window):
+        limiter._record(outcome if index >= failures else OUTCOME_TIMEOUT)
+
+
+def test_additive_increase_stops_at_ceiling():
+    limiter = AdaptiveLimiter(initial=9, floor=2, ceiling=10, window=5, increase_step=2)
+    record_window(limiter, OUTCOME_OK)
+    assert limiter.limit == 10
+    record_window(limiter, OUTCOME_OK)
+    assert limiter.limit == 10
+
+
+def test_multiplicative_decrease_stops_at_floor():
+    limiter = AdaptiveLimiter(initial=4, floor=2, ceiling=10, window=5, decrease_factor=0.5)
+    record_window(limiter, OUTCOME_TIMEOUT)
+    assert limiter.limit == 2
+    record_window(limiter, OUTCOME_ERROR)
+    assert limiter.limit == 2
+
+
+def test_failure_rate_at_threshold_still_increases():
+    limiter = AdaptiveLimiter(initial=4, floor=1, ceiling=10, window=5, increase_step=1, failure_threshold=0.2)
+    record_window(limiter, OUTCOME_OK, failures=1)
+    assert limiter.limit == 5
+    record_window(limiter, OUTCOME_OK, failures=2)
+    assert limiter.limit == 5 * limiter.decrease_factor
+
+
+def test_initial_limit_is_clamped():
+    assert AdaptiveLimiter(initial=50, floor=2, ceiling=10).limit == 10
+    assert AdaptiveLimiter(initial=0, floor=2, ceiling=10).limit == 2
+
+
+def test_loop_lag_backs_off_without_failures():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial=8, floor=1, ceiling=10, window=5, lag_threshold=0.1)
+        monitor = asyncio.create_task(limiter.monitor_loop_lag(interval=0.01))
+        await asyncio.sleep(0.03)
+        assert limiter.loop_lag < 0.1
+        # Event loop'ni bloklash - masalan, sinxron HTML tahlili
+        time.sleep(0.8)
+        await asyncio.sleep(0.02)
+        monitor.cancel()
+        assert limiter.loop_lag > 0.1
+        record_window(limiter, OUTCOME_OK)
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.limit == 8 * limiter.decrease_factor
+
+
+def test_in_flight_never_exceeds_limit():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial=3, floor=1, ceiling=8, window=1000)
+        active = 0
+        peak = 0
+
+        async def worker(item):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.005)
+            active -= 1
+            return item
+
+        done = []
+        await run_work_queue(range(30), worker, limiter, lambda result: OUTCOME_OK,
+                             lambda item, result: done.append(result))
+        return limiter, peak, done
+
+    limiter, peak, done = asyncio.run(scenario())
+    assert peak == 3 and limiter.peak_in_flight == 3
+    assert sorted(done) == list(range(30))
+
+
+def test_work_queue_finishes_every_item_when_workers_raise():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial=4, floor=1, ceiling=4, window=1000)
+
+        async def worker(item):
+            await asyncio.sleep(0)
+            if item % 3 == 0:
+                raise RuntimeError(f"boom {item}")
+            return item
+
+        done = []
+        await run_work_queue(range(20), worker, limiter, lambda result: OUTCOME_OK,
+                             lambda item, result: done.append(item))
+        return limiter, done
+
+    limiter, done = asyncio.run(scenario())
+    assert sorted(done) == [item for item in range(20) if item % 3]
+    # Xato ko'targan elementlar ham slotni bo'shatadi va xato deb hisoblanadi
+    assert limiter.in_flight == 0
+    assert limiter._completed == 20 and limiter._failures == 7
+
+
+def test_rate_pacer_spaces_starts():
+    async def scenario():
+        pacer = RatePacer(100)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(5):
+            await pacer.wait()
+        return loop.time() - started
+
+    assert asyncio.run(scenario()) >= 0.035
+    assert RatePacer(0).interval == 0.0
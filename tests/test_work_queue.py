@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils import work_queue as work_queue_module
+from utils.work_queue import UNIT_DONE, UNIT_FAILED, UNIT_LEASED, WORK_MAX_ATTEMPTS, WorkQueue, check_domains_distributed
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return WorkQueue(str(tmp_path / "work_queue.sqlite3"))
+
+
+def result_for(domain, worker):
+    return {"domain": domain, "status": "Working", "status_code": 200, "page_type": "Internal", "title": worker}
+
+
+def test_unit_is_leased_to_one_worker(queue):
+    queue.submit_job("job-1", [["a.uz", "b.uz"]])
+    unit_id, job_id, items, _ = queue.lease("node-a", lease_seconds=30)
+    assert job_id == "job-1" and items == ["a.uz", "b.uz"]
+    assert queue.lease("node-b", lease_seconds=30) is None
+    assert queue.unit_states("job-1") == {UNIT_LEASED: 1}
+
+
+def test_expired_lease_is_reassigned(queue):
+    queue.submit_job("job-1", [["a.uz"]])
+    unit_id, _, _, _ = queue.lease("node-a", lease_seconds=0.05)
+    time.sleep(0.1)
+
+    # node-a yiqildi deb hisoblanadi - birlik node-b ga beriladi
+    leased = queue.lease("node-b", lease_seconds=30)
+    assert leased is not None and leased[0] == unit_id
+
+    # Eski egasining yozuvlari qabul qilinmaydi
+    assert not queue.renew(unit_id, "node-a")
+    assert not queue.add_results(unit_id, "node-a", [result_for("a.uz", "node-a")])
+    assert not queue.complete(unit_id, "node-a")
+
+    assert queue.renew(unit_id, "node-b")
+    assert queue.add_results(unit_id, "node-b", [result_for("a.uz", "node-b")])
+    assert queue.complete(unit_id, "node-b")
+    assert [result["title"] for _, result in queue.fetch_results("job-1")] == ["node-b"]
+    assert queue.unit_states("job-1") == {UNIT_DONE: 1}
+
+
+def test_renewed_lease_is_not_reassigned(queue):
+    queue.submit_job("job-1", [["a.uz"]])
+    unit_id, _, _, _ = queue.lease("node-a", lease_seconds=0.1)
+    for _ in range(3):
+        time.sleep(0.05)
+        assert queue.renew(unit_id, "node-a", lease_seconds=0.1)
+    assert queue.lease("node-b") is None
+
+
+def test_unit_fails_after_max_attempts(queue):
+    queue.submit_job("job-1", [["a.uz", "b.uz"]])
+    for attempt in range(WORK_MAX_ATTEMPTS):
+        assert queue.lease(f"node-{attempt}", lease_seconds=0.01) is not None
+        time.sleep(0.02)
+
+    assert queue.lease("node-last") is None
+    assert queue.unit_states("job-1") == {UNIT_FAILED: 1}
+    assert queue.failed_units("job-1") == [["a.uz", "b.uz"]]
+
+
+def test_count_results_covers_all_units_of_job(queue):
+    queue.submit_job("job-1", [["a.uz"], ["b.uz", "c.uz"]])
+    queue.submit_job("job-2", [["d.uz"]])
+    first, _, _, _ = queue.lease("node-a")
+    second, _, _, _ = queue.lease("node-b")
+    assert queue.count_results("job-1") == 0
+    queue.add_results(first, "node-a", [result_for("a.uz", "node-a")])
+    queue.add_results(second, "node-b", [result_for("b.uz", "node-b"), result_for("c.uz", "node-b")])
+    assert queue.count_results("job-1") == 3
+    assert queue.count_results("job-2") == 0
+
+
+def test_coordinator_collects_results_after_reassignment(queue, monkeypatch):
+    monkeypatch.setattr(work_queue_module, "WORK_UNIT_SIZE", 2)
+    monkeypatch.setattr(work_queue_module, "WORK_POLL_INTERVAL", 0.02)
+    domains = ["a.uz", "b.uz", "c.uz", "d.uz"]
+    stop = threading.Event()
+
+    def nodes():
+        # Birinchi tugun birlikni oladi, bitta natija yozadi va "yiqiladi"
+        while not stop.is_set():
+            leased = queue.lease("crashed", lease_seconds=0.1)
+            if leased is not None:
+                unit_id, _, items, _ = leased
+                queue.add_results(unit_id, "crashed", [result_for(items[0].domain, "crashed")])
+                break
+            time.sleep(0.01)
+        # Ikkinchi tugun hamma birliklarni (qayta berilganini ham) tugatadi
+        while not stop.is_set():
+            leased = queue.lease("healthy", lease_seconds=30)
+            if leased is None:
+                time.sleep(0.02)
+                continue
+            unit_id, _, items, options = leased
+            # Tugunlar muddat bosimini butun vazifa bo'yicha hisoblaydi
+            assert options["total"] == len(domains)
+            queue.add_results(unit_id, "healthy", [result_for(item.domain, "healthy") for item in items])
+            queue.complete(unit_id, "healthy")
+
+    thread = threading.Thread(target=nodes, daemon=True)
+    thread.start()
+    try:
+        results = asyncio.run(asyncio.wait_for(
+            check_domains_distributed(domains, work_queue=queue, job_id="job-1"), timeout=10
+        ))
+    finally:
+        stop.set()
+        thread.join()
+
+    # Har bir domen bir marta; qayta berilgan birlikdagi takroriy natija tashlanadi
+    assert sorted(result["domain"] for result in results) == domains
+    # Tugallangan vazifa navbatdan tozalanadi
+    assert queue.unit_states("job-1") == {}
@@ -0,0 +1,365 @@
+import asyncio
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from utils.metrics import CACHE_LOOKUPS_TOTAL, register_collector
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Umumiy (jarayonlararo) kesh sozlamalari
+SHARED_CACHE_PATH = os.environ.get('SHARED_CACHE_PATH')  # masalan /tmp/domain_checker_cache.sqlite3
+SHARED_CACHE_MAX_TTL = 86400  # Muddatsiz yozuvlar umumiy keshda shuncha saqlanadi
+SHARED_CACHE_FLUSH_SIZE = 100  # Yozuvlar shuncha to'planganda yoki
+SHARED_CACHE_FLUSH_INTERVAL = 1.0  # shuncha sekund o'tganda fon thread'ida bazaga yoziladi
+SHARED_CACHE_PURGE_EVERY = 50  # Har shuncha yozishdan keyin eskirgan yozuvlar o'chiriladi
+SHARED_CACHE_READ_THREADS = 4  # aget() uchun bazadan o'qiydigan thread'lar
+
+# Tombstone: o'chirilgan, lekin hali bazaga yozilmagan kalit
+_DELETED = None
+
+# shared=True bilan yaratilgan keshlar (umumiy backend ularga ulanadi)
+_shared_caches: List["TTLCache"] = []
+_shared_backend = None
+_read_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _shared_read_executor() -> ThreadPoolExecutor:
+    global _read_executor
+    if _read_executor is None:
+        _read_executor = ThreadPoolExecutor(max_workers=SHARED_CACHE_READ_THREADS, thread_name_prefix="shared-cache")
+    return _read_executor
+
+
+class TTLCache:
+    """
+    Hajmi cheklangan LRU kesh, har bir yozuv uchun alohida TTL bilan.
+    get/set O(1); to'lganda eng uzoq ishlatilmagan yozuv chiqariladi.
+    hit/miss/eviction hisoblagichlari stats() orqali olinadi. Thread-safe.
+    Event loop ichida aget() ishlatiladi - umumiy backend'dan o'qish loop'ni bloklamaydi.
+    """
+
+    def __init__(self, max_size: int, default_ttl: Optional[float] = None, name: str = "cache",
+                 shared: bool = False):
+        """
+        shared=True bo'lsa, umumiy backend sozlanganda (configure_shared_cache) kesh
+        ikkinchi daraja sifatida undan foydalanadi - barcha gunicorn workerlari
+        bir xil yozuvlarni ko'radi. name backend'da namespace bo'ladi.
+        """
+        self.max_size = max(1, max_size)
+        self.default_ttl = default_ttl
+        self.name = name
+        self.backend = None
+        self.lock = threading.Lock()
+        # key -> (expires_at yoki None, value)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.shared_hits = 0
+        if shared:
+            _shared_caches.append(self)
+            self.backend = _shared_backend
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._get_local(key)
+        if value is not _MISSING:
+            return value
+        # Mahalliy keshda yo'q - umumiy backend'dan so'rash
+        backend = self.backend
+        found = self._read_backend(backend, key) if backend is not None else None
+        return self._shared_result(key, found, default)
+
+    async def aget(self, key: Hashable, default: Any = None) -> Any:
+        """get() ning event loop uchun varianti: backend'dan o'qish alohida thread'da"""
+        value = self._get_local(key)
+        if value is not _MISSING:
+            return value
+        backend = self.backend
+        found = None
+        if backend is not None:
+            loop = asyncio.get_running_loop()
+            found = await loop.run_in_executor(_shared_read_executor(), self._read_backend, backend, key)
+        return self._shared_result(key, found, default)
+
+    def _get_local(self, key: Hashable) -> Any:
+        with self.lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+        return _MISSING
+
+    def _read_backend(self, backend: Any, key: Hashable) -> Optional[Tuple[Any, float]]:
+        try:
+            return backend.get(self.name, key)
+        except Exception as e:
+            logger.warning(f"Shared cache read error ({self.name}): {str(e)}")
+            return None
+
+    def _shared_result(self, key: Hashable, found: Optional[Tuple[Any, float]], default: Any) -> Any:
+        if found is not None:
+            value, remaining = found
+            self._store_local(key, value, remaining)
+            with self.lock:
+                self.hits += 1
+                self.shared_hits += 1
+            return value
+        with self.lock:
+            self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """ttl berilmasa default_ttl ishlatiladi; ikkalasi ham None bo'lsa, yozuv muddatsiz"""
+        if ttl is None:
+            ttl = self.default_ttl
+        self._store_local(key, value, ttl)
+        backend = self.backend
+        if backend is not None:
+            try:
+                backend.set(self.name, key, value, ttl)
+            except Exception as e:
+                logger.warning(f"Shared cache write error ({self.name}): {str(e)}")
+
+    def _store_local(self, key: Hashable, value: Any, ttl: Optional[float]) -> None:
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self.lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """Yozuvni mahalliy keshdan ham, umumiy backend'dan ham o'chirish"""
+        with self.lock:
+            self._entries.pop(key, None)
+        backend = self.backend
+        if backend is not None:
+            try:
+                backend.delete(self.name, key)
+            except Exception as e:
+                logger.warning(f"Shared cache delete error ({self.name}): {str(e)}")
+
+    def clear(self) -> None:
+        with self.lock:
+            self._entries.clear()
+        backend = self.backend
+        if backend is not None:
+            try:
+                backend.clear(self.name)
+            except Exception as e:
+                logger.warning(f"Shared cache clear error ({self.name}): {str(e)}")
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "shared_hits": self.shared_hits,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SQLiteCacheBackend:
+    """
+    Bir xostdagi barcha jarayonlar uchun umumiy kesh - WAL rejimidagi SQLite fayl.
+    Qiymatlar JSON ko'rinishida saqlanadi. set()/delete() faqat navbatga qo'shadi,
+    bazaga fon thread'i kichik paketlarda yozadi - chaqiruvchi hech qachon SQLite'ni kutmaydi.
+    """
+
+    def __init__(self, path: str, flush_size: int = SHARED_CACHE_FLUSH_SIZE,
+                 flush_interval: float = SHARED_CACHE_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._flushes = 0
+        self._wakeup = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """(qiymat, qolgan TTL) yoki None"""
+        now = time.time()
+        cache_key = (namespace, str(key))
+        with self._lock:
+            pending = self._pending.get(cache_key, _MISSING)
+        if pending is not _MISSING:
+            payload, expires_at = pending
+            if payload is _DELETED:
+                return None
+        else:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?", cache_key
+            ).fetchone()
+            if row is None:
+                return None
+            payload, expires_at = row
+        if expires_at <= now:
+            return None
+        return json.loads(payload), expires_at - now
+
+    def set(self, namespace: str, key: Hashable, value: Any, ttl: Optional[float]) -> None:
+        ttl = SHARED_CACHE_MAX_TTL if ttl is None else min(ttl, SHARED_CACHE_MAX_TTL)
+        with self._lock:
+            self._pending[(namespace, str(key))] = (json.dumps(value), time.time() + ttl)
+            due = len(self._pending) >= self.flush_size
+        if due:
+            self._wakeup.set()
+
+    def delete(self, namespace: str, key: Hashable) -> None:
+        with self._lock:
+            self._pending[(namespace, str(key))] = (_DELETED, 0.0)
+            due = len(self._pending) >= self.flush_size
+        if due:
+            self._wakeup.set()
+
+    def clear(self, namespace: str) -> None:
+        """Namespace'ni to'liq tozalash (kamdan-kam, shuning uchun darhol)"""
+        with self._lock:
+            for cache_key in [cache_key for cache_key in self._pending if cache_key[0] == namespace]:
+                del self._pending[cache_key]
+        with self._connection() as conn:
+            conn.execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            rows = [(namespace, key, payload, expires_at)
+                    for (namespace, key), (payload, expires_at) in self._pending.items() if payload is not _DELETED]
+            deleted = [(namespace, key)
+                       for (namespace, key), (payload, _) in self._pending.items() if payload is _DELETED]
+            self._pending.clear()
+            self._flushes += 1
+            purge = self._flushes % SHARED_CACHE_PURGE_EVERY == 0
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)", rows
+            )
+            conn.executemany("DELETE FROM cache WHERE namespace = ? AND key = ?", deleted)
+            if purge:
+                conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+
+    def start(self) -> None:
+        """Fon yozuvchisini ishga tushirish (configure_shared_cache chaqiradi)"""
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="shared-cache-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Shared cache flush error: {str(e)}")
+
+
+def configure_shared_cache(path: Optional[str] = SHARED_CACHE_PATH, backend: Any = None) -> Any:
+    """
+    Umumiy kesh backend'ini shared=True bo'lgan barcha keshlarga ulash.
+    backend - get(namespace, key) / set(namespace, key, value, ttl) / delete(namespace, key) /
+    clear(namespace) ga ega har qanday obyekt (masalan testlar uchun o'rinbosar).
+    path ham, backend ham bo'lmasa, umumiy kesh o'chiriladi.
+    """
+    global _shared_backend
+    if backend is None and path:
+        try:
+            backend = SQLiteCacheBackend(path)
+            logger.info(f"Shared cache at {path}")
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Could not open shared cache {path}: {str(e)}")
+            backend = None
+
+    previous = _shared_backend
+    if previous is not None and previous is not backend and hasattr(previous, 'flush'):
+        previous.flush()
+    _shared_backend = backend
+    if backend is not None and hasattr(backend, 'start'):
+        backend.start()
+    if backend is not None and hasattr(backend, 'flush'):
+        # Jarayon tugashidan oldin yozilmagan yozuvlarni saqlash
+        atexit.register(backend.flush)
+    for cache in _shared_caches:
+        cache.backend = backend
+    return backend
+
+
+def flush_shared_cache() -> None:
+    """Navbatdagi yozuvlarni darhol bazaga yozish (atexit'siz tugaydigan jarayonlar uchun)"""
+    backend = _shared_backend
+    if backend is None or not hasattr(backend, 'flush'):
+        return
+    try:
+        backend.flush()
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Shared cache flush error: {str(e)}")
+
+
+def get_shared_backend() -> Any:
+    """Hozir ulangan umumiy kesh backend'i (yoki None)"""
+    return _shared_backend
+
+
+def _cache_metrics() -> None:
+    """Keshlar hit/miss hisoblagichlarini /metrics ga ko'chirish"""
+    for cache in _shared_caches:
+        stats = cache.stats()
+        CACHE_LOOKUPS_TOTAL.set_total(stats["hits"] - stats["shared_hits"], cache=cache.name, result="hit")
+        CACHE_LOOKUPS_TOTAL.set_total(stats["shared_hits"], cache=cache.name, result="shared_hit")
+        CACHE_LOOKUPS_TOTAL.set_total(stats["misses"], cache=cache.name, result="miss")
+
+
+register_collector(_cache_metrics)
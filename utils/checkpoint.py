@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+# Fayl qulfi faqat POSIX'da - boshqa tizimlarda vazifani bir nechta jarayon davom ettirishi mumkin
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_EXTENSION = ".ndjson"
+CHECKPOINT_FLUSH_SIZE = 50  # Natijalar diskka shuncha yozuvdan keyin...
+CHECKPOINT_FLUSH_INTERVAL = 1.0  # ...yoki shuncha sekunddan keyin yoziladi
+
+
+class JobCheckpoint:
+    """
+    Vazifaning faqat qo'shib boriladigan (append-only) nazorat nuqtasi - NDJSON fayl.
+    Birinchi qator - vazifa sarlavhasi (domenlar ro'yxati va parametrlar), qolganlari -
+    tugagan tekshiruv natijalari. Jarayon yiqilsa, oxirgi chala qator e'tiborsiz
+    qoldiriladi. Ishlayotgan vazifa faylni qulflab turadi (flock) - boshqa jarayon uni
+    faqat egasi o'lgandan keyin davom ettira oladi.
+    """
+
+    def __init__(self, path: str, header: Dict[str, Any], results: Optional[List[Dict[str, Any]]] = None):
+        self.path = path
+        self.header = header
+        self.results = results or []  # Fayldan o'qilgan (oldingi ishga tushirishdagi) natijalar
+        self._file = None
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    @property
+    def job_id(self) -> str:
+        return self.header["job_id"]
+
+    @classmethod
+    def create(cls, folder: str, job_id: str, domains: List[str], **options: Any) -> "JobCheckpoint":
+        os.makedirs(folder, exist_ok=True)
+        header = dict(options, job_id=job_id, domains=domains, created_at=time.time())
+        checkpoint = cls(os.path.join(folder, job_id + CHECKPOINT_EXTENSION), header)
+        checkpoint._file = open(checkpoint.path, "a", encoding="utf-8")
+        if not checkpoint._lock():
+            checkpoint._file.close()
+            raise RuntimeError(f"Checkpoint {checkpoint.path} is locked by another process")
+        checkpoint._file.write(json.dumps(header, ensure_ascii=False) + "\n")
+        checkpoint._sync()
+        return checkpoint
+
+    @classmethod
+    def claim(cls, path: str) -> Optional["JobCheckpoint"]:
+        """
+        To'xtab qolgan vazifaning nazorat nuqtasini davom ettirish uchun olish.
+        Fayl boshqa jarayonda qulflangan (vazifa ishlayapti) yoki buzilgan bo'lsa None.
+        """
+        try:
+            handle = open(path, "a+", encoding="utf-8")
+        except OSError as e:
+            logger.error(f"Could not open checkpoint {path}: {str(e)}")
+            return None
+        checkpoint = cls(path, {})
+        checkpoint._file = handle
+        if not checkpoint._lock():
+            handle.close()
+            return None
+
+        handle.seek(0)
+        header = None
+        results = []
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Yiqilish paytida chala yozilgan qator
+                continue
+            if header is None:
+                header = record
+            else:
+                results.append(record)
+        if not isinstance(header, dict) or "job_id" not in header or "domains" not in header:
+            logger.error(f"Invalid checkpoint {path}")
+            handle.close()
+            return None
+        if handle.tell() and not cls._ends_with_newline(path):
+            # Chala qatordan keyingi yozuvlar yangi qatordan boshlanishi kerak
+            handle.write("\n")
+        checkpoint.header = header
+        checkpoint.results = results
+        return checkpoint
+
+    @staticmethod
+    def _ends_with_newline(path: str) -> bool:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _lock(self) -> bool:
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def append(self, result: Dict[str, Any]) -> None:
+        """Tugagan natijani qo'shish (buferlanadi, CHECKPOINT_FLUSH_* bo'yicha diskka yoziladi)"""
+        if self._file is None:
+            return
+        self._file.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self._pending += 1
+        if (self._pending >= CHECKPOINT_FLUSH_SIZE
+                or time.monotonic() - self._last_flush >= CHECKPOINT_FLUSH_INTERVAL):
+            self._sync()
+
+    def close(self) -> None:
+        if self._file is not None:
+            try:
+                self._sync()
+            finally:
+                self._file.close()
+                self._file = None
+
+    def remove(self) -> None:
+        """Vazifa tugadi (hisobot yozildi yoki bekor qilindi) - nazorat nuqtasi kerak emas"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Could not remove checkpoint {self.path}: {str(e)}")
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def claim_pending_checkpoints(folder: str) -> List[JobCheckpoint]:
+    """Papkadagi tugallanmagan (egasi yo'q) vazifalarning nazorat nuqtalarini olish"""
+    if not folder or not os.path.isdir(folder):
+        return []
+    claimed = []
+    for name in sorted(os.listdir(folder)):
+        if not name.endswith(CHECKPOINT_EXTENSION):
+            continue
+        checkpoint = JobCheckpoint.claim(os.path.join(folder, name))
+        if checkpoint is not None:
+            claimed.append(checkpoint)
+    return claimed
+
@@ -0,0 +1,193 @@
+import logging
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, NamedTuple, Optional, Tuple
+
+from utils.metrics import PROBE_PHASE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Bosqichlar: DNS, TCP ulanish, TLS, birinchi bayt (javob sarlavhalari)
+PHASES = ("dns", "connect", "tls", "first_byte")
+
+# Bosqich budjeti = kuzatilgan kechikishlar persentili * ko'paytuvchi, [floor, ceiling] oralig'ida
+DEADLINE_PERCENTILE = float(os.environ.get('DEADLINE_PERCENTILE', 0.99))
+DEADLINE_MULTIPLIER = float(os.environ.get('DEADLINE_MULTIPLIER', 3.0))
+DEADLINE_WINDOW = 500  # Har bir bosqich uchun oxirgi shuncha o'lchov
+DEADLINE_MIN_SAMPLES = 20  # Bundan kam o'lchovda standart budjet ishlatiladi
+PHASE_DEFAULTS = {"dns": 1.5, "connect": 1.5, "tls": 1.5, "first_byte": 5.0}  # sekund (avvalgi qat'iy qiymatlar)
+PHASE_FLOORS = {"dns": 0.3, "connect": 0.3, "tls": 0.5, "first_byte": 1.0}
+PHASE_CEILINGS = {"dns": 3.0, "connect": 5.0, "tls": 5.0, "first_byte": 15.0}
+
+# Vazifa muddati yaqinlashganda budjetlarni qisqartirish
+DEADLINE_SAFETY = 0.9  # Qolgan vaqtning shu ulushida tugatishga harakat qilinadi
+DEADLINE_MIN_SCALE = 0.25  # Budjetlar bundan ortiq qisqartirilmaydi (floor baribir saqlanadi)
+DEADLINE_RATE_WINDOW = 200  # Tezlik oxirgi shuncha tugagan domen bo'yicha o'lchanadi
+
+# httpcore trace hodisalari -> bosqich
+TRACE_PHASES = {
+    "connection.connect_tcp": "connect",
+    "connection.start_tls": "tls",
+    "http11.receive_response_headers": "first_byte",
+    "http2.receive_response_headers": "first_byte",
+}
+
+
+class PhaseBudgets(NamedTuple):
+    """Bitta domen (urinish) uchun bosqichlar budjeti, sekund"""
+    dns: float
+    connect: float
+    tls: float
+    first_byte: float
+
+
+class JobProgress(NamedTuple):
+    """
+    Shardlar yoki tugunlarga bo'lingan vazifaning umumiy holati: total - butun vazifadagi
+    domenlar, completed() - barcha bo'laklarda tugaganlari (umumiy hisoblagich)
+    """
+    total: int
+    completed: Callable[[], int]
+
+
+def percentile(values, fraction: float) -> float:
+    """Nearest-rank persentil"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class DeadlineManager:
+    """
+    Vazifa doirasidagi moslashuvchan timeout'lar. Har bir bosqich budjeti shu
+    vazifada kuzatilgan kechikishlardan (pXX * k, floor/ceiling bilan) hisoblanadi:
+    sekin tarmoqda soxta "Timeout" kamayadi, tezida o'lik hostlar kamroq vaqt oladi.
+    deadline (time.time() bo'yicha) berilsa va hozirgi tezlikda qolgan domenlar
+    undan oldin tugamasa, budjetlar qisqartiriladi va qayta urinishlar to'xtatiladi.
+    job berilsa (vazifa shardlar/tugunlarga bo'lingan), qolgan domenlar va tezlik
+    faqat shu bo'lakniki emas, butun vazifaniki bo'yicha hisoblanadi.
+    """
+
+    def __init__(self, total: int, deadline: Optional[float] = None,
+                 clock: Callable[[], float] = time.time, job: Optional[JobProgress] = None):
+        self.total = total
+        self.deadline = deadline
+        self.clock = clock
+        self.job = job
+        self.completed = 0
+        self._samples: Dict[str, Deque[float]] = {phase: deque(maxlen=DEADLINE_WINDOW) for phase in PHASES}
+        self._base: Dict[str, float] = dict(PHASE_DEFAULTS)
+        self._dirty = set()
+        # (vaqt, tugaganlar soni) - job bo'lsa butun vazifa bo'yicha
+        self._finished_at: Deque[Tuple[float, int]] = deque(maxlen=DEADLINE_RATE_WINDOW)
+        self._started_at = clock()
+
+    def observe(self, phase: str, seconds: float) -> None:
+        """Bosqich kechikishini yozish (/metrics histogrammasiga ham)"""
+        PROBE_PHASE_SECONDS.observe(seconds, phase=phase)
+        self._samples[phase].append(seconds)
+        self._dirty.add(phase)
+
+    def domain_done(self) -> None:
+        self.completed += 1
+        self._finished_at.append((self.clock(), self._progress()[1]))
+
+    def _progress(self) -> Tuple[int, int]:
+        """(jami, tugagan) - job berilsa butun vazifa bo'yicha"""
+        if self.job is None:
+            return self.total, self.completed
+        return self.job.total, self.job.completed()
+
+    def _base_budget(self, phase: str) -> float:
+        if phase in self._dirty:
+            self._dirty.discard(phase)
+            samples = self._samples[phase]
+            if len(samples) >= DEADLINE_MIN_SAMPLES:
+                budget = percentile(samples, DEADLINE_PERCENTILE) * DEADLINE_MULTIPLIER
+                self._base[phase] = min(max(budget, PHASE_FLOORS[phase]), PHASE_CEILINGS[phase])
+        return self._base[phase]
+
+    def remaining_time(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return self.deadline - self.clock()
+
+    def pressure(self) -> float:
+        """
+        Budjetlar ko'paytuvchisi: 1.0 - muddatga ulguriladi, kichigi - qolgan domenlar
+        hozirgi tezlikda muddatdan keyin tugaydi (DEADLINE_MIN_SCALE gacha).
+        """
+        remaining_time = self.remaining_time()
+        if remaining_time is None:
+            return 1.0
+        if remaining_time <= 0:
+            return DEADLINE_MIN_SCALE
+        if len(self._finished_at) < 2:
+            return 1.0
+
+        first_at, first_done = self._finished_at[0]
+        last_at, last_done = self._finished_at[-1]
+        window = last_at - first_at
+        if len(self._finished_at) < DEADLINE_RATE_WINDOW:
+            # Boshlanishdan beri o'rtacha tezlik (birinchi natijalar kelguncha ketgan vaqt bilan)
+            window = last_at - self._started_at
+        if window <= 0:
+            return 1.0
+        rate = (last_done - first_done) / window
+        total, completed = self._progress()
+        needed = max(0, total - completed) / rate if rate > 0 else math.inf
+        available = remaining_time * DEADLINE_SAFETY
+        if needed <= available:
+            return 1.0
+        return max(DEADLINE_MIN_SCALE, available / needed)
+
+    def budgets(self) -> PhaseBudgets:
+        scale = self.pressure()
+        remaining_time = self.remaining_time()
+        values = []
+        for phase in PHASES:
+            budget = max(self._base_budget(phase) * scale, PHASE_FLOORS[phase])
+            if remaining_time is not None:
+                # Muddatdan oshib ketadigan kutishning ma'nosi yo'q
+                budget = min(budget, max(remaining_time, PHASE_FLOORS[phase]))
+            values.append(budget)
+        return PhaseBudgets(*values)
+
+    def dns_timeouts(self) -> Tuple[float, ...]:
+        """Resolver urinishlari: budjet, keyin ikki barobari (ceiling gacha); bosim ostida bitta urinish"""
+        budget = self.budgets().dns
+        if self.pressure() < 1.0:
+            return (budget,)
+        return budget, min(budget * 2, PHASE_CEILINGS["dns"])
+
+    def allow_retry(self) -> bool:
+        """Muddatga ulgurilmayotgan bo'lsa timeout'dan keyin qayta urinilmaydi"""
+        return self.pressure() >= 1.0
+
+    def tracer(self) -> Callable[[str, Dict[str, Any]], Any]:
+        """httpx so'rovi uchun trace extension: TCP, TLS va birinchi bayt kechikishlarini yozadi"""
+        started: Dict[str, float] = {}
+
+        async def trace(event: str, info: Dict[str, Any]) -> None:
+            name, _, stage = event.rpartition(".")
+            phase = TRACE_PHASES.get(name)
+            if phase is None:
+                return
+            if stage == "started":
+                started[phase] = time.monotonic()
+            elif stage == "complete":
+                if phase in started:
+                    self.observe(phase, time.monotonic() - started.pop(phase))
+            else:
+                # failed - timeout'lar o'lchov emas (kechikish budjetdan katta ekani ma'lum)
+                started.pop(phase, None)
+
+        return trace
+
+    def describe(self) -> str:
+        budgets = self.budgets()
+        return ", ".join(
+            f"{phase}={getattr(budgets, phase):.2f}s ({len(self._samples[phase])} samples)" for phase in PHASES
+        )
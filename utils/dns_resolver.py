@@ -0,0 +1,332 @@
+import abc
+import asyncio
+import ipaddress
+import logging
+import os
+import random
+import socket
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from utils.cache import TTLCache
+from utils.deadlines import DeadlineManager
+
+logger = logging.getLogger(__name__)
+
+# DNS sozlamalari
+DNS_TIMEOUT = 1.5  # sekund, birinchi urinish
+DNS_RETRY_TIMEOUT = 3.0  # sekund, ikkinchi urinish
+DNS_CACHE_SIZE = 5000
+DNS_DEFAULT_TTL = 300  # TTL ma'lum bo'lmaganda (thread-pool backend)
+DNS_MIN_TTL = 30
+DNS_MAX_TTL = 3600
+DNS_NEGATIVE_TTL = 300  # NXDOMAIN / NODATA javoblari uchun yuqori chegara
+DNS_FAILURE_TTL = 30  # Timeout va SERVFAIL kabi vaqtinchalik xatolar uchun
+DNS_THREADS = int(os.environ.get('DNS_THREADS', 32))
+
+# Backend tanlash: "thread" yoki "stub"
+DNS_RESOLVER_BACKEND = os.environ.get('DNS_RESOLVER', 'thread')
+DNS_NAMESERVER = os.environ.get('DNS_NAMESERVER')  # masalan "1.1.1.1" yoki "127.0.0.1:5353"
+
+# DNS record turlari
+QTYPE_A = 1
+QTYPE_CNAME = 5
+QTYPE_SOA = 6
+QTYPE_AAAA = 28
+
+RCODE_NOERROR = 0
+RCODE_NXDOMAIN = 3
+
+
+# Barcha vazifalar uchun umumiy DNS keshi
+dns_cache = TTLCache(DNS_CACHE_SIZE, name="dns", shared=True)
+
+# Bloklovchi getaddrinfo chaqiruvlari uchun umumiy thread pool
+_resolver_executor = ThreadPoolExecutor(max_workers=DNS_THREADS, thread_name_prefix="dns")
+
+
+class BaseResolver(abc.ABC):
+    """
+    Asinxron resolver asosi. Bitta vazifa (job) doirasida har bir host faqat
+    bir marta so'raladi: parallel so'rovlar bitta lookup'ni kutadi. Lookup alohida
+    task'da ishlaydi - kutayotganlardan biri bekor qilinsa, qolganlari natijani oladi.
+    Bo'sh ro'yxat - domen resolve bo'lmadi degani.
+    """
+
+    def __init__(self, cache: Optional[TTLCache] = None, negative_ttl: float = DNS_NEGATIVE_TTL):
+        self.cache = cache if cache is not None else dns_cache
+        self.negative_ttl = negative_ttl
+        # Berilsa, urinishlar timeout'i vazifadagi kechikishlardan olinadi va lookup'lar o'lchanadi
+        self.deadlines: Optional[DeadlineManager] = None
+        self._resolved: Dict[str, List[str]] = {}
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    async def resolve(self, host: str) -> List[str]:
+        host = host.strip().lower().rstrip('.')
+        if not host:
+            return []
+
+        # IP manzil bo'lsa, DNS kerak emas
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+
+        if host in self._resolved:
+            return self._resolved[host]
+
+        cached = await self.cache.aget(host)
+        if cached is not None:
+            self._resolved[host] = cached
+            return cached
+
+        pending = self._pending.get(host)
+        if pending is None:
+            pending = asyncio.get_running_loop().create_task(self._resolve_with_retry(host))
+            self._pending[host] = pending
+            pending.add_done_callback(lambda task: self._forget(host, task))
+        # shield: kutayotgan task bekor qilinsa ham umumiy lookup davom etadi
+        return await asyncio.shield(pending)
+
+    def _forget(self, host: str, task: asyncio.Task) -> None:
+        if self._pending.get(host) is task:
+            del self._pending[host]
+
+    def close(self) -> None:
+        """Vazifa tugaganda (yoki bekor qilinganda) tugallanmagan lookup'larni to'xtatish"""
+        for task in list(self._pending.values()):
+            task.cancel()
+        self._pending.clear()
+
+    async def _resolve_with_retry(self, host: str) -> List[str]:
+        timeouts = (DNS_TIMEOUT, DNS_RETRY_TIMEOUT) if self.deadlines is None else self.deadlines.dns_timeouts()
+        for timeout in timeouts:
+            started = time.monotonic()
+            try:
+                addresses, ttl = await asyncio.wait_for(self._lookup(host), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.debug(f"DNS timeout for {host} after {timeout}s")
+                continue
+            except Exception as e:
+                logger.debug(f"DNS error for {host}: {str(e)}")
+                continue
+
+            if self.deadlines is not None:
+                self.deadlines.observe("dns", time.monotonic() - started)
+            if addresses:
+                ttl = DNS_DEFAULT_TTL if ttl is None else min(max(ttl, DNS_MIN_TTL), DNS_MAX_TTL)
+            else:
+                # Salbiy javob: SOA TTL ma'lum bo'lsa ham, chegaradan oshmaydi
+                ttl = self.negative_ttl if ttl is None else min(ttl, self.negative_ttl)
+            self._store(host, addresses, ttl)
+            return addresses
+
+        # Ikkala urinish ham muvaffaqiyatsiz - qisqa muddatga salbiy natija
+        self._store(host, [], min(DNS_FAILURE_TTL, self.negative_ttl))
+        return []
+
+    def _store(self, host: str, addresses: List[str], ttl: float) -> None:
+        self._resolved[host] = addresses
+        if ttl > 0:
+            self.cache.set(host, addresses, ttl)
+
+    @abc.abstractmethod
+    async def _lookup(self, host: str) -> Tuple[List[str], Optional[float]]:
+        """(manzillar, TTL) qaytaradi. TTL noma'lum bo'lsa None."""
+
+
+class ThreadPoolResolver(BaseResolver):
+    """Tizim resolver'i (getaddrinfo) - thread pool'da, event loop'ni bloklamasdan"""
+
+    def __init__(self, cache: Optional[TTLCache] = None, negative_ttl: float = DNS_NEGATIVE_TTL,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        super().__init__(cache, negative_ttl)
+        self.executor = executor or _resolver_executor
+
+    async def _lookup(self, host: str) -> Tuple[List[str], Optional[float]]:
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await loop.run_in_executor(
+                self.executor, socket.getaddrinfo, host, None, 0, socket.SOCK_STREAM
+            )
+        except socket.gaierror as e:
+            if e.errno in (socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME)):
+                return [], None
+            raise
+
+        addresses = []
+        for info in infos:
+            address = info[4][0]
+            if address not in addresses:
+                addresses.append(address)
+        return addresses, None
+
+
+def _encode_query(query_id: int, host: str, qtype: int) -> bytes:
+    header = struct.pack('!HHHHHH', query_id, 0x0100, 1, 0, 0, 0)  # RD=1
+    labels = b''.join(
+        bytes([len(label)]) + label for label in (part.encode('idna') for part in host.split('.')) if label
+    )
+    return header + labels + b'\x00' + struct.pack('!HH', qtype, 1)
+
+
+def _skip_name(data: bytes, offset: int) -> int:
+    while True:
+        length = data[offset]
+        if length == 0:
+            return offset + 1
+        if length & 0xC0 == 0xC0:
+            return offset + 2
+        offset += length + 1
+
+
+def _parse_response(data: bytes, query_id: int) -> Tuple[int, bool, List[Tuple[int, int, bytes]], Optional[int]]:
+    """(rcode, truncated, [(type, ttl, rdata)], SOA minimum TTL) qaytaradi"""
+    if len(data) < 12:
+        raise ValueError("Short DNS response")
+    rid, flags, qdcount, ancount, nscount, _ = struct.unpack('!HHHHHH', data[:12])
+    if rid != query_id:
+        raise ValueError("DNS response ID mismatch")
+
+    rcode = flags & 0x000F
+    truncated = bool(flags & 0x0200)
+    offset = 12
+    for _ in range(qdcount):
+        offset = _skip_name(data, offset) + 4
+
+    answers = []
+    soa_ttl = None
+    for index in range(ancount + nscount):
+        offset = _skip_name(data, offset)
+        rtype, _, ttl, rdlength = struct.unpack('!HHIH', data[offset:offset + 10])
+        offset += 10
+        rdata = data[offset:offset + rdlength]
+        offset += rdlength
+        if index < ancount:
+            answers.append((rtype, ttl, rdata))
+        elif rtype == QTYPE_SOA:
+            # RFC 2308: salbiy TTL = min(SOA TTL, SOA MINIMUM)
+            minimum = struct.unpack('!I', rdata[-4:])[0] if len(rdata) >= 4 else ttl
+            soa_ttl = min(ttl, minimum)
+    return rcode, truncated, answers, soa_ttl
+
+
+def _default_nameserver() -> Tuple[str, int]:
+    try:
+        with open('/etc/resolv.conf') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == 'nameserver':
+                    return parts[1], 53
+    except OSError:
+        pass
+    return '8.8.8.8', 53
+
+
+def parse_nameserver(value: Optional[str]) -> Tuple[str, int]:
+    """"host" yoki "host:port" ko'rinishidagi nameserver manzilini ajratish"""
+    if not value:
+        return _default_nameserver()
+    if value.count(':') == 1:
+        host, port = value.split(':')
+        return host, int(port)
+    return value, 53
+
+
+class _UDPQueryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+
+    def datagram_received(self, data, addr):
+        if not self.future.done():
+            self.future.set_result(data)
+
+    def error_received(self, exc):
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+class StubResolver(BaseResolver):
+    """
+    Sozlanadigan nameserver'ga to'g'ridan-to'g'ri UDP so'rov yuboradigan stub resolver.
+    Record TTL'larini hisobga oladi; kesilgan (TC) javoblar uchun TCP ishlatiladi.
+    """
+
+    def __init__(self, nameserver: Optional[str] = None, cache: Optional[TTLCache] = None,
+                 negative_ttl: float = DNS_NEGATIVE_TTL):
+        super().__init__(cache, negative_ttl)
+        self.nameserver = parse_nameserver(nameserver or DNS_NAMESERVER)
+
+    async def _lookup(self, host: str) -> Tuple[List[str], Optional[float]]:
+        addresses, ttl, rcode = await self._query(host, QTYPE_A)
+        if addresses or rcode == RCODE_NXDOMAIN:
+            return addresses, ttl
+        # A yozuvi yo'q - faqat IPv6 bo'lgan hostlar uchun AAAA
+        return (await self._query(host, QTYPE_AAAA))[:2]
+
+    async def _query(self, host: str, qtype: int) -> Tuple[List[str], Optional[float], int]:
+        query_id = random.randint(0, 0xFFFF)
+        query = _encode_query(query_id, host, qtype)
+        data = await self._send_udp(query)
+        rcode, truncated, answers, soa_ttl = _parse_response(data, query_id)
+        if truncated:
+            data = await self._send_tcp(query)
+            rcode, _, answers, soa_ttl = _parse_response(data, query_id)
+
+        if rcode not in (RCODE_NOERROR, RCODE_NXDOMAIN):
+            raise RuntimeError(f"DNS server returned rcode {rcode} for {host}")
+
+        addresses = []
+        ttls = []
+        for rtype, ttl, rdata in answers:
+            if rtype == QTYPE_A and len(rdata) == 4:
+                addresses.append(socket.inet_ntop(socket.AF_INET, rdata))
+            elif rtype == QTYPE_AAAA and len(rdata) == 16:
+                addresses.append(socket.inet_ntop(socket.AF_INET6, rdata))
+            else:
+                continue
+            ttls.append(ttl)
+
+        if addresses:
+            return addresses, min(ttls), rcode
+        return [], soa_ttl, rcode
+
+    async def _send_udp(self, query: bytes) -> bytes:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UDPQueryProtocol(future), remote_addr=self.nameserver
+        )
+        try:
+            transport.sendto(query)
+            return await future
+        finally:
+            transport.close()
+
+    async def _send_tcp(self, query: bytes) -> bytes:
+        reader, writer = await asyncio.open_connection(*self.nameserver)
+        try:
+            writer.write(struct.pack('!H', len(query)) + query)
+            await writer.drain()
+            length = struct.unpack('!H', await reader.readexactly(2))[0]
+            return await reader.readexactly(length)
+        finally:
+            writer.close()
+
+
+def create_resolver(backend: Optional[str] = None, nameserver: Optional[str] = None,
+                    cache: Optional[TTLCache] = None,
+                    deadlines: Optional[DeadlineManager] = None) -> BaseResolver:
+    """Sozlamaga ko'ra resolver yaratish (har bir vazifa uchun yangi nusxa)"""
+    backend = (backend or DNS_RESOLVER_BACKEND).lower()
+    if backend == 'stub':
+        resolver: BaseResolver = StubResolver(nameserver=nameserver, cache=cache)
+    else:
+        if backend != 'thread':
+            logger.warning(f"Unknown DNS resolver backend '{backend}', using thread pool")
+        resolver = ThreadPoolResolver(cache=cache)
+    resolver.deadlines = deadlines
+    return resolver
@@ -1,15 +1,26 @@
 import httpx
 import asyncio
-from bs4 import BeautifulSoup
 import logging
-import re
-from typing import List, Dict, Any, Set, Tuple
+from typing import List, Dict, Any, Optional, Callable, Tuple, Union
+import os
 import time
-from concurrent.futures import ThreadPoolExecutor
-import socket
-import random
-from urllib.parse import urlparse
-import tldextract
+from contextlib import asynccontextmanager
+from itertools import zip_longest
+from utils.cache import TTLCache
+from utils.deadlines import DeadlineManager, JobProgress
+from utils.file_reader import DomainRecord, normalize_domains
+from utils.dns_resolver import BaseResolver, create_resolver
+from utils.rate_limiter import PolitenessLimiter
+from utils.html_extractor import parse_page
+from utils.metrics import (
+    HTTP_RESPONSES_TOTAL, PROBE_PHASE_SECONDS, PROBE_RETRIES_TOTAL, PROBE_SECONDS, PROBES_IN_FLIGHT, PROBES_TOTAL,
+    RESULT_STORE_LOOKUPS_TOTAL
+)
+from utils.parse_pool import ParseExecutor, parse_executor, PARSE_POOL_ENABLED
+from utils.result_store import ResultStore, get_result_store, normalize_key
+from utils.scheduler import (
+    AdaptiveLimiter, RatePacer, run_work_queue, OUTCOME_OK, OUTCOME_TIMEOUT, OUTCOME_ERROR
+)
 
 # Yaxshiroq logging
 logging.basicConfig(
@@ -22,56 +33,48 @@ logger = logging.getLogger(__name__)
 REQUEST_TIMEOUT = 5  # sekund (increased from 3)
 MAX_RETRIES = 2  # Increased from 1
 RETRY_DELAY = 1.0  # sekund (increased from 0.3)
-MAX_BATCH_SIZE = 3  # Reduced from 5 for more thorough checking
-MAX_CONNECTIONS = 10  # Reduced from 20 for more reliable connections
-RATE_LIMIT = 20  # Reduced from 30 for better rate limiting
-TIMEOUT_COOLDOWN = 30  # Increased from 15
-DNS_CACHE_SIZE = 500  # Reduced from 1000 for more frequent fresh checks
 CONNECTION_KEEP_ALIVE = 20  # Increased from 10
 
-# DNS keshini yaratish - with size limits
-dns_cache = {}
-domain_health_cache = {}  # Domain sog'liqi keshi
+# Parallellik sozlamalari - AIMD limiti shu oraliqda o'zgaradi (muhit o'zgaruvchilari orqali sozlanadi)
+MIN_CONCURRENCY = int(os.environ.get('CHECK_MIN_CONCURRENCY', 8))
+MAX_CONCURRENCY = int(os.environ.get('CHECK_MAX_CONCURRENCY', 128))
+INITIAL_CONCURRENCY = int(os.environ.get('CHECK_INITIAL_CONCURRENCY', 32))
+RATE_LIMIT = float(os.environ.get('CHECK_RATE_LIMIT', 50))  # Sekundiga yangi tekshiruvlar soni (0 - cheklovsiz)
+MAX_CONNECTIONS = MAX_CONCURRENCY  # Connection pool parallellikdan kichik bo'lmasligi kerak
+# Bitta event loop'da bir vazifada tekshiriladigan domenlar chegarasi (ko'prog'i - utils.sharding)
+MAX_DOMAINS_PER_LOOP = int(os.environ.get('CHECK_MAX_DOMAINS', 1000))
 
+# HTTP/2 rejimi (vazifa bo'yicha yoqiladi; bu - standart qiymat). Bir origin'ga so'rovlar
+# bitta ulanishda multiplekslanadi; muzokara buzilgan hostlar HTTP/1.1 ga o'tkaziladi
+HTTP2_ENABLED = os.environ.get('CHECK_HTTP2', '0').lower() in ('1', 'true', 'yes')
 
-# Faster DNS lookup with caching
-def cached_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
-    """DNS lookup with caching for faster resolution"""
-    # Quick return for known bad domains
-    if host in domain_health_cache and domain_health_cache[host] == "poor":
-        return None
+# Javob tanasini o'qish chegaralari - faqat sarlavha va sahifa turi uchun kerakli qism o'qiladi
+BODY_READ_LIMIT = int(os.environ.get('BODY_READ_LIMIT', 100000))  # bayt
+HEAD_TAIL_BYTES = int(os.environ.get('HEAD_TAIL_BYTES', 16384))  # </head> dan keyin body boshidan shuncha bayt
+
+RESULT_STORE_FLUSH_SIZE = 50  # Natijalar omboriga shuncha natijadan keyin yoziladi
+
+# Domen sog'liqi keshi - "poor" belgisi qisqa muddat saqlanadi, vaqtinchalik xato abadiy qolmasin
+HEALTH_CACHE_SIZE = 10000
+HEALTH_GOOD_TTL = 3600  # sekund
+HEALTH_POOR_TTL = int(os.environ.get('HEALTH_POOR_TTL', 300))  # sekund
+domain_health_cache = TTLCache(HEALTH_CACHE_SIZE, name="domain_health", shared=True)
+
+
+def mark_domain_health(domain_key: str, health: str) -> None:
+    """Domen sog'lig'ini TTL bilan belgilash ("good" yoki "poor")"""
+    domain_health_cache.set(domain_key, health, HEALTH_POOR_TTL if health == "poor" else HEALTH_GOOD_TTL)
+
+
+# HTTPS/HTTP poygasi - HTTPS bosh startdan keyin ham javob bermasa, HTTP parallel boshlanadi
+HTTP_HEAD_START = float(os.environ.get('HTTP_HEAD_START', 0.3))  # sekund (0 - ikkalasi birdan)
+# Shu kodlar "yaxshi javob" hisoblanmaydi - boshqa protokol natijasi kutiladi
+SCHEME_FALLBACK_STATUS_CODES = {400, 403, 404, 500, 502, 503, 504}
+# Qaysi protokol ishlagani host bo'yicha eslab qolinadi
+SCHEME_CACHE_SIZE = 10000
+SCHEME_CACHE_TTL = 3600  # sekund
+scheme_cache = TTLCache(SCHEME_CACHE_SIZE, default_ttl=SCHEME_CACHE_TTL, name="scheme", shared=True)
 
-    if host in dns_cache:
-        return dns_cache[host]
-    else:
-        try:
-            # Use a shorter timeout for DNS lookups
-            socket.setdefaulttimeout(1.5)
-            result = socket.getaddrinfo(host, port, family, type, proto, flags)
-            dns_cache[host] = result
-
-            # Cache size limit with periodic cleanup to avoid memory issues
-            if len(dns_cache) > DNS_CACHE_SIZE:
-                # Random eviction policy - more aggressive cleanup
-                keys_to_remove = random.sample(list(dns_cache.keys()), DNS_CACHE_SIZE // 5)
-                for key in keys_to_remove:
-                    dns_cache.pop(key, None)
-            return result
-        except socket.gaierror:
-            # DNS resolution failed - mark as poor health
-            domain_health_cache[host] = "poor"
-            return None
-        except socket.timeout:
-            # DNS timeout - also mark as poor health
-            domain_health_cache[host] = "poor"
-            return None
-
-
-# Pre-built lists for faster classification - minimized for speed
-login_keywords = {
-    'login', 'signin', 'sign in', 'log in', 'auth', 'authenticate',
-    'register', 'kirish', 'parol'
-}
 
 # Headers for requests to look more like a real browser
 BROWSER_HEADERS = {
@@ -85,9 +88,40 @@ BROWSER_HEADERS = {
 NEED_CHECK_STATUS_CODES = {400, 403, 429, 503}
 
 
-async def check_domain(client: httpx.AsyncClient, domain: str, timeout: float = REQUEST_TIMEOUT) -> Dict[str, Any]:
+async def read_body_prefix(response: httpx.Response, limit: int = BODY_READ_LIMIT,
+                           head_tail: int = HEAD_TAIL_BYTES) -> bytes:
+    """
+    Javob tanasini oqim sifatida o'qish: </head> topilgandan keyin body boshidan
+    head_tail bayt (h1, parol maydoni va login so'zlari uchun) yoki jami limit
+    baytga yetganda to'xtaydi. Qolgan qism yuklab olinmaydi.
+    """
+    buffer = bytearray()
+    head_end = None
+    async for chunk in response.aiter_bytes():
+        search_from = max(0, len(buffer) - 6)
+        buffer += chunk
+        if head_end is None:
+            index = buffer[search_from:].lower().find(b'</head>')
+            if index != -1:
+                head_end = search_from + index
+        if len(buffer) >= limit or (head_end is not None and len(buffer) >= head_end + head_tail):
+            break
+    return bytes(buffer[:limit])
+
+
+async def check_domain(client: Union[httpx.AsyncClient, "HTTP2FallbackClient"], domain: str, timeout: float = REQUEST_TIMEOUT,
+                       resolver: Optional[BaseResolver] = None,
+                       politeness: Optional[PolitenessLimiter] = None,
+                       parser: Optional[ParseExecutor] = None,
+                       record: Optional[DomainRecord] = None,
+                       deadlines: Optional[DeadlineManager] = None) -> Dict[str, Any]:
     """
     Domenni tekshirish va uning holati, turi va sarlavhasini qaytarish.
+    politeness berilsa, so'rovlar registrable domen va IP bo'yicha cheklanadi.
+    parser berilsa, HTML tahlili jarayonlar pool'ida bajariladi.
+    record - normalize_domains natijasi (berilmasa, domen shu yerda normallashtiriladi).
+    deadlines berilsa, har bir urinishning ulanish/TLS/birinchi bayt timeout'lari undan
+    olinadi (timeout o'rniga) va kechikishlar unga yoziladi.
     """
     # Default result for quick returns
     result = {
@@ -99,59 +133,44 @@ async def check_domain(client: httpx.AsyncClient, domain: str, timeout: float =
     }
 
     # Domain formatini tekshirish va to'g'rilash
-    domain = domain.strip().lower()
-    if not domain:
-        return result
+    if record is None:
+        records = normalize_domains([domain])
+        if not records:
+            result["title"] = "Invalid domain format"
+            return result
+        record = records[0]
+    domain = record.domain
 
     # Quick optimization - reject obviously invalid domains early
-    if len(domain) > 255 or ' ' in domain:
+    if len(domain) > 255:
         result["title"] = "Invalid domain format"
         return result
 
-    # Domain malumoti (TLD va h.k.)
-    try:
-        domain_info = tldextract.extract(domain)
-        domain_key = f"{domain_info.domain}.{domain_info.suffix}"
-
-        # Skip domains that don't have a proper TLD
-        if not domain_info.suffix:
-            result["title"] = "Invalid domain (no TLD)"
-            return result
-    except:
-        # If tldextract fails, just use the domain as is
-        domain_key = domain
+    # Skip domains that don't have a proper TLD
+    if not record.suffix:
+        result["title"] = "Invalid domain (no TLD)"
+        return result
+    domain_key = record.registrable
 
     # Cached health check - if we've already marked this domain or its root as unreliable
-    if domain_key in domain_health_cache and domain_health_cache[domain_key] == "poor":
+    if await domain_health_cache.aget(domain_key) == "poor":
         result["status"] = "Not Working"
         result["page_type"] = "Error"
         result["title"] = "Previously unreachable domain"
         return result
 
-    # HTTP va HTTPS protokollarini olib tashlash
-    domain = re.sub(r'^https?://', '', domain)
-    # Trailing slash va bo'sh joylarni olib tashlash
-    domain = domain.rstrip('/')
-
     # First try DNS resolution before even attempting HTTP requests
-    dns_resolved = False
+    # (async resolver - event loop bloklanmaydi, javoblar TTL bo'yicha keshlanadi)
+    host = domain  # record.domain da protokol va yo'l yo'q
+    if resolver is None:
+        resolver = create_resolver()
     try:
-        # Fast DNS lookup to fail early for non-existent domains
-        host = domain.split('/')[0]  # Only take the domain part
-        if cached_getaddrinfo(host, 80) is not None or cached_getaddrinfo(host, 443) is not None:
-            dns_resolved = True
+        addresses = await resolver.resolve(host)
     except Exception as dns_error:
-        # Log error but continue - some DNS servers might still resolve it
         logger.debug(f"DNS error for {domain}: {str(dns_error)}")
-
-    if not dns_resolved:
-        # Try one more time with a longer timeout
-        try:
-            socket.setdefaulttimeout(3.0)  # Longer timeout for second attempt
-            if cached_getaddrinfo(host, 80) is not None or cached_getaddrinfo(host, 443) is not None:
-                dns_resolved = True
-        except:
-            pass
+        addresses = []
+    dns_resolved = bool(addresses)
+    ip = addresses[0] if addresses else None
 
     if not dns_resolved:
         result["status"] = "Not Working"
@@ -159,42 +178,127 @@ async def check_domain(client: httpx.AsyncClient, domain: str, timeout: float =
         result["title"] = "DNS resolution failed"
         return result
 
+    backoff_delay = None
+
+    async def fetch(url: str) -> Tuple[httpx.Response, Optional[bytes]]:
+        """
+        So'rovni oqim rejimida yuborish. Tana faqat 200 HTML javob uchun, kerakli
+        qismigacha o'qiladi; ulanish darhol yopiladi yoki pool'ga qaytariladi.
+        """
+        nonlocal backoff_delay
+        body = None
+
+        async def send() -> httpx.Response:
+            nonlocal body
+            # Har bir so'rov uchun alohida tracer - parallel HTTPS/HTTP so'rovlari
+            # bosqich vaqtlarini bir-biriga aralashtirmaydi
+            extensions = {"trace": deadlines.tracer()} if deadlines is not None else {}
+            async with client.stream("GET", url, timeout=attempt_timeout, follow_redirects=True,
+                                     headers=BROWSER_HEADERS, extensions=extensions) as response:
+                content_type = response.headers.get("content-type", "").lower()
+                if response.status_code == 200 and "text/html" in content_type:
+                    started = time.monotonic()
+                    body = await read_body_prefix(response)
+                    PROBE_PHASE_SECONDS.observe(time.monotonic() - started, phase="body")
+            return response
+
+        if politeness is None:
+            return await send(), body
+        async with politeness.slot(domain_key, ip):
+            response = await send()
+        backoff_delay = politeness.feedback(domain_key, ip, response.status_code,
+                                            response.headers.get("retry-after"))
+        return response, body
+
+    async def race() -> Tuple[httpx.Response, Optional[bytes]]:
+        """
+        HTTPS va HTTP ni "happy eyeballs" usulida poyga qildirish: HTTPS birinchi
+        boshlanadi, HTTP_HEAD_START dan keyin (yoki HTTPS darhol yiqilsa) HTTP ham.
+        Birinchi yaxshi javob olinadi, qolgan so'rov bekor qilinadi. Ikkalasi ham
+        yaxshi bo'lmasa, HTTP javobi (avvalgi ketma-ket fallback kabi) qaytariladi.
+        """
+        cached_scheme = await scheme_cache.aget(host)
+        if cached_scheme is not None:
+            try:
+                response, body = await fetch(f"{cached_scheme}://{domain}")
+                if response.status_code not in SCHEME_FALLBACK_STATUS_CODES:
+                    return response, body
+            except httpx.TimeoutException:
+                # Sekin host - protokol xato emas: urinish sifatida hisoblanadi, kesh saqlanadi
+                raise
+            except httpx.RequestError:
+                pass
+            # Eslab qolingan protokol endi ishlamayapti - qaytadan poyga
+            scheme_cache.delete(host)
+
+        tasks = {asyncio.create_task(fetch(f"https://{domain}")): "https"}
+        responses: Dict[str, Tuple[httpx.Response, Optional[bytes]]] = {}
+        errors: Dict[str, BaseException] = {}
+        http_started = False
+        try:
+            while tasks:
+                if http_started:
+                    done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                else:
+                    done, _ = await asyncio.wait(tasks, timeout=HTTP_HEAD_START)
+
+                for task in done:
+                    scheme = tasks.pop(task)
+                    if task.exception() is not None:
+                        errors[scheme] = task.exception()
+                        continue
+                    response, body = task.result()
+                    if response.status_code not in SCHEME_FALLBACK_STATUS_CODES:
+                        scheme_cache.set(host, scheme)
+                        return response, body
+                    responses[scheme] = (response, body)
+
+                if not http_started:
+                    http_started = True
+                    tasks[asyncio.create_task(fetch(f"http://{domain}"))] = "http"
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        for scheme in ("http", "https"):
+            if scheme in responses:
+                return responses[scheme]
+        raise errors.get("https") or errors["http"]
+
+    attempt_timeout: Union[float, httpx.Timeout] = timeout
+
     # Domenni tekshirish
     for attempt in range(MAX_RETRIES + 1):
+        if deadlines is not None:
+            # Budjetlar har bir urinishda qayta olinadi - muddat yaqinlashsa qisqaradi
+            budgets = deadlines.budgets()
+            attempt_timeout = httpx.Timeout(budgets.first_byte, connect=max(budgets.connect, budgets.tls),
+                                            pool=timeout)
         try:
-            # Try HTTPS first
-            url = f"https://{domain}"
-            response = await client.get(
-                url,
-                timeout=timeout,
-                follow_redirects=True,
-                headers=BROWSER_HEADERS
-            )
+            backoff_delay = None
+            response, body = await race()
             result["status_code"] = response.status_code
 
-            # If HTTPS fails with certain status codes, try HTTP
-            if response.status_code in {400, 403, 404, 500, 502, 503, 504}:
-                url = f"http://{domain}"
-                response = await client.get(
-                    url,
-                    timeout=timeout,
-                    follow_redirects=True,
-                    headers=BROWSER_HEADERS
-                )
-                result["status_code"] = response.status_code
+            # 429 / Retry-After - limiter backoff qiladi, keyingi urinish navbatni kutadi
+            if backoff_delay is not None and attempt < MAX_RETRIES:
+                PROBE_RETRIES_TOTAL.inc(reason="rate_limited")
+                logger.info(f"Rate limited by {domain}, retry {attempt + 1}/{MAX_RETRIES}")
+                continue
 
             # Status logic - 2xx va 3xx kodlar "Working" hisoblanadi
             if 200 <= response.status_code < 400:
                 result["status"] = "Working"
                 # Mark domain as healthy
-                domain_health_cache[domain_key] = "good"
+                mark_domain_health(domain_key, "good")
             elif response.status_code in NEED_CHECK_STATUS_CODES:
                 result["status"] = "Need to Check"
             else:
                 result["status"] = "Not Working"
                 # For persistent server errors, mark domain as poor health
                 if response.status_code >= 500 and response.status_code not in NEED_CHECK_STATUS_CODES:
-                    domain_health_cache[domain_key] = "poor"
+                    mark_domain_health(domain_key, "poor")
 
             # Agar 200 bo'lmasa, parsing qilishga hojat yo'q
             if response.status_code != 200:
@@ -209,39 +313,15 @@ async def check_domain(client: httpx.AsyncClient, domain: str, timeout: float =
                 result["title"] = f"Type: {content_type[:50]}"
                 return result
 
-            # Optimize HTML parsing with lighter functionality - limit parsed content
+            # Sarlavha va sahifa turini aniqlash - xom baytlar ustida tezkor extractor,
+            # kerak bo'lsa BeautifulSoup zaxira yo'l sifatida
             try:
-                # Use a faster parsing method for title extraction - only parse first 100KB
-                content_to_parse = response.text[:100000] if len(response.text) > 100000 else response.text
-                soup = BeautifulSoup(content_to_parse, 'html.parser')
-
-                # Sarlavhani olish
-                title_tag = soup.title
-                if title_tag and title_tag.string:
-                    result["title"] = title_tag.string.strip()[:100]  # Limit title length
-                else:
-                    # Agar title yo'q bo'lsa, meta og:title yoki boshqa elementlarni tekshirish
-                    meta_title = soup.find('meta', property='og:title')
-                    if meta_title and meta_title.get('content'):
-                        result["title"] = meta_title.get('content')[:100]
-                    else:
-                        h1 = soup.find('h1')
-                        if h1 and h1.text:
-                            result["title"] = h1.text.strip()[:100]
-                        else:
-                            result["title"] = "No Title"
-
-                # Sahifa turini aniqlash - simplified approach
-                # Fast check for password inputs (strongest indicator)
-                if soup.find('input', {'type': 'password'}):
-                    result["page_type"] = "Internal"
+                started = time.monotonic()
+                if parser is not None:
+                    result["title"], result["page_type"] = await parser.parse(body or b'', response.encoding)
                 else:
-                    # Super quick check for login-related text
-                    page_text = soup.get_text()[:3000].lower()  # Only check first 3000 chars
-                    if any(keyword in page_text for keyword in login_keywords):
-                        result["page_type"] = "Internal"
-                    else:
-                        result["page_type"] = "External"
+                    result["title"], result["page_type"] = parse_page(body or b'', response.encoding)
+                PROBE_PHASE_SECONDS.observe(time.monotonic() - started, phase="parse")
 
             except Exception as e:
                 logger.error(f"HTML parse error for {domain}: {str(e)}")
@@ -254,9 +334,10 @@ async def check_domain(client: httpx.AsyncClient, domain: str, timeout: float =
             result["status_code"] = e.response.status_code
             result["status"] = "Need to Check" if result["status_code"] in NEED_CHECK_STATUS_CODES else "Not Working"
             if result["status_code"] >= 500 and result["status_code"] not in NEED_CHECK_STATUS_CODES:
-                domain_health_cache[domain_key] = "poor"
+                mark_domain_health(domain_key, "poor")
         except httpx.TimeoutException:
-            if attempt < MAX_RETRIES:
+            if attempt < MAX_RETRIES and (deadlines is None or deadlines.allow_retry()):
+                PROBE_RETRIES_TOTAL.inc(reason="timeout")
                 logger.warning(f"Timeout for {domain}, retry {attempt + 1}/{MAX_RETRIES}")
                 await asyncio.sleep(RETRY_DELAY)
                 continue
@@ -267,7 +348,7 @@ async def check_domain(client: httpx.AsyncClient, domain: str, timeout: float =
             result["status"] = "Not Working"
             result["page_type"] = "Error"
             result["title"] = f"Request Error"
-            domain_health_cache[domain_key] = "poor"
+            mark_domain_health(domain_key, "poor")
         except Exception as e:
             logger.error(f"Unexpected error checking {domain}: {str(e)}")
             result["status"] = "Not Working"
@@ -276,169 +357,305 @@ async def check_domain(client: httpx.AsyncClient, domain: str, timeout: float =
 
         # Qayta urinishlardagi xatoliklar uchun kichik kutish
         if attempt < MAX_RETRIES:
+            PROBE_RETRIES_TOTAL.inc(reason="error")
             await asyncio.sleep(RETRY_DELAY)
 
     return result
 
 
-async def process_batch(client: httpx.AsyncClient, domains: List[str]) -> List[Dict[str, Any]]:
-    """Domenlar guruhini parallel tekshirish"""
-    tasks = [check_domain(client, domain) for domain in domains]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+class HTTP2FallbackClient:
+    """
+    HTTP/2 klient, host bo'yicha HTTP/1.1 zaxirasi bilan. ALPN orqali h2 taklif
+    qilinadi (server qo'llamasa, httpx o'zi HTTP/1.1 ishlatadi); h2 ulanishida
+    protokol xatosi bo'lsa, host eslab qolinadi va so'rov HTTP/1.1 klientida
+    qaytariladi. check_domain uchun faqat stream() kerak.
+    """
 
-    # Xatoliklarni boshqarish
-    processed_results = []
-    for i, result in enumerate(results):
-        if isinstance(result, Exception):
-            logger.error(f"Error processing domain {domains[i]}: {str(result)}")
-            processed_results.append({
-                "domain": domains[i],
-                "status": "Need to Check",
-                "status_code": None,
-                "page_type": "Error",
-                "title": f"Error: {type(result).__name__}"
-            })
-        else:
-            processed_results.append(result)
+    def __init__(self, http2_client: httpx.AsyncClient, http1_client: httpx.AsyncClient):
+        self.http2_client = http2_client
+        self.http1_client = http1_client
+        self.http1_hosts = set()
+        self.fallbacks = 0  # HTTP/1.1 da qayta yuborilgan so'rovlar
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs):
+        host = httpx.URL(url).host
+        if host not in self.http1_hosts:
+            yielded = False
+            try:
+                async with self.http2_client.stream(method, url, **kwargs) as response:
+                    yielded = True
+                    yield response
+                return
+            except httpx.ProtocolError as e:
+                if yielded:
+                    raise
+                logger.info(f"HTTP/2 failed for {host}, falling back to HTTP/1.1: {str(e)}")
+                self.http1_hosts.add(host)
+                self.fallbacks += 1
 
-    return processed_results
+        async with self.http1_client.stream(method, url, **kwargs) as response:
+            yield response
 
+    async def aclose(self) -> None:
+        await self.http2_client.aclose()
+        await self.http1_client.aclose()
 
-# Improved batch organization prioritizing domain health
-def sort_domains_by_tld(domains: List[str]) -> List[List[str]]:
-    """Sort domains into groups by TLD for more efficient batch processing"""
-    tld_groups = {}
+    async def __aenter__(self) -> "HTTP2FallbackClient":
+        return self
 
-    for domain in domains:
-        clean_domain = domain.strip().lower()
-        clean_domain = re.sub(r'^https?://', '', clean_domain)
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+
+async def count_response(response: httpx.Response) -> None:
+    """httpx event hook: javoblar (redirect'lar ham) status sinfi bo'yicha /metrics ga"""
+    HTTP_RESPONSES_TOTAL.inc(code=f"{response.status_code // 100}xx")
 
-        try:
-            extract_result = tldextract.extract(clean_domain)
-            tld = extract_result.suffix
 
-            if not tld:
-                tld = "unknown"
+def create_http_client(http2: bool = False,
+                       verify: bool = True) -> Union[httpx.AsyncClient, HTTP2FallbackClient]:
+    """
+    Tekshiruvlar uchun HTTP klient. http2=True bo'lsa HTTP2FallbackClient qaytariladi -
+    bir origin'dagi ko'p so'rovlar (masalan bitta CDN ortidagi subdomenlar) kam ulanish ishlatadi.
+    """
+
+    def build(use_http2: bool) -> httpx.AsyncClient:
+        # Client limits settings
+        limits = httpx.Limits(
+            max_keepalive_connections=MAX_CONNECTIONS // 2,
+            max_connections=MAX_CONNECTIONS,
+            keepalive_expiry=CONNECTION_KEEP_ALIVE
+        )
+
+        # Asinxron HTTP klient yaratish - with reduced timeouts
+        timeout_config = httpx.Timeout(REQUEST_TIMEOUT, connect=1.5)
+
+        # Set up connection pool with relaxed settings
+        transport = httpx.AsyncHTTPTransport(
+            limits=limits,
+            retries=0,  # We handle our own retries
+            http2=use_http2,
+            verify=verify
+        )
+        return httpx.AsyncClient(
+            timeout=timeout_config,
+            transport=transport,
+            follow_redirects=True,
+            http2=use_http2,
+            verify=verify,
+            event_hooks={"response": [count_response]}
+        )
+
+    if not http2:
+        return build(False)
+    return HTTP2FallbackClient(build(True), build(False))
 
-            if tld not in tld_groups:
-                tld_groups[tld] = []
 
-            tld_groups[tld].append(domain)
-        except:
-            # Fall back to simple domain parsing if tldextract fails
-            if "unknown" not in tld_groups:
-                tld_groups["unknown"] = []
-            tld_groups["unknown"].append(domain)
+def error_result(domain: str, title: str) -> Dict[str, Any]:
+    """Tekshiruvning o'zi xatolik bilan tugaganda qaytariladigan natija"""
+    return {
+        "domain": domain,
+        "status": "Need to Check",
+        "status_code": None,
+        "page_type": "Error",
+        "title": title
+    }
 
-    # Create smaller batches for better performance
-    batches = []
-    for tld, domains in tld_groups.items():
-        for i in range(0, len(domains), MAX_BATCH_SIZE):
-            batch = domains[i:i + MAX_BATCH_SIZE]
-            batches.append(batch)
 
-    return batches
+def classify_outcome(result: Dict[str, Any]) -> str:
+    """Natijani AIMD limiteri uchun ok/timeout/error turiga ajratish"""
+    title = result.get("title")
+    if title == "Timeout":
+        return OUTCOME_TIMEOUT
+    if title in ("Request Error", "Error") or str(title).startswith("Error:"):
+        return OUTCOME_ERROR
+    return OUTCOME_OK
 
 
-async def check_domains(domains: List[str], batch_size: int = MAX_BATCH_SIZE) -> List[Dict[str, Any]]:
+def order_domains_for_scheduling(domains: List[str],
+                                 records: Optional[Dict[str, DomainRecord]] = None) -> List[str]:
     """
-    Domenlar ro'yxatini tekshirish va natijalarni qaytarish.
-    Katta ro'yxatlar uchun batching va rate limiting qo'llaniladi.
+    Domenlarni registrable domen bo'yicha navbatma-navbat joylashtirish,
+    shunda bitta saytning subdomenlari ketma-ket emas, tarqoq tekshiriladi.
+    records - domen -> DomainRecord (berilmasa, shu yerda normallashtiriladi).
     """
-    # Track processed domains to provide partial results on timeout
-    _domains_processed = []
+    if records is None:
+        records = {record.domain: record for record in normalize_domains(domains)}
+    groups: Dict[str, List[str]] = {}
 
-    # Store reference to partial results to allow for timeout recovery
-    check_domains._domains_processed = _domains_processed
+    for domain in domains:
+        record = records.get(domain)
+        key = record.registrable if record is not None else domain
+        groups.setdefault(key, []).append(domain)
+
+    ordered = []
+    for round_robin in zip_longest(*groups.values()):
+        ordered.extend(domain for domain in round_robin if domain is not None)
+    return ordered
+
+
+async def check_domains(domains: List[Union[str, DomainRecord]], concurrency: Optional[int] = None,
+                        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                        force_refresh: bool = False,
+                        result_store: Optional[ResultStore] = None,
+                        http2: Optional[bool] = None,
+                        collect_results: bool = True,
+                        max_domains: Optional[int] = MAX_DOMAINS_PER_LOOP,
+                        deadline: Optional[float] = None,
+                        job: Optional[JobProgress] = None) -> List[Dict[str, Any]]:
+    """
+    Domenlar ro'yxatini tekshirish va natijalarni qaytarish.
+    Workerlar navbatdagi domenni slot bo'shashi bilan oladi; parallellik limiti
+    timeout/xatolar ulushi va event loop kechikishiga qarab avtomatik o'zgaradi.
+
+    concurrency berilsa, u boshlang'ich limit sifatida ishlatiladi.
+    progress_callback har bir tekshirilgan domen natijasi bilan chaqiriladi
+    (masalan, fon vazifasining progressini yangilash uchun).
+    Natijalar ombori sozlangan bo'lsa, yangi natijalar darhol qaytariladi va
+    faqat topilmagan yoki eskirgan domenlar tekshiriladi (force_refresh - hammasini qayta tekshirish).
+    http2 - HTTP/2 rejimi (None bo'lsa CHECK_HTTP2 muhit o'zgaruvchisi bo'yicha).
+    collect_results=False - natijalar faqat progress_callback orqali uzatiladi va
+    xotirada yig'ilmaydi (jonli oqim uchun); bu holda bo'sh ro'yxat qaytadi.
+    domains - satrlar yoki tayyor DomainRecord'lar (shardlar uchun qayta normallashtirilmaydi).
+    max_domains - shundan ortig'i tashlanadi (None - cheklovsiz).
+    deadline - vazifa muddati (time.time() bo'yicha): DNS/ulanish/TLS/birinchi bayt
+    timeout'lari shu vazifadagi kechikishlardan hisoblanadi va muddat yaqinlashganda
+    qisqartiriladi (DeadlineManager). None bo'lsa ham budjetlar moslashadi.
+    job - bu chaqiruv katta vazifaning bir bo'lagi (shard, ish birligi) bo'lsa, butun
+    vazifa holati: muddat bosimi faqat shu bo'lakning domenlari bo'yicha hisoblanmaydi.
+    """
+    # Tugagan natijalar (collect_results=True bo'lsa)
+    collected: List[Dict[str, Any]] = []
 
-    all_results = []
     total_domains = len(domains)
 
-    # Dublikatlarni olib tashlash va tekshirish
-    unique_domains = list(set(domains))
+    # Dublikatlarni olib tashlash va normallashtirish - har bir domen vazifada bir marta
+    # tozalanadi; noto'g'ri qiymatlar ham tekshiruvchiga beriladi (xato natijasi uchun)
+    rejected: List[str] = []
+    records: Dict[str, DomainRecord] = {record.domain: record for record in normalize_domains(domains, rejected)}
+    unique_domains = list(records) + rejected
     logger.info(f"Checking {len(unique_domains)} unique domains (from {total_domains} total)")
 
     # Limit to reasonable number to prevent timeouts
-    if len(unique_domains) > 1000:
-        logger.warning(f"Too many domains to check in one request. Limiting to 1000.")
-        unique_domains = unique_domains[:1000]
-
-    # Client limits settings - reduced for better performance
-    limits = httpx.Limits(
-        max_keepalive_connections=MAX_CONNECTIONS // 2,
-        max_connections=MAX_CONNECTIONS,
-        keepalive_expiry=CONNECTION_KEEP_ALIVE
-    )
+    if max_domains is not None and len(unique_domains) > max_domains:
+        logger.warning(f"Too many domains to check in one request. Limiting to {max_domains}.")
+        unique_domains = unique_domains[:max_domains]
+
+    loop = asyncio.get_running_loop()
+    store = result_store if result_store is not None else get_result_store()
+    pending_store: List[Dict[str, Any]] = []
+
+    processed_count = 0
+
+    def record(result: Dict[str, Any]) -> None:
+        nonlocal processed_count
+        processed_count += 1
+        if collect_results:
+            collected.append(result)
+        if progress_callback is not None:
+            try:
+                progress_callback(result)
+            except Exception as e:
+                logger.error(f"Progress callback error: {str(e)}")
 
-    # Asinxron HTTP klient yaratish - with reduced timeouts
-    timeout_config = httpx.Timeout(REQUEST_TIMEOUT, connect=1.5)
+    async def flush_store() -> None:
+        if store is None or not pending_store:
+            return
+        batch = pending_store[:]
+        pending_store.clear()
+        try:
+            await loop.run_in_executor(None, store.put_many, batch)
+        except Exception as e:
+            logger.error(f"Result store write error: {str(e)}")
 
-    # Set up connection pool with relaxed settings
-    transport = httpx.AsyncHTTPTransport(
-        limits=limits,
-        retries=0,  # We handle our own retries
-        http2=False  # Disable HTTP/2 for better compatibility
+    # Natijalar omboridan yangi natijalarni olish
+    domains_to_check = unique_domains
+    if store is not None and not force_refresh:
+        try:
+            cached = await loop.run_in_executor(None, store.get_many, unique_domains)
+        except Exception as e:
+            logger.error(f"Result store read error: {str(e)}")
+            cached = {}
+        domains_to_check = []
+        for domain in unique_domains:
+            hit = cached.get(normalize_key(domain))
+            if hit is not None:
+                record(dict(hit, domain=domain))
+            else:
+                domains_to_check.append(domain)
+        logger.info(f"Result store: {len(cached)} fresh results, {len(domains_to_check)} domains to check")
+        RESULT_STORE_LOOKUPS_TOTAL.inc(len(unique_domains) - len(domains_to_check), result="hit")
+        RESULT_STORE_LOOKUPS_TOTAL.inc(len(domains_to_check), result="miss")
+
+    if not domains_to_check:
+        return list(collected)
+
+    limiter = AdaptiveLimiter(
+        initial=concurrency or INITIAL_CONCURRENCY,
+        floor=MIN_CONCURRENCY,
+        ceiling=min(MAX_CONCURRENCY, len(domains_to_check))
     )
 
-    async with httpx.AsyncClient(
-            timeout=timeout_config,
-            transport=transport,
-            follow_redirects=True,
-            http2=False  # Disable HTTP/2 for reliability
-    ) as client:
-        # Optimize domain grouping by TLD with smaller batches
-        batches = sort_domains_by_tld(unique_domains)
-        adjusted_batch_size = min(batch_size, MAX_BATCH_SIZE)
-
-        # Re-batch into smaller groups if needed
-        if adjusted_batch_size < batch_size:
-            new_batches = []
-            for batch in batches:
-                for i in range(0, len(batch), adjusted_batch_size):
-                    new_batches.append(batch[i:i + adjusted_batch_size])
-            batches = new_batches
-
-        logger.info(f"Processing {len(batches)} optimized batches (max {adjusted_batch_size} domains per batch)")
-
-        # Process batches with stricter concurrency control
-        semaphore = asyncio.Semaphore(3)  # Limit concurrent batches
-
-        async def process_batch_with_limits(batch):
-            async with semaphore:
-                try:
-                    results = await process_batch(client, batch)
-                    # Track successful domain processing
-                    _domains_processed.extend(results)
-                    return results
-                except Exception as e:
-                    logger.error(f"Batch processing error: {str(e)}")
-                    # Return basic error results for the batch
-                    error_results = [{
-                        "domain": domain,
-                        "status": "Need to Check",
-                        "status_code": None,
-                        "page_type": "Error",
-                        "title": "Batch processing error"
-                    } for domain in batch]
-                    _domains_processed.extend(error_results)
-                    return error_results
-
-        # Process batches with rate limiting
-        for i in range(0, len(batches), 3):  # Process 3 batches at a time
-            batch_group = batches[i:i + 3]
-            batch_tasks = [process_batch_with_limits(batch) for batch in batch_group]
-            batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
-
-            # Handle results
-            for batch_result in batch_results:
-                if isinstance(batch_result, Exception):
-                    logger.error(f"Failed batch: {str(batch_result)}")
-                    continue
-                all_results.extend(batch_result)
-
-            # Rate limiting pause between batch groups
-            if i + 3 < len(batches):
-                await asyncio.sleep(0.5)  # Short pause between batch groups
-
-    logger.info(f"Completed checking {len(all_results)} domains")
-    return all_results
\ No newline at end of file
+    # Bosqichlar budjeti shu vazifadagi kechikishlar va muddat bo'yicha
+    deadlines = DeadlineManager(len(domains_to_check), deadline, job=job)
+    # Bitta vazifa uchun bitta resolver - har bir host bir marta so'raladi
+    resolver = create_resolver(deadlines=deadlines)
+    # Host va IP bo'yicha token bucket'lar - global parallellikni oshirganda ham 429 olmaslik uchun
+    politeness = PolitenessLimiter()
+    # Ixtiyoriy: HTML tahlilini CPU yadrolari bo'ylab tarqatish
+    parser = parse_executor if PARSE_POOL_ENABLED else None
+
+    if http2 is None:
+        http2 = HTTP2_ENABLED
+
+    async with create_http_client(http2) as client:
+
+        async def check_one(domain: str) -> Dict[str, Any]:
+            started = time.monotonic()
+            PROBES_IN_FLIGHT.inc()
+            try:
+                result = await check_domain(client, domain, resolver=resolver, politeness=politeness,
+                                            parser=parser, record=records.get(domain), deadlines=deadlines)
+            except Exception as e:
+                logger.error(f"Error processing domain {domain}: {str(e)}")
+                result = error_result(domain, f"Error: {type(e).__name__}")
+                PROBES_TOTAL.inc(status=result["status"], outcome=OUTCOME_ERROR)
+                return result
+            finally:
+                PROBES_IN_FLIGHT.dec()
+                PROBE_SECONDS.observe(time.monotonic() - started)
+            PROBES_TOTAL.inc(status=result["status"], outcome=classify_outcome(result))
+            if store is not None:
+                pending_store.append(result)
+                if len(pending_store) >= RESULT_STORE_FLUSH_SIZE:
+                    await flush_store()
+            return result
+
+        def on_result(domain: str, result: Dict[str, Any]) -> None:
+            # Avval natija - umumiy hisoblagich (job) shu domenni ham hisobga olsin
+            record(result)
+            deadlines.domain_done()
+
+        try:
+            await run_work_queue(
+                order_domains_for_scheduling(domains_to_check, records),
+                check_one,
+                limiter,
+                classify_outcome,
+                on_result,
+                pacer=RatePacer(RATE_LIMIT)
+            )
+        finally:
+            resolver.close()
+            if parser is not None:
+                parser.release_loop()
+            await flush_store()
+
+    if isinstance(client, HTTP2FallbackClient) and client.http1_hosts:
+        logger.info(f"HTTP/2 fallback to HTTP/1.1 for {len(client.http1_hosts)} hosts")
+    if politeness.backoffs:
+        logger.info(f"Politeness limiter backed off {politeness.backoffs} times")
+    logger.info(f"Phase budgets: {deadlines.describe()}")
+    logger.info(f"Completed checking {processed_count} domains")
+    return list(collected)
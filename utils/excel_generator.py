@@ -1,178 +1,221 @@
 from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Font, Alignment, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
+from collections import Counter
+from typing import Any, Dict, Iterable, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
-
-def generate_excel(results, output_path):
+REPORT_SHEET_TITLE = "Domenlarni tekshirish hisoboti"
+SUMMARY_SHEET_TITLE = "Xulosa"
+REPORT_HEADERS = ["№", "Domen", "Holati", "Holat kodi", "Sahifa turi", "Sarlavha"]
+COLUMN_WIDTH = 20
+
+# Status mappings - define once
+STATUS_LABELS = {
+    "Working": "Ishlayapti",
+    "Not Working": "Ishlamayapti",
+    "Need to Check": "Tekshirish kerak"
+}
+STATUS_UNKNOWN = "Noma'lum"
+
+status_codes = {
+    200: "OK",
+    400: "Tekshirish kerak",
+    403: "Tekshirish kerak",
+    404: "Topilmadi",
+    500: "Server xatosi",
+    429: "Tekshirish kerak",
+    503: "Tekshirish kerak",
+    None: "Mavjud emas"
+}
+
+page_types = {
+    "Internal": "Ichki",
+    "External": "Tashqi",
+    "Error": "Xato",
+    "Non-HTML": "HTML emas",
+    "Unknown": "Noma'lum"
+}
+
+title_defaults = {
+    "No Title": "Sarlavhasiz",
+    "Error": "Xato",
+    "Non-HTML": "HTML emas",
+    "Timeout": "Tekshirish kerak"
+}
+
+# Holat ustuni uchun nomlangan uslublar (barcha kataklar bitta uslubni bo'lishadi)
+HEADER_STYLE = "report_header"
+CELL_STYLE = "report_cell"
+STATUS_STYLES = {
+    "Ishlayapti": "report_working",
+    "Tekshirish kerak": "report_check",
+}
+FAILED_STYLE = "report_failed"
+PERCENT_STYLE = "report_percent"
+
+
+def translate_result(result: Dict[str, Any]) -> Tuple[str, str, str, str, str]:
+    """Natijani hisobot qatoriga aylantirish: (domen, holati, holat kodi, sahifa turi, sarlavha)"""
+    # Status logic
+    status_value = STATUS_LABELS.get(result["status"], STATUS_UNKNOWN)
+
+    # Special cases for status
+    if result["status_code"] in [400, 403]:
+        status_value = "Tekshirish kerak"
+
+    if result.get("title") == "Timeout":
+        status_value = "Tekshirish kerak"
+
+    # Status code
+    status_code = result["status_code"]
+    status_code_str = status_codes.get(status_code, str(status_code) if status_code else "Mavjud emas")
+
+    return (
+        result["domain"],
+        status_value,
+        status_code_str,
+        page_types.get(result["page_type"], result["page_type"]),
+        title_defaults.get(result["title"], result["title"])
+    )
+
+
+def _register_styles(wb: Workbook) -> None:
+    thin_border = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+    left_alignment = Alignment(horizontal="left")
+
+    def fill(color: str) -> PatternFill:
+        return PatternFill(start_color=color, end_color=color, fill_type="solid")
+
+    styles = [
+        NamedStyle(name=HEADER_STYLE, font=Font(bold=True), fill=fill("4CAF50"),
+                   alignment=Alignment(horizontal="center"), border=thin_border),
+        NamedStyle(name=CELL_STYLE, alignment=left_alignment, border=thin_border),
+        NamedStyle(name=STATUS_STYLES["Ishlayapti"], fill=fill("4CAF50"), alignment=left_alignment,
+                   border=thin_border),
+        NamedStyle(name=STATUS_STYLES["Tekshirish kerak"], fill=fill("FFC107"), alignment=left_alignment,
+                   border=thin_border),
+        NamedStyle(name=FAILED_STYLE, fill=fill("F44336"), alignment=left_alignment, border=thin_border),
+        NamedStyle(name=PERCENT_STYLE, alignment=left_alignment, border=thin_border, number_format="0.0%"),
+    ]
+    for style in styles:
+        wb.add_named_style(style)
+
+
+def _styled_row(ws, values: Iterable[Any], style: str = CELL_STYLE, status_column: int = None):
+    """WriteOnlyCell qatori - uslub nomi bo'yicha biriktiriladi"""
+    row = []
+    for col, value in enumerate(values):
+        cell = WriteOnlyCell(ws, value=value)
+        if col == status_column:
+            cell.style = STATUS_STYLES.get(value, FAILED_STYLE)
+        else:
+            cell.style = style
+        row.append(cell)
+    return row
+
+
+def _create_sheet(wb: Workbook, title: str, headers):
+    ws = wb.create_sheet(title)
+    # write_only rejimida ustun kengliklari birinchi qatordan oldin berilishi kerak
+    for col in range(1, len(headers) + 1):
+        ws.column_dimensions[get_column_letter(col)].width = COLUMN_WIDTH
+    ws.append(_styled_row(ws, headers, HEADER_STYLE))
+    return ws
+
+
+def generate_excel(results, output_path, summary=False, status_sheets=False):
     """
-    Generate Excel report with performance optimizations:
-    - Reduced styling operations
-    - Limited number of cells with custom styling
-    - Batch processing for large result sets
-    - Memory usage optimization
+    Excel hisobotini oqim rejimida yaratish (openpyxl write_only).
+    results - natijalar ro'yxati yoki iteratori; qatorlar kelishi bilan diskka
+    yoziladi, shuning uchun xotira hisobot hajmiga bog'liq emas.
+    Standart holatda - avvalgidek bitta varaq. summary=True - holatlar bo'yicha
+    "Xulosa" varag'i, status_sheets=True - qatori bor har bir holat uchun alohida
+    varaq (qatorlar buferlanmaydi).
     """
     try:
-        # Start with a clean workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Domenlarni tekshirish hisoboti"
-
-        # Define headers once
-        headers = ["№", "Domen", "Holati", "Holat kodi", "Sahifa turi", "Sarlavha"]
-
-        # Pre-define styles and colors to avoid repeated creation
-        header_font = Font(bold=True)
-        header_fill = PatternFill(start_color="4CAF50", end_color="4CAF50", fill_type="solid")
-        header_alignment = Alignment(horizontal="center")
-
-        green_fill = PatternFill(start_color="4CAF50", end_color="4CAF50", fill_type="solid")
-        yellow_fill = PatternFill(start_color="FFC107", end_color="FFC107", fill_type="solid")
-        red_fill = PatternFill(start_color="F44336", end_color="F44336", fill_type="solid")
-
-        thin_border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-
-        left_alignment = Alignment(horizontal="left")
-
-        # Status mappings - define once
-        status_codes = {
-            200: "OK",
-            400: "Tekshirish kerak",
-            403: "Tekshirish kerak",
-            404: "Topilmadi",
-            500: "Server xatosi",
-            429: "Tekshirish kerak",
-            503: "Tekshirish kerak",
-            None: "Mavjud emas"
-        }
-
-        page_types = {
-            "Internal": "Ichki",
-            "External": "Tashqi",
-            "Error": "Xato",
-            "Non-HTML": "HTML emas",
-            "Unknown": "Noma'lum"
-        }
-
-        title_defaults = {
-            "No Title": "Sarlavhasiz",
-            "Error": "Xato",
-            "Non-HTML": "HTML emas",
-            "Timeout": "Tekshirish kerak"
-        }
-
-        # Write headers - just once
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col)
-            cell.value = header
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-            cell.border = thin_border
-
-        # Calculate the number of rows to process for memory efficiency
-        total_results = len(results)
-        BATCH_SIZE = 1000  # Process 1000 rows at a time to avoid memory issues
-
-        # Process in batches if needed
-        for batch_start in range(0, total_results, BATCH_SIZE):
-            batch_end = min(batch_start + BATCH_SIZE, total_results)
-            batch = results[batch_start:batch_end]
-
-            logger.info(f"Processing Excel batch {batch_start + 1}-{batch_end} of {total_results}")
-
-            # Add rows in batches
-            for i, result in enumerate(batch, 1):
-                row = batch_start + i + 1  # +1 for header row
-
-                # Basic data
-                ws.cell(row=row, column=1).value = row - 1
-                ws.cell(row=row, column=2).value = result["domain"]
-
-                # Status logic
-                status_value = {
-                    "Working": "Ishlayapti",
-                    "Not Working": "Ishlamayapti",
-                    "Need to Check": "Tekshirish kerak"
-                }.get(result["status"], "Noma'lum")
-
-                # Special cases for status
-                if result["status_code"] in [400, 403]:
-                    status_value = "Tekshirish kerak"
-
-                if result.get("title") == "Timeout":
-                    status_value = "Tekshirish kerak"
-
-                ws.cell(row=row, column=3).value = status_value
-
-                # Status code
-                status_code = result["status_code"]
-                status_code_str = status_codes.get(status_code, str(status_code) if status_code else "Mavjud emas")
-                ws.cell(row=row, column=4).value = status_code_str
-
-                # Page type and title
-                ws.cell(row=row, column=5).value = page_types.get(result["page_type"], result["page_type"])
-                ws.cell(row=row, column=6).value = title_defaults.get(result["title"], result["title"])
-
-                # Apply style only to status column for performance
-                status_cell = ws.cell(row=row, column=3)
-
-                # Apply appropriate color based on status
-                if status_value == "Tekshirish kerak":
-                    status_cell.fill = yellow_fill
-                elif status_value == "Ishlayapti":
-                    status_cell.fill = green_fill
-                else:
-                    status_cell.fill = red_fill
-
-                # Apply border to all cells in this row (more efficient than iterating again)
-                for col in range(1, 7):
-                    cell = ws.cell(row=row, column=col)
-                    cell.border = thin_border
-                    cell.alignment = left_alignment
-
-            # Force garbage collection between batches
-            batch = None
-
-        # Set column widths once
-        for col in range(1, 7):
-            ws.column_dimensions[get_column_letter(col)].width = 20
+        wb = Workbook(write_only=True)
+        _register_styles(wb)
+
+        ws = _create_sheet(wb, REPORT_SHEET_TITLE, REPORT_HEADERS)
+        # Varaqlar yaratilish tartibida saqlanadi - xulosa asosiy varaqdan keyin turadi,
+        # uning qatorlari esa oxirida yoziladi
+        summary_ws = _create_sheet(wb, SUMMARY_SHEET_TITLE, ["Holati", "Soni", "Ulushi"]) if summary else None
+        # Holat varaqlari shu holatdagi birinchi qator kelganda (paydo bo'lish tartibida)
+        # yaratiladi - bo'sh varaqlar bo'lmaydi
+        per_status = {}
+
+        status_counts = Counter()
+        page_type_counts = Counter()
+        total_results = 0
+
+        for row_number, result in enumerate(results, 1):
+            row = translate_result(result)
+            status_value = row[1]
+            status_counts[status_value] += 1
+            page_type_counts[row[3]] += 1
+            total_results = row_number
+
+            ws.append(_styled_row(ws, (row_number,) + row, status_column=2))
+
+            if status_sheets:
+                entry = per_status.get(status_value)
+                if entry is None:
+                    entry = per_status[status_value] = [_create_sheet(wb, status_value, REPORT_HEADERS), 0]
+                entry[1] += 1
+                entry[0].append(_styled_row(entry[0], (entry[1],) + row, status_column=2))
+
+            if row_number % 10000 == 0:
+                logger.info(f"Excel report: {row_number} rows written")
+
+        if summary_ws is not None:
+            def add_counts(counts, style_status):
+                for label, count in counts.most_common():
+                    share = count / total_results if total_results else 0
+                    row = _styled_row(summary_ws, (label, count, share), status_column=0 if style_status else None)
+                    row[2].style = PERCENT_STYLE
+                    summary_ws.append(row)
+
+            add_counts(status_counts, True)
+            summary_ws.append([])
+            summary_ws.append(_styled_row(summary_ws, ("Sahifa turi", "Soni", "Ulushi"), HEADER_STYLE))
+            add_counts(page_type_counts, False)
+            summary_ws.append([])
+            summary_ws.append(_styled_row(summary_ws, ("Jami", total_results), HEADER_STYLE))
 
         # Save workbook
         wb.save(output_path)
-        logger.info(f"Excel report successfully generated at {output_path}")
+        logger.info(f"Excel report successfully generated at {output_path} ({total_results} rows)")
 
         return True
     except Exception as e:
         logger.error(f"Error generating Excel report: {str(e)}")
 
+        # Iterator qisman o'qilgan bo'lsa, qayta yurib bo'lmaydi - faqat ro'yxat uchun zaxira hisobot
+        if not isinstance(results, (list, tuple)):
+            return False
+
         # Try a minimal report if the full one fails
         try:
             # Create a simpler report with minimal styling
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Domenlarni tekshirish hisoboti"
-
-            headers = ["№", "Domen", "Holati", "Holat kodi"]
-            for col, header in enumerate(headers, 1):
-                ws.cell(row=1, column=col).value = header
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet(REPORT_SHEET_TITLE)
+            ws.append(["№", "Domen", "Holati", "Holat kodi"])
 
-            for i, result in enumerate(results[:5000], 2):  # Limit to 5000 rows in emergency
-                ws.cell(row=i, column=1).value = i - 1
-                ws.cell(row=i, column=2).value = result["domain"]
-                ws.cell(row=i, column=3).value = result["status"]
-                ws.cell(row=i, column=4).value = result["status_code"]
+            for i, result in enumerate(results[:5000], 1):  # Limit to 5000 rows in emergency
+                ws.append([i, result["domain"], result["status"], result["status_code"]])
 
             wb.save(output_path)
             logger.warning(f"Generated simplified Excel report due to error in main generator")
             return True
         except Exception as backup_error:
             logger.critical(f"Failed to generate even simplified Excel report: {str(backup_error)}")
-            return False
\ No newline at end of file
+            return False
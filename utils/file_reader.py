@@ -1,18 +1,18 @@
-import docx
 import openpyxl
 import re
 import logging
+import mmap
 import os
-from typing import List, Optional, Set
-import threading
+from contextlib import closing
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Set
 import time
+import zipfile
+import tldextract
+from utils.cache import TTLCache
+from utils.office_reader import UnsupportedWorkbook, iter_docx_texts, iter_xlsx_strings
 
 logger = logging.getLogger(__name__)
 
-# Thread-local storage for domain processing
-_local = threading.local()
-_local.domain_cache = {}
-
 # Domain extraction patterns - compiled once for better performance
 IP_PATTERN = re.compile(r'^(\d{1,3}\.){3}\d{1,3}$')
 DOMAIN_PATTERN = re.compile(r'^([a-z0-9]([a-z0-9\-]{0,61}[a-z0-9])?\.)+[a-z]{2,}$')
@@ -21,10 +21,28 @@ PART_SPLIT_PATTERN = re.compile(r'[,\t ]+')
 PROTOCOL_PATTERN = re.compile(r'^https?://')
 URL_PATH_PATTERN = re.compile(r'/.*$')
 TEXT_CLEANUP_PATTERN = re.compile(r'tekshirish natijalari:.*', flags=re.IGNORECASE)
-
-# Cache for already cleaned domains
+# Yuqoridagi tozalash va validatsiya bitta o'tishda: ixtiyoriy protokol, host (IP yoki domen),
+# ixtiyoriy yo'l. Bo'sh joysiz so'zlar uchun natija eski ketma-ket o'tishlar bilan bir xil
+NORMALIZE_PATTERN = re.compile(
+    r'(?:https?://)?'
+    r'(?:(?P<ip>(\d{1,3}\.){3}\d{1,3})|(?P<domain>([a-z0-9]([a-z0-9\-]{0,61}[a-z0-9])?\.)+[a-z]{2,}))'
+    r'(?:/.*)?'
+)
+WHITESPACE_PATTERN = re.compile(r'\s')
+# .txt skaneri uchun (baytlar ustida): ajratgichlar orasidagi, kamida bitta nuqtasi bor
+# so'z - domen yoki IP bo'lishi mumkin. Lookbehind moslikni so'z boshiga bog'laydi,
+# shuning uchun har bir bayt bir marta ko'riladi
+DOMAIN_TOKEN_PATTERN = re.compile(rb'(?<![^\n\r,\t ])[^\n\r,\t .]*\.[^\n\r,\t ]*')
+UTF8_BOM = b'\xef\xbb\xbf'
+TXT_SCAN_CHUNK_SIZE = 8 * 1024 * 1024  # bayt
+# Allaqachon toza so'z (kichik harf, protokolsiz, yo'lsiz) - faqat validatsiya kerak
+SIMPLE_TOKEN_PATTERN = re.compile(rb'[a-z0-9.\-]+')
+
+# Cache for already cleaned domains (kalit - kiritilgan qiymat)
 DOMAIN_CACHE_SIZE = 5000
-domain_cache = {}
+DOMAIN_CACHE_NEGATIVE_TTL = int(os.environ.get('DOMAIN_CACHE_NEGATIVE_TTL', 600))  # Noto'g'ri qiymatlar uchun
+domain_cache = TTLCache(DOMAIN_CACHE_SIZE, name="domain_normalization", shared=True)
+_NOT_CACHED = object()
 
 
 def clean_domain(domain: str) -> Optional[str]:
@@ -42,12 +60,30 @@ def clean_domain(domain: str) -> Optional[str]:
         return None
 
     # Check cache first
-    if domain in domain_cache:
-        return domain_cache[domain]
+    cached = domain_cache.get(domain, _NOT_CACHED)
+    if cached is not _NOT_CACHED:
+        return cached
+
+    cleaned = _clean_domain(domain)
+    domain_cache.set(domain, cleaned, None if cleaned else DOMAIN_CACHE_NEGATIVE_TTL)
+    return cleaned
+
 
+def _clean_domain(domain: str) -> Optional[str]:
     # Cleanup domain name
     domain = domain.strip().lower()
 
+    # Tezkor yo'l - bitta regex; ichida bo'sh joy bo'lmasa, quyidagi o'tishlar boshqa natija bermaydi
+    match = NORMALIZE_PATTERN.fullmatch(domain)
+    if match:
+        return match.group('ip') or match.group('domain')
+    if not WHITESPACE_PATTERN.search(domain):
+        return None
+    return _clean_domain_slow(domain)
+
+
+def _clean_domain_slow(domain: str) -> Optional[str]:
+    """Ketma-ket o'tishlar (kichik harfdagi, chetlari tozalangan qiymat uchun)"""
     # Remove text like "Tekshirish natijalari:" and similar
     domain = TEXT_CLEANUP_PATTERN.sub('', domain)
 
@@ -61,28 +97,70 @@ def clean_domain(domain: str) -> Optional[str]:
     domain = domain.strip()
 
     if not domain:
-        domain_cache[domain] = None
         return None
 
     # Check if it's an IP address
     if IP_PATTERN.match(domain):
-        domain_cache[domain] = domain
         return domain
 
     # Check if it's a valid domain
     if DOMAIN_PATTERN.match(domain):
-        domain_cache[domain] = domain
         return domain
 
-    # Clean cache periodically
-    if len(domain_cache) > DOMAIN_CACHE_SIZE:
-        # Simple approach: just clear the whole cache when it gets too big
-        domain_cache.clear()
-
-    domain_cache[domain] = None
     return None
 
 
+class DomainRecord(NamedTuple):
+    """Normallashtirilgan domen: tekshiruvchi uni qayta tozalamaydi"""
+    domain: str  # kichik harf, protokolsiz, yo'lsiz
+    registrable: str  # ro'yxatdan o'tkaziladigan domen (example.co.uz); IP uchun IP o'zi
+    suffix: str  # ommaviy suffiks (co.uz); IP va noma'lum TLD uchun ''
+    is_ip: bool
+
+
+def _domain_record(domain: str) -> DomainRecord:
+    if IP_PATTERN.match(domain):
+        return DomainRecord(domain, domain, '', True)
+    try:
+        info = tldextract.extract(domain)
+    except Exception:
+        return DomainRecord(domain, domain, '', False)
+    registrable = f"{info.domain}.{info.suffix}" if info.suffix else domain
+    return DomainRecord(domain, registrable, info.suffix, False)
+
+
+def normalize_domains(values: Iterable[str], rejected: Optional[List[str]] = None) -> List[DomainRecord]:
+    """
+    Qiymatlarni bir martada normallashtirish: har bir qiymat bitta regex bilan
+    tozalanadi va tekshiriladi, dublikatlar (kiritilgan va tozalangan ko'rinishda)
+    darhol tashlanadi, tldextract har bir noyob domen uchun bir marta chaqiriladi.
+    Tartib saqlanadi. rejected berilsa, noto'g'ri qiymatlar unga qo'shiladi.
+    Tayyor DomainRecord qiymatlari qayta normallashtirilmaydi.
+    """
+    records = []
+    seen_values: Set[str] = set()
+    seen_domains: Set[str] = set()
+    for value in values:
+        if isinstance(value, DomainRecord):
+            if value.domain not in seen_domains:
+                seen_domains.add(value.domain)
+                records.append(value)
+            continue
+        if not isinstance(value, str) or value in seen_values:
+            continue
+        seen_values.add(value)
+        domain = _clean_domain(value)
+        if domain is None:
+            if rejected is not None:
+                rejected.append(value)
+            continue
+        if domain in seen_domains:
+            continue
+        seen_domains.add(domain)
+        records.append(_domain_record(domain))
+    return records
+
+
 def extract_domains_from_text(text: str) -> List[str]:
     """
     Extract domains from text.
@@ -111,36 +189,104 @@ def extract_domains_from_text(text: str) -> List[str]:
     return domains
 
 
+def clean_domain_list(values: Iterable[str], max_domains: int = 5000) -> List[str]:
+    """
+    Tayyor ro'yxatdagi qiymatlarni (masalan, JSON so'rovdan) tozalash.
+    Tartib saqlanadi, dublikatlar va noto'g'ri qiymatlar tashlab yuboriladi.
+    """
+    valid_domains = {}
+    for value in values:
+        if not isinstance(value, str):
+            continue
+        for part in extract_domains_from_text(value):
+            cleaned = clean_domain(part)
+            if cleaned:
+                valid_domains[cleaned] = None
+        if len(valid_domains) >= max_domains:
+            logger.warning(f"Reached maximum domains ({max_domains}). Truncating list.")
+            break
+    return list(valid_domains)[:max_domains]
+
+
+def iter_txt_domains(file_path: str) -> Iterator[str]:
+    """
+    .txt faylni bir marta skanerlab tozalangan domenlarni dangasa (lazy) qaytarish.
+    Fayl xotiraga mmap qilinadi va qator chegarasidagi bo'laklarda bitta regex bilan
+    skanerlanadi; takroriy so'zlar C darajasida (set) tashlanadi, faqat yangi
+    so'zlar dekodlanib tozalanadi.
+    """
+    with open(file_path, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Bo'sh fayl
+            return
+
+        with data:
+            size = len(data)
+            position = len(UTF8_BOM) if data[:len(UTF8_BOM)] == UTF8_BOM else 0
+            seen_tokens: Set[bytes] = set()
+            while position < size:
+                # Bo'lak qator oxirida tugaydi - so'zlar bo'linib qolmaydi
+                end = min(position + TXT_SCAN_CHUNK_SIZE, size)
+                if end < size:
+                    newline = data.rfind(b'\n', position, end)
+                    if newline == -1:
+                        newline = data.find(b'\n', end)
+                    end = size if newline == -1 else newline + 1
+
+                new_tokens = set(DOMAIN_TOKEN_PATTERN.findall(data, position, end))
+                new_tokens.difference_update(seen_tokens)
+                seen_tokens.update(new_tokens)
+                position = end
+
+                for token in new_tokens:
+                    if SIMPLE_TOKEN_PATTERN.fullmatch(token):
+                        domain = token.decode('ascii')
+                        cleaned = domain if IP_PATTERN.match(domain) or DOMAIN_PATTERN.match(domain) else None
+                    else:
+                        cleaned = _clean_domain(token.decode('utf-8', errors='ignore'))
+                    if cleaned:
+                        yield cleaned
+
+
 def read_docx_file(file_path: str, potential_domains: Set[str], max_domains: int) -> None:
-    """Read domains from a .docx file"""
+    """Read domains from a .docx file (paragraflar va jadval kataklari oqim bilan)"""
     try:
-        doc = docx.Document(file_path)
-
-        # Get from paragraphs
-        for para in doc.paragraphs:
-            text = para.text.strip()
-            if text:
-                domains_from_text = extract_domains_from_text(text)
-                potential_domains.update(domains_from_text)
-                if len(potential_domains) >= max_domains:
-                    return
-
-        # Get from tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    text = cell.text.strip()
-                    if text:
-                        domains_from_text = extract_domains_from_text(text)
-                        potential_domains.update(domains_from_text)
-                        if len(potential_domains) >= max_domains:
-                            return
+        with closing(iter_docx_texts(file_path)) as texts:
+            for text in texts:
+                text = text.strip()
+                if text:
+                    domains_from_text = extract_domains_from_text(text)
+                    potential_domains.update(domains_from_text)
+                    if len(potential_domains) >= max_domains:
+                        return
     except Exception as e:
         logger.error(f"Error reading docx file: {str(e)}")
 
 
 def read_xlsx_file(file_path: str, potential_domains: Set[str], max_domains: int) -> None:
-    """Read domains from a .xlsx file"""
+    """Read domains from a .xlsx file (zip + iterparse, openpyxl faqat zaxira sifatida)"""
+    try:
+        with closing(iter_xlsx_strings(file_path)) as values:
+            for value in values:
+                text = value.strip()
+                if text:
+                    potential_domains.update(extract_domains_from_text(text))
+                    if len(potential_domains) >= max_domains:
+                        return
+        return
+    except (UnsupportedWorkbook, zipfile.BadZipFile, KeyError) as e:
+        logger.warning(f"Fast xlsx reader failed, falling back to openpyxl: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error reading xlsx file: {str(e)}")
+        return
+
+    read_xlsx_file_openpyxl(file_path, potential_domains, max_domains)
+
+
+def read_xlsx_file_openpyxl(file_path: str, potential_domains: Set[str], max_domains: int) -> None:
+    """Read domains from a .xlsx file with openpyxl (sekinroq, har bir katak uchun obyekt)"""
     try:
         # Use read_only mode for better performance
         wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
@@ -176,6 +322,7 @@ def read_file(file_path: str, max_domains: int = 5000) -> List[str]:
     """
     start_time = time.time()
     potential_domains: Set[str] = set()
+    valid_domains: Set[str] = set()
     processed_count = 0
 
     try:
@@ -186,36 +333,15 @@ def read_file(file_path: str, max_domains: int = 5000) -> List[str]:
 
         # Read based on file type
         if file_path.endswith('.txt'):
-            # Use a more efficient approach for text files
+            # Bir o'tishli skaner - domenlar tozalangan holda oqim bilan keladi
             try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    # Read in chunks for large files
-                    chunk_size = 1024 * 1024  # 1MB chunks
-                    text_buffer = ""
-
-                    while True:
-                        chunk = f.read(chunk_size)
-                        if not chunk:
-                            break
-
-                        # Process any complete lines in this chunk
-                        text_buffer += chunk
-                        domains_from_text = extract_domains_from_text(text_buffer)
-                        potential_domains.update(domains_from_text)
-
-                        # Reset buffer to avoid memory build-up but keep any partial line
-                        last_newline = text_buffer.rfind('\n')
-                        if last_newline != -1:
-                            text_buffer = text_buffer[last_newline + 1:]
-
-                        if len(potential_domains) >= max_domains:
+                with closing(iter_txt_domains(file_path)) as domains:
+                    for domain in domains:
+                        valid_domains.add(domain)
+                        processed_count += 1
+                        if len(valid_domains) >= max_domains:
                             logger.warning(f"Reached maximum domains while reading file")
                             break
-
-                # Process any remaining text in buffer
-                if text_buffer:
-                    domains_from_text = extract_domains_from_text(text_buffer)
-                    potential_domains.update(domains_from_text)
             except Exception as e:
                 logger.error(f"Error reading txt file: {str(e)}")
 
@@ -226,21 +352,19 @@ def read_file(file_path: str, max_domains: int = 5000) -> List[str]:
             read_xlsx_file(file_path, potential_domains, max_domains)
 
         # Clean and validate domains
-        valid_domains = []
         for domain in potential_domains:
-            cleaned = clean_domain(domain)
-            if cleaned:
-                valid_domains.append(cleaned)
-                processed_count += 1
-
             # Check max domains
             if len(valid_domains) >= max_domains:
                 logger.warning(f"Reached maximum domains ({max_domains}). Truncating list.")
                 break
 
-        # Remove duplicates and sort
-        unique_domains = list(set(valid_domains))
-        unique_domains.sort()
+            cleaned = clean_domain(domain)
+            if cleaned:
+                valid_domains.add(cleaned)
+                processed_count += 1
+
+        # Sort unique domains
+        unique_domains = sorted(valid_domains)
 
         end_time = time.time()
         logger.info(
@@ -0,0 +1,276 @@
+import codecs
+import html
+import logging
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+# Pre-built lists for faster classification - minimized for speed
+login_keywords = {
+    'login', 'signin', 'sign in', 'log in', 'auth', 'authenticate',
+    'register', 'kirish', 'parol'
+}
+
+TITLE_MAX_LENGTH = 100
+KEYWORD_TEXT_LIMIT = 3000  # Login so'zlari sahifa matnining faqat boshida qidiriladi
+
+# Tezkor extractor bir baytli kodirovkalar va UTF-8 bilan ishlaydi, qolganlari BeautifulSoup'ga
+_FAST_ENCODING_PREFIXES = ('utf-8', 'ascii', 'latin', 'iso8859', 'cp125', 'koi8', 'mac-')
+
+# Teg va atributlar uchun regexlar (baytlar ustida)
+TAG_PATTERN = re.compile(rb'<([a-zA-Z][^\s/>]*)((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>')
+END_TAG_PATTERN = re.compile(rb'</([a-zA-Z][^\s/>]*)[^>]*>')
+ATTR_PATTERN = re.compile(rb'([^\s"\'>/=]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+STRIP_TAGS_PATTERN = re.compile(rb'<[^>]*>')
+INPUT_TAG_PATTERN = re.compile(rb'<input((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>', re.IGNORECASE)
+
+# Matni get_text() ga kirmaydigan elementlar
+RAW_TEXT_TAGS = {b'script', b'style', b'template'}
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick avtomati: bir nechta kalit so'zni matn ustidan bitta o'tishda
+    qidiradi. Avtomat holati feed() ga uzatiladi va qaytariladi, shuning uchun
+    teglar bilan bo'lingan matn qismlari ham to'g'ri topiladi, jadvallar esa
+    thread'lar orasida xavfsiz bo'lishadi.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[bool] = [False]
+
+        for keyword in keywords:
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(False)
+                state = next_state
+            self._output[state] = True
+
+        # Fail havolalari (BFS)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] or self._output[self._fail[next_state]]
+
+    def feed(self, text: str, state: int = 0) -> Tuple[bool, int]:
+        """Matn qismini berish; (kalit so'z topildimi, yangi holat) qaytaradi"""
+        goto, fail, output = self._goto, self._fail, self._output
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                return True, state
+        return False, state
+
+
+_login_matcher = KeywordMatcher(login_keywords)
+
+
+class UnsupportedContent(Exception):
+    """Tezkor extractor bu sahifani qayta ishlay olmaydi - BeautifulSoup ishlatiladi"""
+
+
+def _fast_encoding(encoding: Optional[str]) -> str:
+    try:
+        name = codecs.lookup(encoding or 'utf-8').name
+    except LookupError:
+        name = 'utf-8'
+    if not name.startswith(_FAST_ENCODING_PREFIXES):
+        raise UnsupportedContent(f"Encoding {name} is not supported by the fast extractor")
+    return name
+
+
+def _attributes(raw: bytes) -> Dict[bytes, bytes]:
+    attrs = {}
+    for match in ATTR_PATTERN.finditer(raw):
+        name = match.group(1).lower()
+        if name not in attrs:
+            value = match.group(2)
+            if value is None:
+                value = match.group(3)
+            if value is None:
+                value = match.group(4) or b''
+            attrs[name] = value
+    return attrs
+
+
+def extract_page_info(body: bytes, encoding: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Xom baytlarni bir marta skanerlab (title, page_type) qaytarish.
+    Natija BeautifulSoup asosidagi tahlil bilan bir xil: <title>, og:title,
+    birinchi <h1>, parol maydoni va matn boshidagi login so'zlari.
+    """
+    encoding = _fast_encoding(encoding)
+    lower = body.lower()
+
+    def decode(raw: bytes) -> str:
+        text = raw.decode(encoding, errors='replace')
+        return html.unescape(text) if '&' in text else text
+
+    title: Optional[str] = None
+    og_title: Optional[str] = None
+    h1_title: Optional[str] = None
+    has_password = False
+    keyword_hit = False
+    text_budget = KEYWORD_TEXT_LIMIT
+    matcher_state = 0
+
+    position = 0
+    length = len(body)
+    while position < length:
+        if title and (keyword_hit or text_budget <= 0):
+            # Sarlavha aniq, matn limiti tugagan - faqat parol maydonini qidirish qoldi
+            if not keyword_hit and not has_password:
+                has_password = any(
+                    _attributes(match.group(1)).get(b'type') == b'password'
+                    for match in INPUT_TAG_PATTERN.finditer(body, position)
+                    if b'password' in match.group(1)
+                )
+            break
+
+        tag_start = body.find(b'<', position)
+        text_end = length if tag_start == -1 else tag_start
+
+        # Matn tugunlari - login so'zlari faqat birinchi 3000 belgida qidiriladi
+        if text_end > position and text_budget > 0 and not keyword_hit:
+            text = decode(body[position:text_end])[:text_budget]
+            text_budget -= len(text)
+            keyword_hit, matcher_state = _login_matcher.feed(text.lower(), matcher_state)
+
+        if tag_start == -1:
+            break
+
+        if lower.startswith(b'<!--', tag_start):
+            comment_end = body.find(b'-->', tag_start + 4)
+            position = length if comment_end == -1 else comment_end + 3
+            continue
+
+        if lower.startswith(b'<!', tag_start) or lower.startswith(b'<?', tag_start):
+            declaration_end = body.find(b'>', tag_start)
+            position = length if declaration_end == -1 else declaration_end + 1
+            continue
+
+        if lower.startswith(b'</', tag_start):
+            match = END_TAG_PATTERN.match(body, tag_start)
+            position = match.end() if match else tag_start + 2
+            continue
+
+        match = TAG_PATTERN.match(body, tag_start)
+        if match is None:
+            # Teg emas - '<' oddiy matn sifatida
+            if text_budget > 0 and not keyword_hit:
+                text_budget -= 1
+                keyword_hit, matcher_state = _login_matcher.feed('<', matcher_state)
+            position = tag_start + 1
+            continue
+
+        name = match.group(1).lower()
+        position = match.end()
+
+        if name in RAW_TEXT_TAGS:
+            # Skript va stillar matni get_text() ga kirmaydi
+            close = lower.find(b'</' + name, position)
+            position = length if close == -1 else close
+            continue
+
+        if name == b'title' and title is None:
+            close = lower.find(b'</title', position)
+            content = body[position:length if close == -1 else close]
+            # BeautifulSoup: ichida teg bo'lsa .string None bo'ladi
+            title = decode(content) if b'<' not in content else ''
+            continue
+
+        if name == b'meta' and og_title is None:
+            attrs = _attributes(match.group(2))
+            if attrs.get(b'property') == b'og:title' and attrs.get(b'content'):
+                og_title = decode(attrs[b'content'])
+            continue
+
+        if name == b'h1' and h1_title is None:
+            close = lower.find(b'</h1', position)
+            content = body[position:length if close == -1 else close]
+            h1_title = decode(STRIP_TAGS_PATTERN.sub(b'', content))
+            continue
+
+        if name == b'input' and not has_password:
+            attrs = _attributes(match.group(2))
+            if attrs.get(b'type') == b'password':
+                has_password = True
+
+    if title:
+        result_title = title.strip()[:TITLE_MAX_LENGTH]
+    elif og_title:
+        result_title = og_title[:TITLE_MAX_LENGTH]
+    elif h1_title:
+        result_title = h1_title.strip()[:TITLE_MAX_LENGTH]
+    else:
+        result_title = "No Title"
+
+    page_type = "Internal" if has_password or keyword_hit else "External"
+    return result_title, page_type
+
+
+def extract_page_info_bs4(text: str) -> Tuple[str, str]:
+    """BeautifulSoup asosidagi (sekinroq) tahlil - zaxira yo'l"""
+    soup = BeautifulSoup(text, 'html.parser')
+
+    # Sarlavhani olish
+    title_tag = soup.title
+    if title_tag and title_tag.string:
+        title = title_tag.string.strip()[:TITLE_MAX_LENGTH]
+    else:
+        # Agar title yo'q bo'lsa, meta og:title yoki boshqa elementlarni tekshirish
+        meta_title = soup.find('meta', property='og:title')
+        if meta_title and meta_title.get('content'):
+            title = meta_title.get('content')[:TITLE_MAX_LENGTH]
+        else:
+            h1 = soup.find('h1')
+            if h1 and h1.text:
+                title = h1.text.strip()[:TITLE_MAX_LENGTH]
+            else:
+                title = "No Title"
+
+    # Fast check for password inputs (strongest indicator)
+    if soup.find('input', {'type': 'password'}):
+        return title, "Internal"
+
+    # Super quick check for login-related text
+    page_text = soup.get_text()[:KEYWORD_TEXT_LIMIT].lower()
+    if any(keyword in page_text for keyword in login_keywords):
+        return title, "Internal"
+    return title, "External"
+
+
+def parse_page(body: bytes, encoding: Optional[str] = None) -> Tuple[str, str]:
+    """Sahifadan (title, page_type) olish: avval tezkor extractor, kerak bo'lsa BeautifulSoup"""
+    try:
+        return extract_page_info(body, encoding)
+    except UnsupportedContent as e:
+        logger.debug(f"Falling back to BeautifulSoup: {str(e)}")
+    except Exception as e:
+        logger.warning(f"Fast extractor failed, falling back to BeautifulSoup: {str(e)}")
+
+    try:
+        text = body.decode(encoding or 'utf-8', errors='replace')
+    except LookupError:
+        text = body.decode('utf-8', errors='replace')
+    return extract_page_info_bs4(text)
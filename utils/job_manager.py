@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Vazifa holatlari
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATES = {JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED}
+
+# Tugagan vazifalar shuncha vaqt saqlanadi (sekund)
+JOB_RETENTION = 3600
+
+# Jonli natijalar oqimi: har bir obunachi uchun navbat hajmi. Sekin mijoz
+# navbatni to'ldirsa, natija hodisalari tashlab yuboriladi (hisoblagichlar progress'da keladi)
+EVENT_QUEUE_SIZE = 10000
+EVENT_RESULT = "result"
+EVENT_END = "end"
+
+
+def new_event_queue() -> queue.Queue:
+    return queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+
+
+class JobManager:
+    """
+    Fon vazifalari navbati: har bir vazifa alohida thread'da o'zining
+    event loop'i bilan ishlaydi, shuning uchun HTTP so'rov darhol javob qaytaradi.
+    Vazifalar, obunachilar va bekor qilish faqat shu jarayonda - ilova bitta
+    gunicorn worker bilan ishlashi kerak (Procfile).
+    """
+
+    def __init__(self, max_workers: int = 2, retention: int = JOB_RETENTION):
+        self.lock = threading.Lock()
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.retention = retention
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="domain-job")
+        # job_id -> obunachilar navbatlari (hodisa: (tur, ma'lumot))
+        self.subscribers: Dict[str, List[queue.Queue]] = {}
+
+    def submit(self, job_id: str, total: int, output_path: Optional[str],
+               runner: Callable[[str], Coroutine[Any, Any, Any]],
+               events: Optional[queue.Queue] = None) -> Dict[str, Any]:
+        """
+        Yangi vazifani navbatga qo'yish. runner(job_id) coroutine qaytarishi kerak.
+        events (new_event_queue()) berilsa, u vazifa boshlanishidan oldin obuna qilinadi -
+        birinchi natijalar ham yo'qolmaydi.
+        """
+        self.prune()
+        with self.lock:
+            if events is not None:
+                self.subscribers.setdefault(job_id, []).append(events)
+            self.jobs[job_id] = {
+                'id': job_id,
+                'status': JOB_QUEUED,
+                'created_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'total': total,
+                'checked': 0,
+                'working': 0,
+                'not_working': 0,
+                'need_check': 0,
+                'output_path': output_path,
+                'error': None,
+                'cancel_requested': False,
+                'dropped_events': 0,
+                '_loop': None,
+                '_task': None,
+            }
+        self.executor.submit(self._run, job_id, runner)
+        logger.info(f"Job {job_id} queued with {total} domains")
+        return self.snapshot(job_id)
+
+    def _run(self, job_id: str, runner: Callable[[str], Coroutine[Any, Any, Any]]) -> None:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            if job['cancel_requested']:
+                job['status'] = JOB_CANCELLED
+                job['finished_at'] = time.time()
+                loop = None
+            else:
+                loop = asyncio.new_event_loop()
+                job['status'] = JOB_RUNNING
+                job['started_at'] = time.time()
+                job['_loop'] = loop
+
+        if loop is None:
+            # Navbatda turganda bekor qilingan
+            self._publish(job_id, EVENT_END, self.snapshot(job_id))
+            return
+
+        asyncio.set_event_loop(loop)
+        try:
+            task = loop.create_task(runner(job_id))
+            with self.lock:
+                job['_task'] = task
+                if job['cancel_requested']:
+                    task.cancel()
+            loop.run_until_complete(task)
+            self._finish(job_id, JOB_COMPLETED)
+        except asyncio.CancelledError:
+            logger.info(f"Job {job_id} cancelled")
+            self._finish(job_id, JOB_CANCELLED)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            self._finish(job_id, JOB_FAILED, error=str(e))
+        finally:
+            with self.lock:
+                job['_loop'] = None
+                job['_task'] = None
+            loop.close()
+
+    def _finish(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            # Bekor qilish so'ralgan bo'lsa, holat "cancelled" bo'lib qoladi
+            job['status'] = JOB_CANCELLED if job['cancel_requested'] else status
+            job['error'] = error
+            job['finished_at'] = time.time()
+        self._publish(job_id, EVENT_END, self.snapshot(job_id))
+
+    def record_result(self, job_id: str, result: Dict[str, Any]) -> None:
+        """Bitta domen natijasi bo'yicha progress hisoblagichlarini yangilash"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            job['checked'] += 1
+            status = result.get("status")
+            if status == "Working":
+                job['working'] += 1
+            elif status == "Not Working":
+                job['not_working'] += 1
+            elif status == "Need to Check":
+                job['need_check'] += 1
+        self._publish(job_id, EVENT_RESULT, result)
+
+    def subscribe(self, job_id: str) -> Optional[queue.Queue]:
+        """
+        Vazifa hodisalariga obuna bo'lish: har bir natija (EVENT_RESULT) va
+        tugash (EVENT_END, yakuniy snapshot bilan). Vazifa topilmasa None.
+        """
+        with self.lock:
+            if job_id not in self.jobs:
+                return None
+            events = new_event_queue()
+            self.subscribers.setdefault(job_id, []).append(events)
+            return events
+
+    def unsubscribe(self, job_id: str, events: queue.Queue) -> None:
+        with self.lock:
+            subscribers = self.subscribers.get(job_id)
+            if subscribers and events in subscribers:
+                subscribers.remove(events)
+                if not subscribers:
+                    del self.subscribers[job_id]
+
+    def _publish(self, job_id: str, kind: str, data: Any) -> None:
+        with self.lock:
+            subscribers = list(self.subscribers.get(job_id, ()))
+        for events in subscribers:
+            try:
+                events.put_nowait((kind, data))
+            except queue.Full:
+                if kind == EVENT_END:
+                    # Yakuniy hodisa yo'qolmasligi kerak - eng eski hodisani chiqarib joy ochish
+                    try:
+                        events.get_nowait()
+                    except queue.Empty:
+                        pass
+                    events.put_nowait((kind, data))
+                else:
+                    with self.lock:
+                        job = self.jobs.get(job_id)
+                        if job is not None:
+                            job['dropped_events'] += 1
+
+    def cancel(self, job_id: str) -> bool:
+        """Vazifani bekor qilish. Ishlayotgan vazifaning task'i bekor qilinadi va ulanishlar yopiladi."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return False
+            if job['status'] in FINISHED_STATES:
+                return True
+            job['cancel_requested'] = True
+            loop, task = job['_loop'], job['_task']
+        if loop is not None and task is not None:
+            loop.call_soon_threadsafe(task.cancel)
+        return True
+
+    def remove(self, job_id: str) -> None:
+        """Tugagan vazifani va uning hisobot faylini o'chirish"""
+        with self.lock:
+            job = self.jobs.pop(job_id, None)
+        if job and job['output_path']:
+            try:
+                if os.path.exists(job['output_path']):
+                    os.remove(job['output_path'])
+            except Exception as e:
+                logger.error(f"Error removing report for job {job_id}: {str(e)}")
+
+    def prune(self) -> None:
+        """Saqlash muddati o'tgan tugagan vazifalarni tozalash"""
+        now = time.time()
+        with self.lock:
+            expired = [
+                job_id for job_id, job in self.jobs.items()
+                if job['status'] in FINISHED_STATES and job['finished_at']
+                and now - job['finished_at'] > self.retention
+            ]
+        for job_id in expired:
+            self.remove(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def snapshot(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Vazifaning JSON uchun yaroqli nusxasi (ichki maydonlarsiz)"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            data = {key: value for key, value in job.items() if not key.startswith('_')}
+        data.pop('output_path', None)
+        data.pop('cancel_requested', None)
+        return data
@@ -0,0 +1,369 @@
+import atexit
+import json
+import logging
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Jarayonlararo yig'ish: har bir jarayon o'z qiymatlarini shu SQLite faylga yozadi,
+# /metrics hammasini jamlaydi (gunicorn workerlari, shard jarayonlari, tugunlar)
+METRICS_PATH = os.environ.get('METRICS_PATH')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5.0))  # sekund
+METRICS_STALE_AFTER = 3 * METRICS_FLUSH_INTERVAL  # Shuncha vaqt yozmagan jarayon gauge'lari hisoblanmaydi
+METRICS_PREFIX = "domain_checker_"
+
+# Kechikishlar uchun histogram chegaralari, sekund
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_metrics: Dict[str, "Metric"] = {}
+_collectors: List[Callable[[], None]] = []
+_backend = None
+_process_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+_flusher: Optional[threading.Thread] = None
+_flush_lock = threading.Lock()
+# Umumiy faylga oxirgi yozilgan counter/histogram qiymatlari (delta shulardan hisoblanadi)
+_flushed: Dict[str, Dict[Tuple[str, ...], Any]] = {}
+
+
+class Metric:
+    """Jarayon ichidagi metrika: label qiymatlari -> qiymat. Barcha amallar _lock ostida"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = METRICS_PREFIX + name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        with _lock:
+            _metrics[self.name] = self
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> Dict[Tuple[str, ...], Any]:
+        with _lock:
+            return {key: (list(value) if isinstance(value, list) else value) for key, value in self._values.items()}
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_total(self, value: float, **labels: Any) -> None:
+        """Mavjud jami hisoblagichdan (masalan TTLCache.hits) olingan qiymat"""
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = float(value)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = float(value)
+
+
+class Histogram(Metric):
+    """Qiymat: [har bir chegara uchun son (kumulyativ emas)..., +Inf, yig'indi]"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = len(self.buckets)
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = position
+                break
+        with _lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+
+def register_collector(collector: Callable[[], None]) -> None:
+    """Har bir yozish/ko'rsatishdan oldin chaqiriladi (mavjud statistikani metrikalarga ko'chirish uchun)"""
+    _collectors.append(collector)
+
+
+def _collect() -> Dict[str, Dict[Tuple[str, ...], Any]]:
+    for collector in _collectors:
+        try:
+            collector()
+        except Exception as e:
+            logger.warning(f"Metrics collector error: {str(e)}")
+    with _lock:
+        metrics = list(_metrics.values())
+    return {metric.name: metric.samples() for metric in metrics}
+
+
+class SQLiteMetricsBackend:
+    """
+    Jarayonlar qiymatlari uchun umumiy SQLite fayl (WAL). Counter va histogramlar
+    bitta jamlangan qatorda (nom, label'lar) saqlanadi - har bir jarayon oxirgi
+    yozishdan beri o'sgan qismini (delta) qo'shadi, shuning uchun jadval hajmi
+    jarayonlar soniga bog'liq emas. Gauge'lar jarayon bo'yicha yoziladi va
+    METRICS_STALE_AFTER dan beri yangilanmagan qatorlar o'chiriladi.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS metric_totals ("
+                " name TEXT NOT NULL,"
+                " labels TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " PRIMARY KEY (name, labels))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS metric_gauges ("
+                " process TEXT NOT NULL,"
+                " name TEXT NOT NULL,"
+                " labels TEXT NOT NULL,"
+                " value REAL NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (process, name, labels))"
+            )
+            # Avvalgi format: har bir jarayon uchun cheksiz ko'payadigan qatorlar
+            conn.execute("DROP TABLE IF EXISTS metrics")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def write(self, process: str, deltas: Dict[str, Dict[Tuple[str, ...], Any]],
+              gauges: Dict[str, Dict[Tuple[str, ...], float]]) -> None:
+        """deltas - counter/histogram o'sishi, gauges - shu jarayonning joriy qiymatlari"""
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for name, samples in deltas.items():
+                for key, value in samples.items():
+                    labels = json.dumps(key)
+                    row = conn.execute("SELECT value FROM metric_totals WHERE name = ? AND labels = ?",
+                                       (name, labels)).fetchone()
+                    if row is not None:
+                        value = _add(json.loads(row[0]), value)
+                    conn.execute("INSERT OR REPLACE INTO metric_totals (name, labels, value) VALUES (?, ?, ?)",
+                                 (name, labels, json.dumps(value)))
+            conn.executemany(
+                "INSERT OR REPLACE INTO metric_gauges (process, name, labels, value, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(process, name, json.dumps(key), value, now)
+                 for name, samples in gauges.items() for key, value in samples.items()]
+            )
+            # To'xtagan jarayonlarning gauge'lari (masalan in-flight) endi haqiqiy emas
+            conn.execute("DELETE FROM metric_gauges WHERE updated_at < ?", (now - METRICS_STALE_AFTER,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def read(self) -> List[Tuple[str, Tuple[str, ...], Any]]:
+        conn = self._connection()
+        rows = conn.execute("SELECT name, labels, value FROM metric_totals").fetchall()
+        rows += conn.execute("SELECT name, labels, value FROM metric_gauges WHERE updated_at >= ?",
+                             (time.time() - METRICS_STALE_AFTER,)).fetchall()
+        return [(name, tuple(json.loads(labels)), json.loads(value) if isinstance(value, str) else value)
+                for name, labels, value in rows]
+
+
+def _add(total: Any, value: Any) -> Any:
+    if isinstance(total, list):
+        return [a + b for a, b in zip(total, value)]
+    return total + value
+
+
+def _delta(current: Any, previous: Any) -> Any:
+    """Oxirgi yozishdan beri o'sish; o'zgarmagan bo'lsa None"""
+    if previous is None:
+        changed = any(current) if isinstance(current, list) else bool(current)
+        return current if changed else None
+    if isinstance(current, list):
+        delta = [a - b for a, b in zip(current, previous)]
+        return delta if any(delta) else None
+    return current - previous if current != previous else None
+
+
+def flush_metrics() -> None:
+    """Shu jarayon qiymatlarini umumiy faylga yozish (backend sozlanmagan bo'lsa hech narsa qilmaydi)"""
+    with _flush_lock:
+        backend = _backend
+        if backend is None:
+            return
+        snapshot = _collect()
+        with _lock:
+            kinds = {name: metric.kind for name, metric in _metrics.items()}
+        deltas: Dict[str, Dict[Tuple[str, ...], Any]] = {}
+        gauges: Dict[str, Dict[Tuple[str, ...], float]] = {}
+        for name, samples in snapshot.items():
+            if kinds.get(name) == Gauge.kind:
+                gauges[name] = samples
+                continue
+            previous = _flushed.get(name, {})
+            for key, value in samples.items():
+                delta = _delta(value, previous.get(key))
+                if delta is not None:
+                    deltas.setdefault(name, {})[key] = delta
+        try:
+            backend.write(_process_id, deltas, gauges)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Metrics flush error: {str(e)}")
+            return
+        # Faqat muvaffaqiyatli yozilgan qiymatlar - keyingi delta shulardan hisoblanadi
+        for name, samples in snapshot.items():
+            if kinds.get(name) != Gauge.kind:
+                _flushed[name] = samples
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(METRICS_FLUSH_INTERVAL)
+        flush_metrics()
+
+
+def configure_metrics(path: Optional[str] = METRICS_PATH) -> Any:
+    """
+    Jarayonlararo yig'ishni yoqish: qiymatlar har METRICS_FLUSH_INTERVAL da va jarayon
+    tugashida yoziladi. path bo'sh bo'lsa, /metrics faqat shu jarayonni ko'rsatadi.
+    """
+    global _backend, _flusher
+    backend = None
+    if path:
+        try:
+            backend = SQLiteMetricsBackend(path)
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Could not open metrics store {path}: {str(e)}")
+    with _flush_lock:
+        # Yangi faylga jami qiymatlar yoziladi
+        _flushed.clear()
+        _backend = backend
+    if backend is not None and _flusher is None:
+        _flusher = threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True)
+        _flusher.start()
+        atexit.register(flush_metrics)
+    return backend
+
+
+def get_metrics_backend() -> Any:
+    return _backend
+
+
+def _merge(metric: Metric, total: Any, value: Any) -> Any:
+    if total is None:
+        return list(value) if isinstance(metric, Histogram) else value
+    if isinstance(metric, Histogram):
+        return [a + b for a, b in zip(total, value)]
+    return total + value
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render_metrics() -> str:
+    """Barcha jarayonlar bo'yicha jamlangan qiymatlar - Prometheus text format (0.0.4)"""
+    with _lock:
+        metrics = dict(_metrics)
+    totals: Dict[str, Dict[Tuple[str, ...], Any]] = {name: {} for name in metrics}
+
+    backend = _backend
+    rows = None
+    if backend is not None:
+        flush_metrics()
+        try:
+            rows = backend.read()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Metrics read error: {str(e)}")
+    if rows is None:
+        # Faqat shu jarayon
+        rows = [(name, key, value) for name, samples in _collect().items() for key, value in samples.items()]
+
+    for name, key, value in rows:
+        metric = metrics.get(name)
+        if metric is None or len(key) != len(metric.labelnames):
+            continue
+        totals[name][key] = _merge(metric, totals[name].get(key), value)
+
+    lines = []
+    for name, metric in sorted(metrics.items()):
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        for key, value in sorted(totals[name].items()):
+            if isinstance(metric, Histogram):
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (math.inf,), value[:-1]):
+                    cumulative += count
+                    labels = _format_labels(metric.labelnames, key, ("le", _format_value(bound)))
+                    lines.append(f"{name}_bucket{labels} {cumulative}")
+                labels = _format_labels(metric.labelnames, key)
+                lines.append(f"{name}_sum{labels} {_format_value(value[-1])}")
+                lines.append(f"{name}_count{labels} {cumulative}")
+            else:
+                lines.append(f"{name}{_format_labels(metric.labelnames, key)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# Tekshiruv metrikalari
+PROBE_PHASE_SECONDS = Histogram(
+    "probe_phase_seconds", "Time spent in each probe phase (dns, connect, tls, first_byte, body, parse)", ("phase",)
+)
+PROBE_SECONDS = Histogram("probe_seconds", "Total time of one domain check")
+PROBES_TOTAL = Counter("probes_total", "Checked domains by status and outcome", ("status", "outcome"))
+PROBES_IN_FLIGHT = Gauge("probes_in_flight", "Domain checks currently running")
+PROBE_RETRIES_TOTAL = Counter("probe_retries_total", "Probe retries by reason", ("reason",))
+HTTP_RESPONSES_TOTAL = Counter("http_responses_total", "HTTP responses by status class", ("code",))
+CACHE_LOOKUPS_TOTAL = Counter("cache_lookups_total", "In-memory cache lookups", ("cache", "result"))
+RESULT_STORE_LOOKUPS_TOTAL = Counter("result_store_lookups_total", "Result store lookups", ("result",))
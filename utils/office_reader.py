@@ -0,0 +1,242 @@
+import logging
+import multiprocessing
+import os
+import posixpath
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from xml.etree.ElementTree import iterparse
+
+logger = logging.getLogger(__name__)
+
+# SpreadsheetML nomlar fazolari
+SHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PACKAGE_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+# WordprocessingML
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+OFFICE_DOCUMENT_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+
+# Varaqlarni parallel tahlil qilish: varaqlar XML hajmi shundan katta bo'lsa va bir nechta varaq bo'lsa
+XLSX_WORKERS = int(os.environ.get('XLSX_WORKERS', 0)) or min(4, os.cpu_count() or 1)
+XLSX_PARALLEL_MIN_BYTES = 32 * 1024 * 1024  # siqilmagan XML hajmi
+
+
+class UnsupportedWorkbook(Exception):
+    """Tezkor o'quvchi bu faylni tushunmaydi (masalan Strict OOXML) - openpyxl ishlatiladi"""
+
+
+class UnsupportedDocument(Exception):
+    """.docx ichida WordprocessingML hujjati topilmadi"""
+
+
+def _xlsx_sheet_paths(archive: zipfile.ZipFile) -> List[str]:
+    """Varaq fayllari workbook.xml dagi tartibda"""
+    targets: Dict[str, str] = {}
+    with archive.open('xl/_rels/workbook.xml.rels') as rels:
+        for _, elem in iterparse(rels):
+            if elem.tag == PACKAGE_REL_NS + 'Relationship':
+                target = elem.get('Target', '')
+                if target.startswith('/'):
+                    path = target.lstrip('/')
+                else:
+                    path = posixpath.normpath(posixpath.join('xl', target))
+                targets[elem.get('Id')] = path
+
+    paths = []
+    names = set(archive.namelist())
+    with archive.open('xl/workbook.xml') as workbook:
+        for _, elem in iterparse(workbook):
+            if elem.tag == SHEET_NS + 'sheet':
+                path = targets.get(elem.get(REL_NS + 'id'))
+                if path in names:
+                    paths.append(path)
+    if not paths and any(name.startswith('xl/worksheets/') for name in names):
+        # Nomlar fazosi boshqacha (Strict OOXML) - varaqlar topilmadi
+        raise UnsupportedWorkbook("Workbook sheets not found")
+    return paths
+
+
+def _xlsx_shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    """sharedStrings.xml ni bir marta o'qish (rich text qismlari birlashtiriladi, fonetik matn tashlanadi)"""
+    try:
+        source = archive.open('xl/sharedStrings.xml')
+    except KeyError:
+        return []
+
+    strings = []
+    text_tag, run_tag, item_tag = SHEET_NS + 't', SHEET_NS + 'r', SHEET_NS + 'si'
+    with source:
+        for _, elem in iterparse(source):
+            if elem.tag != item_tag:
+                continue
+            parts = []
+            for child in elem:
+                if child.tag == text_tag:
+                    parts.append(child.text or '')
+                elif child.tag == run_tag:
+                    run_text = child.find(text_tag)
+                    if run_text is not None:
+                        parts.append(run_text.text or '')
+            strings.append(''.join(parts))
+            elem.clear()
+    return strings
+
+
+def _inline_text(cell) -> str:
+    inline = cell.find(SHEET_NS + 'is')
+    if inline is None:
+        return ''
+    return ''.join(text.text or '' for text in inline.iter(SHEET_NS + 't'))
+
+
+def _iter_sheet_cells(archive: zipfile.ZipFile, sheet_path: str) -> Iterator[Tuple[Optional[int], Optional[str]]]:
+    """
+    Varaqdagi faqat matnli kataklar: (shared string indeksi, None) yoki (None, matn).
+    Sonli, mantiqiy, sana va xato kataklari o'tkazib yuboriladi. Qatorlar o'qilgach
+    daraxtdan olib tashlanadi - xotira varaq hajmiga bog'liq emas.
+    """
+    cell_tag, row_tag, sheet_data_tag = SHEET_NS + 'c', SHEET_NS + 'row', SHEET_NS + 'sheetData'
+    value_tag = SHEET_NS + 'v'
+    sheet_data = None
+    with archive.open(sheet_path) as source:
+        for event, elem in iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                if elem.tag == sheet_data_tag:
+                    sheet_data = elem
+                continue
+
+            if elem.tag == cell_tag:
+                cell_type = elem.get('t')
+                if cell_type == 's':
+                    value = elem.findtext(value_tag)
+                    if value:
+                        yield int(value), None
+                elif cell_type == 'inlineStr':
+                    yield None, _inline_text(elem)
+                elif cell_type == 'str':
+                    # Formula natijasi (data_only=True dagi kabi keshdagi qiymat)
+                    yield None, elem.findtext(value_tag) or ''
+            elif elem.tag == row_tag and sheet_data is not None:
+                sheet_data.remove(elem)
+
+
+def _sheet_strings(file_path: str, sheet_path: str) -> Tuple[Set[int], Set[str]]:
+    """Parallel rejim uchun: bitta varaqdagi shared string indekslari va inline matnlar"""
+    indexes: Set[int] = set()
+    texts: Set[str] = set()
+    with zipfile.ZipFile(file_path) as archive:
+        for index, text in _iter_sheet_cells(archive, sheet_path):
+            if index is not None:
+                indexes.add(index)
+            elif text:
+                texts.add(text)
+    return indexes, texts
+
+
+def iter_xlsx_strings(file_path: str, workers: Optional[int] = None) -> Iterator[str]:
+    """
+    .xlsx dan barcha matnli katak qiymatlarini openpyxl katak obyektlarisiz olish.
+    Zip ichidagi sharedStrings.xml bir marta o'qiladi, varaqlar iterparse bilan
+    oqimda tahlil qilinadi. Varaqlar katta bo'lsa, ular jarayonlar pool'ida
+    parallel tahlil qilinadi (workers=1 - o'chirish). Takroriy qiymatlar bir marta qaytadi.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        sheet_paths = _xlsx_sheet_paths(archive)
+        shared_strings = _xlsx_shared_strings(archive)
+        sheets_size = sum(archive.getinfo(path).file_size for path in sheet_paths)
+
+        workers = XLSX_WORKERS if workers is None else workers
+        if workers > 1 and len(sheet_paths) > 1 and sheets_size >= XLSX_PARALLEL_MIN_BYTES:
+            # spawn: chaqiruvchi jarayon ko'p thread'li (Flask / vazifalar), fork xavfsiz emas
+            with ProcessPoolExecutor(max_workers=min(workers, len(sheet_paths)),
+                                     mp_context=multiprocessing.get_context('spawn')) as pool:
+                seen_indexes: Set[int] = set()
+                seen_texts: Set[str] = set()
+                for indexes, texts in pool.map(_sheet_strings, [file_path] * len(sheet_paths), sheet_paths):
+                    for index in indexes - seen_indexes:
+                        if index < len(shared_strings):
+                            yield shared_strings[index]
+                    for text in texts - seen_texts:
+                        yield text
+                    seen_indexes |= indexes
+                    seen_texts |= texts
+            return
+
+        seen_indexes = set()
+        for sheet_path in sheet_paths:
+            for index, text in _iter_sheet_cells(archive, sheet_path):
+                if index is None:
+                    yield text
+                elif index not in seen_indexes and index < len(shared_strings):
+                    seen_indexes.add(index)
+                    yield shared_strings[index]
+
+
+def _docx_document_path(archive: zipfile.ZipFile) -> str:
+    """Asosiy hujjat qismi (odatda word/document.xml) _rels/.rels bo'yicha"""
+    try:
+        with archive.open('_rels/.rels') as rels:
+            for _, elem in iterparse(rels):
+                if elem.tag == PACKAGE_REL_NS + 'Relationship' and elem.get('Type') == OFFICE_DOCUMENT_REL:
+                    return elem.get('Target', '').lstrip('/')
+    except KeyError:
+        pass
+    return 'word/document.xml'
+
+
+def iter_docx_texts(file_path: str) -> Iterator[str]:
+    """
+    .docx dan matnni python-docx DOM'isiz olish: word/document.xml zip ichidan
+    iterparse bilan oqimda o'qiladi. Har bir paragraf (w:t qismlari birlashtiriladi,
+    w:tab - tab, w:br/w:cr - yangi qator) alohida qaytadi; jadval katagidagi
+    paragraflar bitta matn sifatida, katak oxirida bir marta qaytadi (birlashtirilgan
+    kataklar ham). Tugagan elementlar daraxtdan olib tashlanadi - xotira hujjat
+    hajmiga bog'liq emas.
+    """
+    paragraph_tag, cell_tag, body_tag = WORD_NS + 'p', WORD_NS + 'tc', WORD_NS + 'body'
+    text_tag = WORD_NS + 't'
+    separators = {WORD_NS + 'tab': '\t', WORD_NS + 'br': '\n', WORD_NS + 'cr': '\n'}
+
+    with zipfile.ZipFile(file_path) as archive:
+        document_path = _docx_document_path(archive)
+        with archive.open(document_path) as source:
+            elements = []  # ochiq elementlar zanjiri
+            buffers: List[List[str]] = []  # ochiq paragraf va kataklar matni
+            body_found = False
+            for event, elem in iterparse(source, events=('start', 'end')):
+                tag = elem.tag
+                if event == 'start':
+                    elements.append(elem)
+                    if tag == paragraph_tag or tag == cell_tag:
+                        buffers.append([])
+                    elif tag == body_tag:
+                        body_found = True
+                    continue
+
+                elements.pop()
+                if tag == text_tag:
+                    if buffers and elem.text:
+                        buffers[-1].append(elem.text)
+                elif tag in separators:
+                    if buffers:
+                        buffers[-1].append(separators[tag])
+                elif tag == paragraph_tag:
+                    text = ''.join(buffers.pop())
+                    parent = elements[-1] if elements else None
+                    if parent is not None and parent.tag == cell_tag:
+                        # Katak paragraflari katak bilan birga qaytadi
+                        buffers[-1].append(text)
+                    elif text:
+                        yield text
+                elif tag == cell_tag:
+                    text = '\n'.join(buffers.pop())
+                    if text.strip():
+                        yield text
+
+                # Tanadagi yuqori darajali elementlar (paragraf, jadval) tugagach olib tashlanadi
+                if elements and elements[-1].tag == body_tag:
+                    elements[-1].remove(elem)
+
+    if not body_found:
+        raise UnsupportedDocument(f"WordprocessingML body not found in {document_path}")
@@ -0,0 +1,80 @@
+import asyncio
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from utils.html_extractor import parse_page
+
+logger = logging.getLogger(__name__)
+
+# HTML tahlilini alohida jarayonlarda bajarish (ixtiyoriy, PARSE_POOL=1 bilan yoqiladi)
+PARSE_POOL_ENABLED = os.environ.get('PARSE_POOL', '0').lower() in ('1', 'true', 'yes')
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', os.cpu_count() or 1))
+PARSE_PENDING_PER_WORKER = 2  # Har bir jarayon uchun navbatdagi vazifalar soni (backpressure)
+PARSE_INLINE_LIMIT = 16384  # bayt - kichik sahifalarni IPC'siz shu yerning o'zida tahlil qilish arzonroq
+
+
+class ParseExecutor:
+    """
+    HTML tahlilini ProcessPoolExecutor'ga yuboradi, event loop esa I/O bilan band bo'ladi.
+    Jarayonlarga faqat kesilgan tana baytlari yuboriladi va faqat (title, page_type)
+    qaytadi. Pool band bo'lsa, yangi tahlillar slot bo'shashini kutadi.
+    """
+
+    def __init__(self, max_workers: int = PARSE_WORKERS, max_pending: Optional[int] = None,
+                 inline_limit: int = PARSE_INLINE_LIMIT):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max_pending or self.max_workers * PARSE_PENDING_PER_WORKER
+        self.inline_limit = inline_limit
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Har bir vazifa o'z event loop'ida ishlaydi, semafor loop'ga bog'lanadi
+        self._semaphores: Dict[int, asyncio.Semaphore] = {}
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: ko'p thread'li worker jarayonidan fork qilish xavfsiz emas
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                logger.info(f"Started HTML parse pool with {self.max_workers} processes")
+            return self._pool
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop_id = id(asyncio.get_running_loop())
+        with self._lock:
+            semaphore = self._semaphores.get(loop_id)
+            if semaphore is None:
+                semaphore = self._semaphores[loop_id] = asyncio.Semaphore(self.max_pending)
+            return semaphore
+
+    def release_loop(self) -> None:
+        """Vazifa tugaganda uning loop'iga tegishli semaforni unutish"""
+        with self._lock:
+            self._semaphores.pop(id(asyncio.get_running_loop()), None)
+
+    async def parse(self, body: bytes, encoding: Optional[str] = None) -> Tuple[str, str]:
+        if len(body) < self.inline_limit:
+            return parse_page(body, encoding)
+
+        async with self._semaphore():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.pool, parse_page, body, encoding)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+# Barcha vazifalar uchun umumiy pool (kerak bo'lganda ishga tushadi)
+parse_executor = ParseExecutor()
+atexit.register(parse_executor.shutdown)
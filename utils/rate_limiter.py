@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Registrable domen (masalan example.com) bo'yicha cheklovlar
+HOST_RATE_LIMIT = float(os.environ.get('HOST_RATE_LIMIT', 5))  # so'rov/sekund
+HOST_BURST = int(os.environ.get('HOST_BURST', 5))
+HOST_CONCURRENCY = int(os.environ.get('HOST_CONCURRENCY', 4))
+
+# Resolve qilingan IP bo'yicha cheklovlar (shared hosting)
+IP_RATE_LIMIT = float(os.environ.get('IP_RATE_LIMIT', 10))
+IP_BURST = int(os.environ.get('IP_BURST', 10))
+IP_CONCURRENCY = int(os.environ.get('IP_CONCURRENCY', 8))
+
+# 429 / Retry-After bo'yicha backoff
+BACKOFF_DEFAULT = 5.0  # sekund, Retry-After bo'lmaganda
+BACKOFF_MAX = 60.0  # sekund, Retry-After shundan katta bo'lsa ham kesiladi
+BACKOFF_RATE_FACTOR = 0.5  # Har bir 429 dan keyin rate shunchaga ko'paytiriladi
+MIN_RATE_FACTOR = 0.1  # Rate asosiy qiymatning shu ulushidan pastga tushmaydi
+RECOVERY_FACTOR = 1.1  # Muvaffaqiyatli javobdan keyin rate tiklanishi
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After sarlavhasini (sekund yoki HTTP-sana) sekundlarga aylantirish"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+class TokenBucket:
+    """
+    Asinxron token bucket. Sekundiga `rate` token to'planadi, `burst` tagacha.
+    penalize() bucket'ni vaqtincha to'xtatadi va rate'ni kamaytiradi.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def penalize(self, delay: float) -> None:
+        now = time.monotonic()
+        self.blocked_until = max(self.blocked_until, now + delay)
+        self.rate = max(self.base_rate * MIN_RATE_FACTOR, self.rate * BACKOFF_RATE_FACTOR)
+        self.tokens = 0.0
+        self.updated = now
+
+    def reward(self) -> None:
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate * RECOVERY_FACTOR)
+
+
+class PolitenessLimiter:
+    """
+    Registrable domen va IP bo'yicha token bucket'lar hamda parallel so'rovlar
+    cheklovi. Bitta vazifa (job) uchun bitta nusxa yaratiladi.
+    """
+
+    def __init__(self,
+                 host_rate: float = HOST_RATE_LIMIT, host_burst: int = HOST_BURST,
+                 host_concurrency: int = HOST_CONCURRENCY,
+                 ip_rate: float = IP_RATE_LIMIT, ip_burst: int = IP_BURST,
+                 ip_concurrency: int = IP_CONCURRENCY):
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.host_concurrency = host_concurrency
+        self.ip_rate = ip_rate
+        self.ip_burst = ip_burst
+        self.ip_concurrency = ip_concurrency
+        self._host_buckets: Dict[str, TokenBucket] = {}
+        self._ip_buckets: Dict[str, TokenBucket] = {}
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._ip_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.backoffs = 0
+
+    def _host_bucket(self, key: str) -> TokenBucket:
+        if key not in self._host_buckets:
+            self._host_buckets[key] = TokenBucket(self.host_rate, self.host_burst)
+        return self._host_buckets[key]
+
+    def _ip_bucket(self, ip: str) -> TokenBucket:
+        if ip not in self._ip_buckets:
+            self._ip_buckets[ip] = TokenBucket(self.ip_rate, self.ip_burst)
+        return self._ip_buckets[ip]
+
+    @asynccontextmanager
+    async def slot(self, host_key: str, ip: Optional[str] = None) -> AsyncIterator[None]:
+        """
+        Host (va IP) uchun navbat kutish. Semaforlar doim host -> IP tartibida
+        olinadi, shuning uchun workerlar bir-birini bloklab qo'ymaydi.
+        """
+        host_semaphore = self._host_semaphores.setdefault(host_key, asyncio.Semaphore(self.host_concurrency))
+        ip_semaphore = None
+        if ip:
+            ip_semaphore = self._ip_semaphores.setdefault(ip, asyncio.Semaphore(self.ip_concurrency))
+
+        async with host_semaphore:
+            if ip_semaphore is None:
+                await self._host_bucket(host_key).acquire()
+                yield
+                return
+            async with ip_semaphore:
+                await self._host_bucket(host_key).acquire()
+                await self._ip_bucket(ip).acquire()
+                yield
+
+    def feedback(self, host_key: str, ip: Optional[str], status_code: Optional[int],
+                 retry_after: Optional[str] = None) -> Optional[float]:
+        """
+        Javob bo'yicha bucket'larni sozlash. 429 yoki Retry-After bo'lsa backoff
+        qo'llanadi va kutish vaqti (sekund) qaytariladi, aks holda None.
+        """
+        delay = parse_retry_after(retry_after)
+        if status_code == 429 or (status_code == 503 and delay is not None):
+            delay = min(BACKOFF_MAX, delay if delay is not None else BACKOFF_DEFAULT)
+            self._host_bucket(host_key).penalize(delay)
+            if ip:
+                self._ip_bucket(ip).penalize(delay)
+            self.backoffs += 1
+            logger.info(f"Backing off {host_key} ({ip or 'unknown IP'}) for {delay:.1f}s after {status_code}")
+            return delay
+
+        if status_code is not None and status_code < 400:
+            self._host_bucket(host_key).reward()
+            if ip:
+                self._ip_bucket(ip).reward()
+        return None
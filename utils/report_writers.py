@@ -0,0 +1,121 @@
+import csv
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, Optional
+
+from utils.excel_generator import REPORT_HEADERS, generate_excel, translate_result
+
+logger = logging.getLogger(__name__)
+
+# Parquet ixtiyoriy - pyarrow o'rnatilgan bo'lsagina mavjud
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Mashina uchun formatlarda ustun nomlari (qiymatlar Excel'dagi kabi tarjima qilingan)
+REPORT_FIELDS = ["number", "domain", "status", "status_code", "page_type", "title"]
+PARQUET_BATCH_SIZE = 10000  # Parquet'ga shuncha qatorlik guruhlar bilan yoziladi
+DEFAULT_REPORT_FORMAT = "xlsx"
+
+
+def _rows(results: Iterable[Dict[str, Any]]):
+    for number, result in enumerate(results, 1):
+        yield (number,) + translate_result(result)
+
+
+def write_csv(results: Iterable[Dict[str, Any]], output_path: str) -> bool:
+    """CSV hisobot (Excel sarlavhalari bilan, UTF-8 BOM - Excel o'zbekcha harflarni to'g'ri ochishi uchun)"""
+    with open(output_path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(REPORT_HEADERS)
+        writer.writerows(_rows(results))
+    logger.info(f"CSV report successfully generated at {output_path}")
+    return True
+
+
+def write_ndjson(results: Iterable[Dict[str, Any]], output_path: str) -> bool:
+    """JSON Lines: har bir qatorda bitta natija obyekti"""
+    with open(output_path, "w", encoding="utf-8") as f:
+        for row in _rows(results):
+            f.write(json.dumps(dict(zip(REPORT_FIELDS, row)), ensure_ascii=False))
+            f.write("\n")
+    logger.info(f"NDJSON report successfully generated at {output_path}")
+    return True
+
+
+def write_parquet(results: Iterable[Dict[str, Any]], output_path: str) -> bool:
+    """Parquet hisobot - qatorlar PARQUET_BATCH_SIZE lik guruhlarda yoziladi"""
+    if pyarrow is None:
+        raise RuntimeError("Parquet format requires pyarrow")
+
+    schema = pyarrow.schema(
+        [pyarrow.field("number", pyarrow.int64())]
+        + [pyarrow.field(name, pyarrow.string()) for name in REPORT_FIELDS[1:]]
+    )
+
+    def flush(writer, batch):
+        columns = list(zip(*batch))
+        writer.write_table(pyarrow.Table.from_arrays(
+            [pyarrow.array(column, type=field.type) for column, field in zip(columns, schema)],
+            schema=schema
+        ))
+
+    with pyarrow.parquet.ParquetWriter(output_path, schema) as writer:
+        batch = []
+        for row in _rows(results):
+            batch.append(row)
+            if len(batch) >= PARQUET_BATCH_SIZE:
+                flush(writer, batch)
+                batch = []
+        if batch:
+            flush(writer, batch)
+    logger.info(f"Parquet report successfully generated at {output_path}")
+    return True
+
+
+# format -> (yozuvchi, fayl kengaytmasi, MIME turi)
+REPORT_FORMATS = {
+    "xlsx": (generate_excel, "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": (write_csv, "csv", "text/csv"),
+    "ndjson": (write_ndjson, "ndjson", "application/x-ndjson"),
+    "parquet": (write_parquet, "parquet", "application/vnd.apache.parquet"),
+}
+# Qo'shimcha nomlar
+FORMAT_ALIASES = {"excel": "xlsx", "jsonl": "ndjson"}
+
+
+def available_formats():
+    """Shu muhitda ishlatish mumkin bo'lgan formatlar"""
+    return [name for name in REPORT_FORMATS if name != "parquet" or pyarrow is not None]
+
+
+def resolve_format(name: Optional[str]) -> Optional[str]:
+    """Format nomini tekshirish; noma'lum yoki mavjud bo'lmasa None"""
+    name = (name or DEFAULT_REPORT_FORMAT).strip().lower()
+    name = FORMAT_ALIASES.get(name, name)
+    return name if name in available_formats() else None
+
+
+def format_from_path(output_path: str) -> str:
+    extension = os.path.splitext(output_path)[1].lstrip(".").lower()
+    for name, (_, format_extension, _) in REPORT_FORMATS.items():
+        if format_extension == extension:
+            return name
+    return DEFAULT_REPORT_FORMAT
+
+
+def write_report(results: Iterable[Dict[str, Any]], output_path: str, report_format: Optional[str] = None) -> bool:
+    """
+    Natijalarni tanlangan formatda yozish (format berilmasa fayl kengaytmasidan).
+    results - ro'yxat yoki iterator; barcha yozuvchilar qatorlarni oqim bilan yozadi.
+    """
+    report_format = report_format or format_from_path(output_path)
+    writer = REPORT_FORMATS[report_format][0]
+    try:
+        return writer(results, output_path)
+    except Exception as e:
+        logger.error(f"Error generating {report_format} report: {str(e)}")
+        return False
@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Natija qancha vaqt "yangi" hisoblanadi (sekund), holat bo'yicha
+RESULT_TTLS = {
+    "Working": 6 * 3600,
+    "Not Working": 2 * 3600,
+    "Need to Check": 15 * 60,
+}
+# Sarlavha bo'yicha alohida muddatlar (status TTL'idan ustun)
+TITLE_TTLS = {
+    "DNS resolution failed": 3600,
+    "Timeout": 10 * 60,
+}
+# Vaqtinchalik tarmoq xatolari sog'liq keshidagi "poor" belgisidan (HEALTH_POOR_TTL) uzoq saqlanmaydi,
+# aks holda qisqa uzilishdan keyin domen hisobotlarda soatlab "Not Working" bo'lib qoladi
+TRANSIENT_ERROR_TTL = int(os.environ.get('HEALTH_POOR_TTL', 300))
+TRANSIENT_ERROR_TITLES = ("Request Error",)
+# Tekshiruvsiz, keshdan yasalgan natijalar - saqlanmaydi
+SYNTHESIZED_TITLES = ("Previously unreachable domain",)
+DEFAULT_RESULT_TTL = 15 * 60
+
+PROTOCOL_PATTERN = re.compile(r'^https?://')
+
+
+def normalize_key(domain: str) -> str:
+    """Kesh kaliti: kichik harf, protokolsiz, oxirgi '/' siz"""
+    return PROTOCOL_PATTERN.sub('', domain.strip().lower()).rstrip('/')
+
+
+def result_ttl(result: Dict[str, Any]) -> int:
+    """Natija turi bo'yicha yangilik muddati. 0 - saqlanmaydi."""
+    title = result.get("title") or ""
+    # Tekshiruvning o'zidagi ichki xatolar keshlanmaydi
+    if title.startswith("Error") or title in ("Batch processing error", "Timeout during processing"):
+        return 0
+    if title in SYNTHESIZED_TITLES:
+        return 0
+    if title in TRANSIENT_ERROR_TITLES:
+        return TRANSIENT_ERROR_TTL
+    if title in TITLE_TTLS:
+        return TITLE_TTLS[title]
+    return RESULT_TTLS.get(result.get("status"), DEFAULT_RESULT_TTL)
+
+
+class ResultStore:
+    """
+    Vazifalar orasida saqlanadigan natijalar ombori (SQLite fayl).
+    Kalit - normallashtirilgan domen, qiymat - check_domain natijasi va vaqt belgisi.
+    Har bir thread o'z ulanishidan foydalanadi.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " domain TEXT PRIMARY KEY,"
+                " result TEXT NOT NULL,"
+                " checked_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_expires_at ON results (expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, domains: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Yangi (muddati o'tmagan) natijalarni normallashtirilgan kalit bo'yicha qaytarish"""
+        keys = list({normalize_key(domain) for domain in domains})
+        now = time.time()
+        found = {}
+        conn = self._connection()
+        # SQLite parametrlar soni cheklangan - bo'laklab so'rash
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT domain, result FROM results WHERE expires_at > ? AND domain IN ({placeholders})",
+                [now, *chunk]
+            )
+            for domain, payload in rows:
+                try:
+                    found[domain] = json.loads(payload)
+                except ValueError:
+                    continue
+        return found
+
+    def put_many(self, results: Iterable[Dict[str, Any]]) -> int:
+        """Natijalarni holatiga mos TTL bilan saqlash. Saqlanganlar sonini qaytaradi."""
+        now = time.time()
+        rows = []
+        for result in results:
+            ttl = result_ttl(result)
+            if ttl <= 0 or not result.get("domain"):
+                continue
+            rows.append((normalize_key(result["domain"]), json.dumps(result), now, now + ttl))
+        if not rows:
+            return 0
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO results (domain, result, checked_at, expires_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def purge_expired(self) -> int:
+        with self._connection() as conn:
+            return conn.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),)).rowcount
+
+
+_result_store: Optional[ResultStore] = None
+
+
+def configure_result_store(path: Optional[str]) -> Optional[ResultStore]:
+    """Umumiy natijalar omborini sozlash (None - o'chirish)"""
+    global _result_store
+    if not path:
+        _result_store = None
+        return None
+    try:
+        _result_store = ResultStore(path)
+        logger.info(f"Result store at {path}")
+    except (sqlite3.Error, OSError) as e:
+        logger.error(f"Could not open result store {path}: {str(e)}")
+        _result_store = None
+    return _result_store
+
+
+def get_result_store() -> Optional[ResultStore]:
+    return _result_store
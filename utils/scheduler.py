@@ -0,0 +1,163 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Natija turlari (AIMD uchun)
+OUTCOME_OK = "ok"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_ERROR = "error"
+
+# AIMD sozlamalari
+AIMD_WINDOW = 20  # Har shuncha tugallangan tekshiruvdan keyin limit qayta hisoblanadi
+AIMD_INCREASE_STEP = 2  # Additive increase
+AIMD_DECREASE_FACTOR = 0.7  # Multiplicative decrease
+AIMD_FAILURE_THRESHOLD = 0.2  # Timeout + xatolar ulushi shundan oshsa, limit kamayadi
+LOOP_LAG_THRESHOLD = 0.1  # sekund - event loop shundan ko'p kechiksa, limit kamayadi
+LOOP_LAG_INTERVAL = 0.25  # sekund - event loop kechikishini o'lchash oralig'i
+
+
+class AdaptiveLimiter:
+    """
+    AIMD uslubidagi moslashuvchan parallellik limiti.
+    Timeout/xatolar ulushi yoki event loop kechikishi oshsa limit kamayadi,
+    aks holda asta-sekin floor va ceiling oralig'ida o'sadi.
+    """
+
+    def __init__(self, initial: int, floor: int, ceiling: int,
+                 window: int = AIMD_WINDOW,
+                 increase_step: float = AIMD_INCREASE_STEP,
+                 decrease_factor: float = AIMD_DECREASE_FACTOR,
+                 failure_threshold: float = AIMD_FAILURE_THRESHOLD,
+                 lag_threshold: float = LOOP_LAG_THRESHOLD):
+        self.floor = max(1, floor)
+        self.ceiling = max(self.floor, ceiling)
+        self.limit = float(min(max(initial, self.floor), self.ceiling))
+        self.window = window
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.failure_threshold = failure_threshold
+        self.lag_threshold = lag_threshold
+
+        self.in_flight = 0
+        self.loop_lag = 0.0
+        self.peak_in_flight = 0
+        self._completed = 0
+        self._failures = 0
+        self._condition: Optional[asyncio.Condition] = None
+
+    @property
+    def condition(self) -> asyncio.Condition:
+        # Condition joriy event loop ichida yaratiladi
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire(self) -> None:
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    async def release(self, outcome: Optional[str] = None) -> None:
+        async with self.condition:
+            self.in_flight -= 1
+            if outcome is not None:
+                self._record(outcome)
+            self.condition.notify_all()
+
+    def _record(self, outcome: str) -> None:
+        self._completed += 1
+        if outcome in (OUTCOME_TIMEOUT, OUTCOME_ERROR):
+            self._failures += 1
+        if self._completed >= self.window:
+            self._adjust()
+
+    def _adjust(self) -> None:
+        failure_rate = self._failures / self._completed
+        previous = int(self.limit)
+        if failure_rate > self.failure_threshold or self.loop_lag > self.lag_threshold:
+            self.limit = max(self.floor, self.limit * self.decrease_factor)
+        else:
+            self.limit = min(self.ceiling, self.limit + self.increase_step)
+        if int(self.limit) != previous:
+            logger.debug(
+                f"Concurrency limit {previous} -> {int(self.limit)} "
+                f"(failure rate {failure_rate:.2f}, loop lag {self.loop_lag * 1000:.0f}ms)"
+            )
+        self._completed = 0
+        self._failures = 0
+
+    async def monitor_loop_lag(self, interval: float = LOOP_LAG_INTERVAL) -> None:
+        """Event loop kechikishini o'lchash (EWMA) - fon task sifatida ishlaydi"""
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - start - interval)
+            self.loop_lag = 0.8 * self.loop_lag + 0.2 * lag
+
+
+class RatePacer:
+    """Yangi tekshiruvlar boshlanishini sekundiga `rate` tagacha cheklash"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_start = 0.0
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        start = max(now, self._next_start)
+        self._next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+async def run_work_queue(items: Iterable[Any],
+                         worker: Callable[[Any], Awaitable[Any]],
+                         limiter: AdaptiveLimiter,
+                         classify: Callable[[Any], str],
+                         on_result: Callable[[Any, Any], None],
+                         pacer: Optional[RatePacer] = None) -> None:
+    """
+    Sliding-window scheduler: ceiling ta worker coroutine navbatdan keyingi
+    elementni slot bo'shashi bilan oladi. Faol workerlar soni limiter orqali cheklanadi.
+    worker o'zi xatolarni ushlab, natija qaytarishi kerak; baribir xato ko'tarsa, element
+    xato deb hisoblanadi (on_result chaqirilmaydi) va navbat davom etadi.
+    """
+    iterator = iter(items)
+    lag_task = asyncio.create_task(limiter.monitor_loop_lag())
+
+    async def worker_loop() -> None:
+        while True:
+            await limiter.acquire()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                await limiter.release()
+                return
+
+            outcome = OUTCOME_ERROR
+            try:
+                if pacer is not None:
+                    await pacer.wait()
+                result = await worker(item)
+                outcome = classify(result)
+                on_result(item, result)
+            except Exception as e:
+                # Bitta element xatosi qolgan navbatni to'xtatmasin
+                logger.error(f"Work queue item {item!r} failed: {type(e).__name__}: {str(e)}")
+            finally:
+                await limiter.release(outcome)
+
+    try:
+        await asyncio.gather(*(worker_loop() for _ in range(limiter.ceiling)))
+    finally:
+        lag_task.cancel()
+        logger.info(
+            f"Scheduler finished: limit {int(limiter.limit)}, peak in-flight {limiter.peak_in_flight}, "
+            f"loop lag {limiter.loop_lag * 1000:.0f}ms"
+        )
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Union
+
+from utils.cache import configure_shared_cache, flush_shared_cache, get_shared_backend
+from utils.deadlines import JobProgress
+from utils.domain_checker import check_domains, error_result
+from utils.file_reader import DomainRecord, normalize_domains
+from utils.metrics import configure_metrics, flush_metrics, get_metrics_backend
+from utils.result_store import configure_result_store, get_result_store
+
+logger = logging.getLogger(__name__)
+
+# Katta ro'yxatlarni jarayonlarga bo'lib tekshirish: har bir shard o'z jarayonida,
+# o'z event loop'i va connection pool'i bilan ishlaydi
+SHARD_WORKERS = int(os.environ.get('SHARD_WORKERS', os.cpu_count() or 1))
+SHARD_SIZE = int(os.environ.get('SHARD_SIZE', 1000))  # Bir sharddagi domenlar soni (taxminan)
+SHARD_MIN_DOMAINS = int(os.environ.get('SHARD_MIN_DOMAINS', 1000))  # Bundan kam bo'lsa - bitta loop'da
+SHARD_BATCH_SIZE = 100  # Natijalar asosiy jarayonga shunday paketlarda yuboriladi
+SHARD_FLUSH_INTERVAL = 0.5  # sekund - paket to'lmasa ham shuncha vaqtda yuboriladi
+SHARD_STOP_POLL_INTERVAL = 0.5  # sekund - bekor qilish belgisini tekshirish oralig'i
+
+# Worker jarayonidagi holat (initializer orqali o'rnatiladi)
+_shard_events = None
+_shard_stop = None
+_shard_completed = None  # Barcha shardlarda tugagan domenlar (umumiy hisoblagich)
+
+
+def sharding_enabled(count: int, workers: Optional[int] = None) -> bool:
+    """Shu hajmdagi ro'yxat jarayonlarga bo'linadimi"""
+    workers = SHARD_WORKERS if workers is None else workers
+    return workers > 1 and count > SHARD_MIN_DOMAINS
+
+
+def split_into_shards(records: List[DomainRecord], rejected: List[str],
+                      shard_size: int = SHARD_SIZE) -> List[List[Union[str, DomainRecord]]]:
+    """
+    Domenlarni registrable domen xeshi bo'yicha shardlarga bo'lish - bitta saytning
+    barcha subdomenlari bitta jarayonga tushadi, shuning uchun host bo'yicha
+    politeness cheklovlari jarayonlar orasida buzilmaydi.
+    """
+    count = max(1, math.ceil((len(records) + len(rejected)) / max(1, shard_size)))
+    shards: List[List[Union[str, DomainRecord]]] = [[] for _ in range(count)]
+    for record in records:
+        shards[zlib.crc32(record.registrable.encode('utf-8')) % count].append(record)
+    for index, value in enumerate(rejected):
+        shards[index % count].append(value)
+    return [shard for shard in shards if shard]
+
+
+def _init_shard_worker(events, stop, completed, result_store_path: Optional[str],
+                       shared_cache_path: Optional[str], metrics_path: Optional[str]) -> None:
+    global _shard_events, _shard_stop, _shard_completed
+    _shard_events = events
+    # Bekor qilingan vazifada asosiy jarayon navbatni o'qimay qo'yadi - yozilmagan
+    # paketlar jarayon chiqishini bloklamasin (normal holatda hammasi allaqachon o'qilgan)
+    _shard_events.cancel_join_thread()
+    _shard_stop = stop
+    _shard_completed = completed
+    configure_result_store(result_store_path)
+    configure_shared_cache(shared_cache_path)
+    configure_metrics(metrics_path)
+
+
+async def _check_shard(shard: List[Union[str, DomainRecord]], on_result: Callable[[Dict[str, Any]], None],
+                       concurrency: Optional[int], force_refresh: bool, http2: Optional[bool],
+                       deadline: Optional[float], job_total: Optional[int]) -> None:
+    # Muddat bosimi butun vazifa bo'yicha: shard faqat o'z domenlarini ko'rsa, navbatdagi
+    # shardlarga vaqt qolmaydi
+    job = JobProgress(job_total, lambda: _shard_completed.value) if job_total is not None else None
+    task = asyncio.create_task(check_domains(shard, concurrency, on_result, force_refresh=force_refresh,
+                                             http2=http2, collect_results=False, max_domains=None,
+                                             deadline=deadline, job=job))
+    # Asosiy jarayon vazifani bekor qilsa, shard ham to'xtaydi
+    while not task.done():
+        await asyncio.wait({task}, timeout=SHARD_STOP_POLL_INTERVAL)
+        if not task.done() and _shard_stop.is_set():
+            task.cancel()
+    if not task.cancelled():
+        task.result()
+
+
+def _run_shard(shard_index: int, shard: List[Union[str, DomainRecord]], concurrency: Optional[int],
+               force_refresh: bool, http2: Optional[bool], deadline: Optional[float] = None,
+               job_total: Optional[int] = None) -> int:
+    """Worker jarayonida: shardni o'z event loop'ida tekshirish, natijalarni paketlab yuborish"""
+    batch: List[Dict[str, Any]] = []
+    sent = 0
+    last_flush = time.monotonic()
+
+    def flush() -> None:
+        nonlocal sent, last_flush
+        if batch:
+            _shard_events.put((shard_index, batch[:], False))
+            sent += len(batch)
+            batch.clear()
+        last_flush = time.monotonic()
+
+    def on_result(result: Dict[str, Any]) -> None:
+        with _shard_completed.get_lock():
+            _shard_completed.value += 1
+        batch.append(result)
+        if len(batch) >= SHARD_BATCH_SIZE or time.monotonic() - last_flush >= SHARD_FLUSH_INTERVAL:
+            flush()
+
+    try:
+        if not _shard_stop.is_set():
+            asyncio.run(_check_shard(shard, on_result, concurrency, force_refresh, http2, deadline, job_total))
+    finally:
+        flush()
+        # Pool jarayonlari atexit'siz tugaydi - metrikalar va kesh yozuvlari shard oxirida yoziladi
+        flush_metrics()
+        flush_shared_cache()
+        # Shard tugadi belgisi (xato bilan tugasa ham)
+        _shard_events.put((shard_index, [], True))
+    return sent
+
+
+async def check_domains_sharded(domains: List[str], concurrency: Optional[int] = None,
+                                progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                                force_refresh: bool = False,
+                                http2: Optional[bool] = None,
+                                collect_results: bool = True,
+                                workers: Optional[int] = None,
+                                deadline: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    check_domains ning ko'p jarayonli varianti (parametrlar va natija bir xil).
+    Ro'yxat bir marta normallashtiriladi va shardlarga bo'linadi; shardlar spawn
+    jarayonlar pool'ida (SHARD_WORKERS) parallel tekshiriladi. Natijalar kelishi
+    bilan progress_callback ga uzatiladi - bitta hisobot oqimi. Jarayon yiqilsa,
+    uning tekshirilmagan domenlari xato natijasi bilan qaytadi.
+    """
+    workers = SHARD_WORKERS if workers is None else workers
+    rejected: List[str] = []
+    records = normalize_domains(domains, rejected)
+    shards = split_into_shards(records, rejected)
+    workers = max(1, min(workers, len(shards)))
+    logger.info(f"Checking {len(records) + len(rejected)} unique domains in {len(shards)} shards "
+                f"on {workers} processes")
+
+    collected: List[Dict[str, Any]] = []
+    # Har bir sharddan kelgan domenlar - jarayon yiqilsa, qolganlari xato natijasi oladi
+    reported: List[Set[str]] = [set() for _ in shards]
+
+    def record(result: Dict[str, Any]) -> None:
+        if collect_results:
+            collected.append(result)
+        if progress_callback is not None:
+            try:
+                progress_callback(result)
+            except Exception as e:
+                logger.error(f"Progress callback error: {str(e)}")
+
+    loop = asyncio.get_running_loop()
+    context = multiprocessing.get_context('spawn')
+    events = context.Queue()
+    stop = context.Event()
+    completed = context.Value('q', 0)
+    store = get_result_store()
+    shared_backend = get_shared_backend()
+    metrics_backend = get_metrics_backend()
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_shard_worker,
+        initargs=(events, stop, completed, store.path if store is not None else None,
+                  getattr(shared_backend, 'path', None), getattr(metrics_backend, 'path', None))
+    )
+
+    def next_event():
+        try:
+            return events.get(timeout=SHARD_STOP_POLL_INTERVAL)
+        except queue.Empty:
+            return None
+
+    try:
+        futures = [
+            loop.run_in_executor(pool, _run_shard, index, shard, concurrency, force_refresh, http2, deadline,
+                                 len(records) + len(rejected))
+            for index, shard in enumerate(shards)
+        ]
+        finished = set()
+        while len(finished) < len(shards):
+            event = await loop.run_in_executor(None, next_event)
+            if event is not None:
+                shard_index, results, done = event
+                for result in results:
+                    reported[shard_index].add(result["domain"])
+                    record(result)
+                if done:
+                    finished.add(shard_index)
+                continue
+
+            # Jarayoni yiqilgan shardlar tugadi belgisini yubora olmaydi
+            for index, future in enumerate(futures):
+                if index in finished or not future.done() or future.exception() is None:
+                    continue
+                logger.error(f"Shard {index} failed: {str(future.exception())}")
+                finished.add(index)
+                for value in shards[index]:
+                    domain = value.domain if isinstance(value, DomainRecord) else value
+                    if domain not in reported[index]:
+                        record(error_result(domain, f"Error: {type(future.exception()).__name__}"))
+    finally:
+        # Bekor qilinsa (timeout, foydalanuvchi) shardlar to'xtatiladi
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    logger.info(f"Completed checking {sum(len(domains) for domains in reported)} domains "
+                f"in {len(shards)} shards")
+    return collected
@@ -0,0 +1,325 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from utils.domain_checker import error_result
+from utils.file_reader import DomainRecord, normalize_domains
+from utils.sharding import split_into_shards
+
+logger = logging.getLogger(__name__)
+
+# Taqsimlangan rejim: koordinator ro'yxatni ish birliklariga bo'lib SQLite navbatiga
+# yozadi, checker tugunlari (worker.py) birliklarni ijaraga (lease) olib tekshiradi.
+# Faqat bitta xost: WAL tarmoq disklarida (NFS/SMB) xavfsiz emas
+WORK_QUEUE_PATH = os.environ.get('WORK_QUEUE_PATH', '')  # Bo'sh - taqsimlangan rejim o'chirilgan
+WORK_UNIT_SIZE = int(os.environ.get('WORK_UNIT_SIZE', 500))  # Bir birlikdagi domenlar soni
+WORK_LEASE_SECONDS = float(os.environ.get('WORK_LEASE_SECONDS', 60))  # Yangilanmagan ijara shundan keyin tugaydi
+WORK_MAX_ATTEMPTS = 3  # Birlik shuncha marta ijaraga berilib tugallanmasa - xato natijalari bilan yopiladi
+WORK_POLL_INTERVAL = 0.5  # sekund - koordinator natijalarni shu oraliqda o'qiydi
+WORK_FETCH_LIMIT = 1000  # Bir o'qishda olinadigan natijalar soni
+
+UNIT_PENDING = "pending"
+UNIT_LEASED = "leased"
+UNIT_DONE = "done"
+UNIT_FAILED = "failed"
+
+
+def _encode_item(item: Union[str, DomainRecord]) -> Any:
+    return list(item) if isinstance(item, DomainRecord) else item
+
+
+def _decode_item(item: Any) -> Union[str, DomainRecord]:
+    return DomainRecord(*item) if isinstance(item, list) else item
+
+
+def _item_domain(item: Union[str, DomainRecord]) -> str:
+    return item.domain if isinstance(item, DomainRecord) else item
+
+
+class WorkQueue:
+    """
+    SQLite (WAL) asosidagi ish navbati. Birlik holati: pending -> leased -> done.
+    Ijara muddati o'tgan birlik (tugun yiqilgan) yana beriladi; tugun natija
+    yozishi va ijarani yangilashi faqat ijara hali o'ziniki bo'lsa qabul qilinadi.
+    Har bir thread o'z ulanishidan foydalanadi. Fayl mahalliy diskda bo'lishi kerak -
+    barcha tugunlar koordinator bilan bitta xostda.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " job_id TEXT PRIMARY KEY,"
+                " options TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS units ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " job_id TEXT NOT NULL,"
+                " items TEXT NOT NULL,"
+                " state TEXT NOT NULL,"
+                " worker TEXT,"
+                " lease_expires REAL,"
+                " attempts INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS units_state ON units (state, lease_expires)")
+            conn.execute("CREATE INDEX IF NOT EXISTS units_job ON units (job_id)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " job_id TEXT NOT NULL,"
+                " unit_id INTEGER NOT NULL,"
+                " result TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_job ON results (job_id, id)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        """BEGIN IMMEDIATE - bir vaqtda bitta yozuvchi (ijaraga olish poygasiz)"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    def submit_job(self, job_id: str, units: List[List[Union[str, DomainRecord]]],
+                   options: Optional[Dict[str, Any]] = None) -> int:
+        conn = self._transaction()
+        try:
+            conn.execute("INSERT OR REPLACE INTO jobs (job_id, options, created_at) VALUES (?, ?, ?)",
+                         (job_id, json.dumps(options or {}), time.time()))
+            conn.executemany(
+                "INSERT INTO units (job_id, items, state) VALUES (?, ?, ?)",
+                [(job_id, json.dumps([_encode_item(item) for item in unit]), UNIT_PENDING) for unit in units]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return len(units)
+
+    @staticmethod
+    def _fail_exhausted(conn: sqlite3.Connection, now: float) -> int:
+        """Ko'p marta ijarasi tugagan (tugunni yiqitadigan) birliklar qayta berilmaydi"""
+        return conn.execute(
+            "UPDATE units SET state = ? WHERE state = ? AND lease_expires < ? AND attempts >= ?",
+            (UNIT_FAILED, UNIT_LEASED, now, WORK_MAX_ATTEMPTS)
+        ).rowcount
+
+    def lease(self, worker: str, lease_seconds: float = WORK_LEASE_SECONDS
+              ) -> Optional[Tuple[int, str, List[Union[str, DomainRecord]], Dict[str, Any]]]:
+        """Navbatdagi birlikni ijaraga olish: (unit_id, job_id, domenlar, parametrlar) yoki None"""
+        now = time.time()
+        conn = self._transaction()
+        try:
+            self._fail_exhausted(conn, now)
+            row = conn.execute(
+                "SELECT units.id, units.job_id, units.items, jobs.options FROM units"
+                " JOIN jobs ON jobs.job_id = units.job_id"
+                " WHERE units.state = ? OR (units.state = ? AND units.lease_expires < ?)"
+                " ORDER BY units.id LIMIT 1",
+                (UNIT_PENDING, UNIT_LEASED, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            unit_id, job_id, items, options = row
+            conn.execute(
+                "UPDATE units SET state = ?, worker = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                (UNIT_LEASED, worker, now + lease_seconds, unit_id)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return unit_id, job_id, [_decode_item(item) for item in json.loads(items)], json.loads(options)
+
+    def renew(self, unit_id: int, worker: str, lease_seconds: float = WORK_LEASE_SECONDS) -> bool:
+        """Ijarani uzaytirish. False - ijara yo'qotilgan yoki vazifa bekor qilingan (tekshiruvni to'xtatish kerak)"""
+        cursor = self._connection().execute(
+            "UPDATE units SET lease_expires = ? WHERE id = ? AND worker = ? AND state = ?",
+            (time.time() + lease_seconds, unit_id, worker, UNIT_LEASED)
+        )
+        return cursor.rowcount == 1
+
+    def add_results(self, unit_id: int, worker: str, results: List[Dict[str, Any]]) -> bool:
+        """Natijalarni yozish - faqat ijara egasidan qabul qilinadi"""
+        if not results:
+            return True
+        conn = self._transaction()
+        try:
+            row = conn.execute("SELECT job_id FROM units WHERE id = ? AND worker = ? AND state = ?",
+                               (unit_id, worker, UNIT_LEASED)).fetchone()
+            if row is not None:
+                conn.executemany(
+                    "INSERT INTO results (job_id, unit_id, result) VALUES (?, ?, ?)",
+                    [(row[0], unit_id, json.dumps(result)) for result in results]
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return row is not None
+
+    def complete(self, unit_id: int, worker: str) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE units SET state = ?, lease_expires = NULL WHERE id = ? AND worker = ? AND state = ?",
+            (UNIT_DONE, unit_id, worker, UNIT_LEASED)
+        )
+        return cursor.rowcount == 1
+
+    def fetch_results(self, job_id: str, after_id: int = 0,
+                      limit: int = WORK_FETCH_LIMIT) -> List[Tuple[int, Dict[str, Any]]]:
+        rows = self._connection().execute(
+            "SELECT id, result FROM results WHERE job_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (job_id, after_id, limit)
+        )
+        return [(row_id, json.loads(payload)) for row_id, payload in rows]
+
+    def count_results(self, job_id: str) -> int:
+        """Vazifa bo'yicha navbatga yozilgan natijalar soni (barcha tugunlardan)"""
+        row = self._connection().execute("SELECT COUNT(*) FROM results WHERE job_id = ?", (job_id,)).fetchone()
+        return row[0]
+
+    def unit_states(self, job_id: str) -> Dict[str, int]:
+        """Vazifa birliklari holati bo'yicha soni (ijarasi tugab ketgan birliklar ham yopiladi)"""
+        conn = self._connection()
+        self._fail_exhausted(conn, time.time())
+        rows = conn.execute(
+            "SELECT state, COUNT(*) FROM units WHERE job_id = ? GROUP BY state", (job_id,)
+        )
+        return dict(rows.fetchall())
+
+    def failed_units(self, job_id: str) -> List[List[Union[str, DomainRecord]]]:
+        rows = self._connection().execute(
+            "SELECT items FROM units WHERE job_id = ? AND state = ?", (job_id, UNIT_FAILED)
+        )
+        return [[_decode_item(item) for item in json.loads(items)] for (items,) in rows]
+
+    def delete_job(self, job_id: str) -> None:
+        """Vazifani o'chirish - tugunlardagi ijaralar renew() da yo'qoladi va tekshiruv to'xtaydi"""
+        conn = self._transaction()
+        try:
+            conn.execute("DELETE FROM results WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM units WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+_work_queue: Optional[WorkQueue] = None
+
+
+def configure_work_queue(path: Optional[str] = WORK_QUEUE_PATH) -> Optional[WorkQueue]:
+    """Umumiy ish navbatini sozlash (None yoki bo'sh - taqsimlangan rejim o'chirilgan)"""
+    global _work_queue
+    if not path:
+        _work_queue = None
+        return None
+    try:
+        _work_queue = WorkQueue(path)
+        logger.info(f"Work queue at {path}")
+    except (sqlite3.Error, OSError) as e:
+        logger.error(f"Could not open work queue {path}: {str(e)}")
+        _work_queue = None
+    return _work_queue
+
+
+def get_work_queue() -> Optional[WorkQueue]:
+    return _work_queue
+
+
+async def check_domains_distributed(domains: List[str], concurrency: Optional[int] = None,
+                                    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                                    force_refresh: bool = False,
+                                    http2: Optional[bool] = None,
+                                    collect_results: bool = True,
+                                    work_queue: Optional[WorkQueue] = None,
+                                    job_id: Optional[str] = None,
+                                    deadline: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    check_domains ning koordinator varianti (parametrlar va natija bir xil).
+    Ro'yxat normallashtirilib registrable domen bo'yicha WORK_UNIT_SIZE lik birliklarga
+    bo'linadi va navbatga yoziladi; tugunlar (worker.py) ularni tekshirib natijalarni
+    navbatga qaytaradi. Natijalar kelishi bilan progress_callback ga uzatiladi -
+    bitta vazifa, bitta hisobot. Qayta berilgan birlikdagi takroriy natijalar tashlanadi.
+    Kamida bitta tugun ishlab turishi kerak.
+    """
+    work_queue = work_queue if work_queue is not None else get_work_queue()
+    if work_queue is None:
+        raise RuntimeError("Work queue is not configured")
+
+    rejected: List[str] = []
+    records = normalize_domains(domains, rejected)
+    units = split_into_shards(records, rejected, WORK_UNIT_SIZE)
+    job_id = job_id or f"job-{os.getpid()}-{time.time_ns()}"
+    loop = asyncio.get_running_loop()
+    # deadline - time.time() bo'yicha (tugunlar koordinator bilan bitta xostda); total - tugunlar
+    # muddat bosimini o'z birligi emas, butun vazifa bo'yicha hisoblashi uchun
+    options = {"concurrency": concurrency, "force_refresh": force_refresh, "http2": http2, "deadline": deadline,
+               "total": len(records) + len(rejected)}
+    await loop.run_in_executor(None, work_queue.submit_job, job_id, units, options)
+    logger.info(f"Queued {len(records) + len(rejected)} domains in {len(units)} work units for job {job_id}")
+
+    collected: List[Dict[str, Any]] = []
+    reported: Set[str] = set()
+
+    def record(result: Dict[str, Any]) -> None:
+        if result["domain"] in reported:
+            return
+        reported.add(result["domain"])
+        if collect_results:
+            collected.append(result)
+        if progress_callback is not None:
+            try:
+                progress_callback(result)
+            except Exception as e:
+                logger.error(f"Progress callback error: {str(e)}")
+
+    last_id = 0
+    try:
+        while True:
+            rows = await loop.run_in_executor(None, work_queue.fetch_results, job_id, last_id)
+            for last_id, result in rows:
+                record(result)
+            if len(rows) == WORK_FETCH_LIMIT:
+                continue
+
+            states = await loop.run_in_executor(None, work_queue.unit_states, job_id)
+            if not states.get(UNIT_PENDING) and not states.get(UNIT_LEASED):
+                # Oxirgi natijalar holat o'qilishidan oldin yozilgan bo'lishi mumkin
+                rows = await loop.run_in_executor(None, work_queue.fetch_results, job_id, last_id, 10 ** 9)
+                for last_id, result in rows:
+                    record(result)
+                break
+            await asyncio.sleep(WORK_POLL_INTERVAL)
+
+        for unit in await loop.run_in_executor(None, work_queue.failed_units, job_id):
+            logger.error(f"Work unit of job {job_id} failed {WORK_MAX_ATTEMPTS} times")
+            for item in unit:
+                record(error_result(_item_domain(item), "Error: WorkUnitFailed"))
+    finally:
+        # Tugallangan yoki bekor qilingan - navbatdan tozalanadi (tugunlar ijarani yo'qotadi)
+        await asyncio.shield(loop.run_in_executor(None, work_queue.delete_job, job_id))
+
+    logger.info(f"Completed checking {len(reported)} domains for job {job_id}")
+    return collected
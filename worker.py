@@ -0,0 +1,200 @@
+"""
+Taqsimlangan rejim uchun checker tuguni.
+
+Foydalanish:
+    WORK_QUEUE_PATH=data/work_queue.sqlite3 python worker.py
+    python worker.py --queue data/work_queue.sqlite3 --nodes 4
+
+Tugun holatsiz: navbatdan ish birligini ijaraga oladi, check_domains bilan
+tekshiradi, natijalarni paketlab navbatga yozadi va ijarani muntazam yangilaydi.
+Tugun yiqilsa, ijara WORK_LEASE_SECONDS dan keyin tugaydi va birlik boshqa
+tugunga beriladi. Istalgancha tugun ishga tushirish mumkin (--nodes - jarayonlar soni).
+
+Navbat - SQLite WAL fayli: tugunlar koordinator bilan bitta xostda va mahalliy
+diskda ishlashi kerak. WAL umumiy xotiradan foydalanadi, NFS/SMB kabi tarmoq
+disklarida navbat buzilishi yoki ijaralar yo'qolishi mumkin.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+import uuid
+from typing import Optional
+
+from utils.cache import configure_shared_cache, flush_shared_cache
+from utils.deadlines import JobProgress
+from utils.domain_checker import check_domains
+from utils.metrics import configure_metrics, flush_metrics
+from utils.result_store import configure_result_store
+from utils.work_queue import WORK_LEASE_SECONDS, WORK_QUEUE_PATH, WorkQueue
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Standart fayllar app.py dagi kabi loyiha papkasidagi data/ ichida
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+NODE_IDLE_POLL_INTERVAL = 1.0  # sekund - navbat bo'sh bo'lsa shuncha kutiladi
+NODE_RESULT_BATCH_SIZE = 50  # Natijalar navbatga shunday paketlarda yoziladi
+NODE_FLUSH_INTERVAL = 1.0  # sekund - paket to'lmasa ham shuncha vaqtda yoziladi
+NODE_PROGRESS_INTERVAL = 2.0  # sekund - vazifaning umumiy progressi navbatdan shunday yangilanadi
+
+
+async def run_unit(queue: WorkQueue, worker_id: str, unit_id: int, items, options,
+                   job_id: Optional[str] = None) -> bool:
+    """Bitta birlikni tekshirish. False - ijara yo'qotildi (natijalar endi qabul qilinmaydi)"""
+    loop = asyncio.get_running_loop()
+    batch = []
+    last_flush = time.monotonic()
+    lease_lost = False
+    pending_writes = set()
+    # Butun vazifada tugaganlar: navbatdagi natijalar (oxirgi so'rovda) + shundan keyin shu tugunda tugaganlar
+    job_done = 0
+    done_since_refresh = 0
+
+    def flush() -> None:
+        nonlocal last_flush
+        last_flush = time.monotonic()
+        if not batch:
+            return
+        results = batch[:]
+        batch.clear()
+        write = loop.run_in_executor(None, queue.add_results, unit_id, worker_id, results)
+        pending_writes.add(write)
+        write.add_done_callback(pending_writes.discard)
+
+    def on_result(result) -> None:
+        nonlocal done_since_refresh
+        done_since_refresh += 1
+        batch.append(result)
+        if len(batch) >= NODE_RESULT_BATCH_SIZE or time.monotonic() - last_flush >= NODE_FLUSH_INTERVAL:
+            flush()
+
+    # Muddat bosimi butun vazifa bo'yicha - tugun faqat o'z birligini ko'rsa, navbatdagi
+    # birliklarga vaqt qolmaydi
+    job = None
+    if job_id is not None and options.get("deadline") is not None and options.get("total"):
+        job = JobProgress(options["total"], lambda: job_done + done_since_refresh)
+        job_done = await loop.run_in_executor(None, queue.count_results, job_id)
+
+    check = asyncio.create_task(check_domains(
+        items, options.get("concurrency"), on_result,
+        force_refresh=bool(options.get("force_refresh")), http2=options.get("http2"),
+        collect_results=False, max_domains=None, deadline=options.get("deadline"), job=job
+    ))
+    # Ijarani muddatining uchdan birida yangilash; yo'qotilsa (vazifa bekor qilingan
+    # yoki birlik boshqa tugunga berilgan) tekshiruv to'xtatiladi
+    last_renew = time.monotonic()
+    while not check.done():
+        await asyncio.wait({check}, timeout=NODE_PROGRESS_INTERVAL if job is not None else WORK_LEASE_SECONDS / 3)
+        if check.done():
+            break
+        if job is not None:
+            local_done = done_since_refresh
+            count = await loop.run_in_executor(None, queue.count_results, job_id)
+            # So'rov paytida tugaganlar keyingi yangilanishgacha mahalliy hisobda qoladi
+            job_done, done_since_refresh = count, done_since_refresh - local_done
+        if job is not None and time.monotonic() - last_renew < WORK_LEASE_SECONDS / 3:
+            continue
+        last_renew = time.monotonic()
+        if not await loop.run_in_executor(None, queue.renew, unit_id, worker_id):
+            lease_lost = True
+            check.cancel()
+
+    if lease_lost:
+        logger.warning(f"Lost lease on work unit {unit_id}, stopping")
+        return False
+    check.result()
+    flush()
+    if pending_writes:
+        await asyncio.wait(pending_writes)
+    return await loop.run_in_executor(None, queue.complete, unit_id, worker_id)
+
+
+async def run_node(queue: WorkQueue, worker_id: str, stop: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    logger.info(f"Checker node {worker_id} polling {queue.path}")
+    while not stop.is_set():
+        unit = await loop.run_in_executor(None, queue.lease, worker_id)
+        if unit is None:
+            try:
+                await asyncio.wait_for(stop.wait(), NODE_IDLE_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        unit_id, job_id, items, options = unit
+        logger.info(f"Checking work unit {unit_id} of job {job_id} ({len(items)} domains)")
+        try:
+            await run_unit(queue, worker_id, unit_id, items, options, job_id)
+        except Exception as e:
+            # Ijara tugagach birlik boshqa tugunga (yoki shu tugunga) qayta beriladi
+            logger.error(f"Work unit {unit_id} failed: {str(e)}")
+
+
+def node_main(queue_path: str, result_store_path: str, shared_cache_path: str, metrics_path: str) -> None:
+    configure_result_store(result_store_path)
+    configure_shared_cache(shared_cache_path)
+    configure_metrics(metrics_path)
+    queue = WorkQueue(queue_path)
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    async def main() -> None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        await run_node(queue, worker_id, stop)
+
+    try:
+        asyncio.run(main())
+    finally:
+        # multiprocessing jarayonlari atexit'siz tugaydi
+        flush_metrics()
+        flush_shared_cache()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queue", default=WORK_QUEUE_PATH or os.path.join(DATA_DIR, "work_queue.sqlite3"),
+                        help="Ish navbati fayli (koordinator bilan bir xil)")
+    parser.add_argument("--nodes", type=int, default=1, help="Shu mashinadagi tugun jarayonlari soni")
+    parser.add_argument("--result-store", default=os.environ.get(
+        "RESULT_STORE_PATH", os.path.join(DATA_DIR, "results.sqlite3")), help="Natijalar ombori (bo'sh - o'chirilgan)")
+    parser.add_argument("--shared-cache", default=os.environ.get(
+        "SHARED_CACHE_PATH", os.path.join(DATA_DIR, "shared_cache.sqlite3")), help="Umumiy kesh (bo'sh - o'chirilgan)")
+    parser.add_argument("--metrics", default=os.environ.get(
+        "METRICS_PATH", os.path.join(DATA_DIR, "metrics.sqlite3")), help="Metrikalar fayli (bo'sh - o'chirilgan)")
+    args = parser.parse_args()
+
+    if args.nodes <= 1:
+        node_main(args.queue, args.result_store, args.shared_cache, args.metrics)
+        return 0
+
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=node_main, args=(args.queue, args.result_store, args.shared_cache, args.metrics))
+        for _ in range(args.nodes)
+    ]
+    for process in processes:
+        process.start()
+    # SIGTERM tugunlarga uzatiladi - har biri joriy birlikni tugatib chiqadi
+    signal.signal(signal.SIGTERM, lambda signum, frame: [process.terminate() for process in processes])
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())